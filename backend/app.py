@@ -13,16 +13,24 @@ from services import (
     get_user as service_get_user,
     create_user as service_create_user,
     update_user as service_update_user,
-    get_all_recipes,
+    get_recipes_page,
+    recipe_projection,
+    InvalidQueryParam,
+    project_recipe_rows,
+    RECIPE_PAGE_SIZE,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
     get_recipes_result,
     get_recipe,
     create_recipe,
     update_recipe,
+    set_recipe_image,
+    queue_upload_size_check,
     delete_recipe,
     get_all_ingredients,
     get_ingredient,
     create_ingredient,
-    get_notifications_for_user,
+    get_notifications_page,
     create_notification,
     mark_notification_read,
     mark_all_notifications_read,
@@ -34,15 +42,20 @@ from services import (
     update_user_service,
     get_chefs_on_fire,
     get_chef_by_id,
-    get_recipes_by_chef,
+    get_recipes_by_chef_page,
     get_trending_recipes,
     toggle_follow,
+    get_following_set,
+    check_if_following,
     get_user_favorites,
     toggle_user_favorite,
     get_user_favorite_ids,
     update_fcm_token,
     generate_recipes,
     send_scheduled_recipe_notification,
+    get_broadcast_stats,
+    send_daily_recipe_notification,
+    warm_up as warm_up_services,
 )
 from auth import token_required, optional_token
 from supabase_client import set_postgrest_token
@@ -54,24 +67,161 @@ from supabase_client import (
     SUPABASE_SERVICE_ROLE_KEY,
 )
 import traceback
+import threading
 import time
+import hmac
 import hashlib
 import requests
 import re
-from cloudinary_utils import get_cloudinary_config
+import http_client
+import metrics
+import request_accounting
+from urllib.parse import urlencode
+import notification_outbox
+import image_upload
+import upload_dedupe
+import kv_store
+import rate_limit
 from cooking import generate_cooking_instructions
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional, Set
 
 _SUPABASE_PASSWORD_RESET_REDIRECT = os.getenv("SUPABASE_PASSWORD_RESET_REDIRECT")
 
-# Simple in-memory throttle store for resend limits (per email)
-_last_resend_ts = {}
-_pending_email_changes: Dict[str, Dict[str, Any]] = {}
-_pending_password_changes: Dict[str, Dict[str, Any]] = {}
+# Resend throttles and pending email/password changes live in kv_store
+# (shared by all workers), under these key prefixes
+_RESEND_KEY = "resend:"
+_PENDING_EMAIL_KEY = "email_change:"
+_PENDING_PASSWORD_KEY = "password_change:"
+# Failed-verify counter of a pending change, at this prefix + its key
+_OTP_ATTEMPTS_KEY = "otp_attempts:"
+_RESEND_MIN_INTERVAL = 60  # seconds; adjust to 120 for 2 minutes
 
 _EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 _OTP_TTL_SECONDS = 600  # 10 minutes
 _MAX_OTP_ATTEMPTS = 5
+# Pending changes are kept this long past expiry so a late verify is told
+# the code expired rather than that nothing was requested
+_PENDING_GRACE_SECONDS = 3600
+# Key for the digest of a pending new password; any server-side secret will
+# do, as long as every worker has the same one
+_PENDING_SECRET = (
+    os.getenv("PENDING_CHANGE_SECRET")
+    or os.getenv("SUPABASE_JWT_SECRET")
+    or SUPABASE_SERVICE_ROLE_KEY
+)
+if not _PENDING_SECRET:
+    print("[auth] No PENDING_CHANGE_SECRET, SUPABASE_JWT_SECRET or service role key; "
+          "pending password changes only verify on the worker that took them")
+    _PENDING_SECRET = os.urandom(32).hex()
+
+
+def _pending_password_digest(user_id: str, password: str) -> str:
+    """HMAC of a requested new password, so kv_store never holds a guessable hash of it."""
+    message = f"{user_id}:{password}".encode("utf-8")
+    return hmac.new(_PENDING_SECRET.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def _count_otp_attempt(key: str, entry: Dict[str, Any]) -> int:
+    """Count one verify attempt on the pending change at `key`; returns the attempts so far.
+
+    Counted before the code is checked, with an atomic kv_store.incr, so
+    concurrent guesses on different workers cannot get past _MAX_OTP_ATTEMPTS.
+    """
+    remaining = entry.get("expires_at", 0) - time.time() + _PENDING_GRACE_SECONDS
+    return kv_store.incr(_OTP_ATTEMPTS_KEY + key, max(remaining, 1))
+
+
+def _clear_pending(key: str) -> None:
+    kv_store.pop(key)
+    kv_store.pop(_OTP_ATTEMPTS_KEY + key)
+
+
+_PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", "60"))
+
+
+def _cacheable_json(payload: Any):
+    """JSON response with an ETag and Cache-Control; answers 304 on If-None-Match."""
+    response = jsonify(payload)
+    response.add_etag()
+    response.headers["Cache-Control"] = f"public, max-age={_PUBLIC_CACHE_MAX_AGE}"
+    return response.make_conditional(request)
+
+
+def _page_args(page_size: int, unbounded: bool = False):
+    """Read ?cursor=&limit= for paged list routes. Raises InvalidQueryParam on bad input.
+
+    With unbounded=True a request that sends neither gets limit None (the
+    whole list, as before paging), so clients that never follow
+    next_cursor still see every row.
+    """
+    cursor = request.args.get("cursor") or None
+    raw_limit = request.args.get("limit")
+    if raw_limit is None or raw_limit == "":
+        return cursor, (None if unbounded and cursor is None else page_size)
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise InvalidQueryParam("invalid_limit")
+    return cursor, max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _recipe_columns(default_view: str) -> str:
+    """Projection for recipe routes from ?view=card|list|detail or ?fields=a,b."""
+    return recipe_projection(request.args.get("view"), request.args.get("fields"), default=default_view)
+
+
+def _with_page_headers(response, page: Dict[str, Any]):
+    """Advertise the next page via X-Next-Cursor and a Link header; body stays a list."""
+    next_cursor = page.get("next_cursor")
+    if next_cursor:
+        args = request.args.to_dict()
+        args["cursor"] = next_cursor
+        next_url = f"{request.base_url}?{urlencode(args)}"
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return response
+
+
+# -----------------------------
+# Response shaping shared with the async views in asgi.py
+# -----------------------------
+def _recipe_page_args(default_view: str, unbounded: bool = False) -> Dict[str, Any]:
+    """cursor/limit/columns keyword arguments for the recipe page services."""
+    cursor, limit = _page_args(RECIPE_PAGE_SIZE, unbounded=unbounded)
+    return {"cursor": cursor, "limit": limit, "columns": _recipe_columns(default_view)}
+
+
+def _notification_page_args() -> Dict[str, Any]:
+    cursor, limit = _page_args(DEFAULT_PAGE_SIZE, unbounded=True)
+    return {"cursor": cursor, "limit": limit}
+
+
+def _page_response(page: Dict[str, Any], cacheable: bool = False):
+    body = _cacheable_json(page["items"]) if cacheable else jsonify(page["items"])
+    return _with_page_headers(body, page)
+
+
+def _list_error(e: Exception):
+    """400 for a bad ?cursor=/limit=/view=/fields=, 500 for anything else."""
+    return jsonify({"error": str(e)}), 400 if isinstance(e, InvalidQueryParam) else 500
+
+
+def _favorites_error(e: Exception):
+    error_str = str(e).lower()
+    # Return 401 for JWT errors so frontend can refresh token
+    if 'jwt' in error_str or 'expired' in error_str or 'pgrst303' in error_str:
+        return jsonify({"error": str(e), "code": "JWT_EXPIRED"}), 401
+    return jsonify({"error": str(e)}), 400
+
+
+def _viewer_id(token_claims: Optional[Dict[str, Any]]) -> Optional[str]:
+    return token_claims.get("sub") if token_claims else None
+
+
+def _mark_followed(chefs: List[Dict[str, Any]], following: Set[str]) -> List[Dict[str, Any]]:
+    for chef in chefs:
+        chef["is_followed"] = chef.get("user_id") in following
+    return chefs
 
 
 def _require_service_key() -> None:
@@ -121,7 +271,7 @@ def _auth_email_exists(email: str) -> bool:
 
 def _verify_current_password(email: str, password: str) -> bool:
     try:
-        resp = requests.post(
+        resp = http_client.post(
             f"{SUPABASE_URL}/auth/v1/token?grant_type=password",
             headers={
                 "apikey": SUPABASE_ANON_KEY or SUPABASE_SERVICE_ROLE_KEY,
@@ -140,31 +290,76 @@ def _verify_current_password(email: str, password: str) -> bool:
     raise RuntimeError(f"Password verification unexpected error: {resp.status_code} {resp.text}")
 
 app = Flask(__name__)
+# Bounds form/JSON parsing too, which a chunked body would otherwise not be
+app.config["MAX_CONTENT_LENGTH"] = image_upload.MAX_REQUEST_BYTES
 CORS(app)
+metrics.init_app(app)
+request_accounting.init_app(app)
+rate_limit.init_app(app)
+
+# Optional bearer token for /metrics (scrapers send it in Authorization)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
 
 # -----------------------------
-# Scheduled Notifications (APScheduler)
+# Scheduled Notifications (APScheduler) and other background services
 # -----------------------------
-try:
-    from apscheduler.schedulers.background import BackgroundScheduler
-    from apscheduler.triggers.cron import CronTrigger
-    
-    scheduler = BackgroundScheduler()
-    # Schedule daily recipe notification at 9:00 AM
-    scheduler.add_job(
-        send_scheduled_recipe_notification,
-        CronTrigger(hour=9, minute=0),
-        id='daily_recipe_notification',
-        name='Daily Recipe Notification',
-        replace_existing=True
-    )
-    scheduler.start()
-    print("[Scheduler] APScheduler started - daily notifications at 9:00 AM")
-except ImportError:
-    print("[Scheduler] APScheduler not installed - scheduled notifications disabled")
-    print("[Scheduler] Install with: pip install APScheduler")
-except Exception as e:
-    print(f"[Scheduler] Failed to start scheduler: {e}")
+# Nothing here runs at import time. The first request starts the scheduler
+# and outbox workers and warms the Supabase/Firebase clients on a background
+# thread, so a cold boot answers /wake-up or /health without waiting on them.
+scheduler = None
+_background_started = False
+_background_lock = threading.Lock()
+
+
+def _start_scheduler() -> None:
+    global scheduler
+    try:
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from apscheduler.triggers.cron import CronTrigger
+
+        background_scheduler = BackgroundScheduler()
+        # Schedule daily recipe notification at 9:00 AM
+        background_scheduler.add_job(
+            send_daily_recipe_notification,
+            CronTrigger(hour=9, minute=0),
+            id='daily_recipe_notification',
+            name='Daily Recipe Notification',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        background_scheduler.start()
+        scheduler = background_scheduler
+        print("[Scheduler] APScheduler started - daily notifications at 9:00 AM")
+    except ImportError:
+        print("[Scheduler] APScheduler not installed - scheduled notifications disabled")
+        print("[Scheduler] Install with: pip install APScheduler")
+    except Exception as e:
+        print(f"[Scheduler] Failed to start scheduler: {e}")
+
+
+def _start_background_services() -> None:
+    _start_scheduler()
+    # Drain notification jobs left over from a previous run
+    notification_outbox.start()
+    kv_store.start()
+    try:
+        warm_up_services()
+    except Exception as e:
+        print(f"[startup] Warm-up failed: {e}")
+
+
+@app.before_request
+def _ensure_background_services():
+    global _background_started
+    if _background_started:
+        return
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+    threading.Thread(target=_start_background_services, name="background-startup", daemon=True).start()
+
 
 # Auth
 @app.route("/auth/signup", methods=["POST"])
@@ -265,20 +460,19 @@ def resend():
         email = payload.get("email")
         if not email:
             return jsonify({"error": "email is required"}), 400
-        now = time.time()
-        last = _last_resend_ts.get(email, 0)
-        min_interval = 60  # seconds; adjust to 120 for 2 minutes
-        remain = int(min_interval - (now - last))
-        if remain > 0:
+        # Claim the slot before calling Supabase so concurrent requests on
+        # other workers cannot both get through
+        if not kv_store.add(_RESEND_KEY + email, time.time(), _RESEND_MIN_INTERVAL):
+            remain = max(int(kv_store.ttl(_RESEND_KEY + email) or 0), 1)
             return jsonify({"error": "throttled", "retry_after": remain}), 429
         
         # Trigger Supabase resend for email confirmation
         try:
             # Use resend with proper type for email confirmation
             result = supabase.auth.resend({"type": "signup", "email": email})
-            _last_resend_ts[email] = now
             return jsonify({"message": "resent", "email": email}), 200
         except Exception as resend_err:
+            kv_store.pop(_RESEND_KEY + email)
             return jsonify({"error": f"Failed to resend: {str(resend_err)}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -317,7 +511,7 @@ def request_email_change(token_claims, token):
             
             # Make REST API call with user's token
             headers = _user_headers(token)
-            update_resp = requests.put(
+            update_resp = http_client.put(
                 f"{SUPABASE_URL}/auth/v1/user",
                 headers=headers,
                 json={"email": new_email}
@@ -342,13 +536,13 @@ def request_email_change(token_claims, token):
         if not user_id:
             return jsonify({"error": "user_not_found"}), 400
 
-        _pending_email_changes[user_id] = {
+        _clear_pending(_PENDING_EMAIL_KEY + user_id)
+        kv_store.put(_PENDING_EMAIL_KEY + user_id, {
             "new_email": new_email,
             "current_email": current_email,
             "requested_at": time.time(),
             "expires_at": time.time() + _OTP_TTL_SECONDS,
-            "attempts": 0,
-        }
+        }, _OTP_TTL_SECONDS + _PENDING_GRACE_SECONDS)
 
         return jsonify({"message": "email_change_otp_sent"}), 200
     except Exception as e:
@@ -370,26 +564,26 @@ def verify_email_change(token_claims, token):
             return jsonify({"error": "Please enter a valid email address."}), 400
 
         user_id = token_claims.get("sub")
-        pending = _pending_email_changes.get(user_id)
+        pending = kv_store.get(_PENDING_EMAIL_KEY + user_id) if user_id else None
         if not pending:
             return jsonify({"error": "No pending email change request. Please request a new code."}), 400
 
         if time.time() > pending.get("expires_at", 0):
-            _pending_email_changes.pop(user_id, None)
+            _clear_pending(_PENDING_EMAIL_KEY + user_id)
             return jsonify({"error": "Verification code expired. Please request a new one."}), 410
 
         if pending.get("new_email") != new_email:
             return jsonify({"error": "Email address doesn't match. Please check and try again."}), 400
 
-        attempts = int(pending.get("attempts", 0))
-        if attempts >= _MAX_OTP_ATTEMPTS:
-            _pending_email_changes.pop(user_id, None)
+        attempts = _count_otp_attempt(_PENDING_EMAIL_KEY + user_id, pending)
+        if attempts > _MAX_OTP_ATTEMPTS:
+            _clear_pending(_PENDING_EMAIL_KEY + user_id)
             return jsonify({"error": "Too many failed attempts. Please request a new code."}), 429
 
         # Verify OTP code for email change
         # Supabase sends a 6-digit OTP to the new email address
         try:
-            verify_resp = requests.post(
+            verify_resp = http_client.post(
                 f"{SUPABASE_URL}/auth/v1/verify",
                 headers=_anon_headers(),
                 json={
@@ -406,15 +600,14 @@ def verify_email_change(token_claims, token):
             
             resp_data = verify_resp.json()
         except Exception as exc:
-            pending["attempts"] = attempts + 1
-            if pending["attempts"] >= _MAX_OTP_ATTEMPTS:
-                _pending_email_changes.pop(user_id, None)
+            if attempts >= _MAX_OTP_ATTEMPTS:
+                _clear_pending(_PENDING_EMAIL_KEY + user_id)
             return jsonify({"error": f"otp_verification_failed: {exc}"}), 400
 
         # CRITICAL: Update email in Supabase Auth using Admin API
         # This is the ONLY way to actually change the email in auth.users table
         try:
-            admin_update_resp = requests.put(
+            admin_update_resp = http_client.put(
                 f"{SUPABASE_URL}/auth/v1/admin/users/{user_id}",
                 headers=_admin_headers(),
                 json={"email": new_email, "email_confirm": True}
@@ -435,7 +628,7 @@ def verify_email_change(token_claims, token):
         except Exception as exc:
             return jsonify({"error": f"profile_update_failed: {exc}"}), 500
 
-        _pending_email_changes.pop(user_id, None)
+        _clear_pending(_PENDING_EMAIL_KEY + user_id)
         
         # Extract complete session and user data from REST response
         user_data = resp_data.get("user", {})
@@ -502,7 +695,7 @@ def request_password_change(token_claims, token):
             if _SUPABASE_PASSWORD_RESET_REDIRECT:
                 payload_json["options"] = {"redirect_to": _SUPABASE_PASSWORD_RESET_REDIRECT}
             
-            reset_resp = requests.post(
+            reset_resp = http_client.post(
                 f"{SUPABASE_URL}/auth/v1/recover",
                 headers=_anon_headers(),
                 json=payload_json
@@ -521,14 +714,14 @@ def request_password_change(token_claims, token):
         if not user_id:
             return jsonify({"error": "user_not_found"}), 400
 
-        password_hash = hashlib.sha256(new_password.encode("utf-8")).hexdigest()
-        _pending_password_changes[user_id] = {
+        password_hash = _pending_password_digest(user_id, new_password)
+        _clear_pending(_PENDING_PASSWORD_KEY + user_id)
+        kv_store.put(_PENDING_PASSWORD_KEY + user_id, {
             "email": email,
             "requested_at": time.time(),
             "expires_at": time.time() + _OTP_TTL_SECONDS,
-            "attempts": 0,
             "new_password_hash": password_hash,
-        }
+        }, _OTP_TTL_SECONDS + _PENDING_GRACE_SECONDS)
 
         return jsonify({"message": "password_otp_sent"}), 200
     except Exception as e:
@@ -550,29 +743,29 @@ def verify_password_change(token_claims, token):
             return jsonify({"error": "Password must be at least 8 characters long."}), 400
 
         user_id = token_claims.get("sub")
-        entry = _pending_password_changes.get(user_id)
+        entry = kv_store.get(_PENDING_PASSWORD_KEY + user_id) if user_id else None
         if not entry:
             return jsonify({"error": "No pending password change. Please request a new code."}), 400
 
         if time.time() > entry.get("expires_at", 0):
-            _pending_password_changes.pop(user_id, None)
+            _clear_pending(_PENDING_PASSWORD_KEY + user_id)
             return jsonify({"error": "Verification code expired. Please request a new one."}), 410
 
-        attempts = int(entry.get("attempts", 0))
-        if attempts >= _MAX_OTP_ATTEMPTS:
-            _pending_password_changes.pop(user_id, None)
-            return jsonify({"error": "Too many failed attempts. Please request a new code."}), 429
-
-        expected_hash = entry.get("new_password_hash")
-        provided_hash = hashlib.sha256(new_password.encode("utf-8")).hexdigest()
-        if expected_hash != provided_hash:
+        expected_hash = entry.get("new_password_hash") or ""
+        provided_hash = _pending_password_digest(user_id, new_password)
+        if not hmac.compare_digest(expected_hash, provided_hash):
             return jsonify({"error": "Password doesn't match. Please enter the same password you used when requesting the code."}), 400
 
+        attempts = _count_otp_attempt(_PENDING_PASSWORD_KEY + user_id, entry)
+        if attempts > _MAX_OTP_ATTEMPTS:
+            _clear_pending(_PENDING_PASSWORD_KEY + user_id)
+            return jsonify({"error": "Too many failed attempts. Please request a new code."}), 429
+
         email = entry.get("email")
         
         # Verify OTP using REST API
         try:
-            verify_resp = requests.post(
+            verify_resp = http_client.post(
                 f"{SUPABASE_URL}/auth/v1/verify",
                 headers=_anon_headers(),
                 json={
@@ -592,14 +785,13 @@ def verify_password_change(token_claims, token):
             if not verify_token:
                 raise RuntimeError("No access token in verify response")
         except Exception as exc:
-            entry["attempts"] = attempts + 1
-            if entry["attempts"] >= _MAX_OTP_ATTEMPTS:
-                _pending_password_changes.pop(user_id, None)
+            if attempts >= _MAX_OTP_ATTEMPTS:
+                _clear_pending(_PENDING_PASSWORD_KEY + user_id)
             return jsonify({"error": f"otp_verification_failed: {exc}"}), 400
 
         # Update password using the verified token
         try:
-            update_resp = requests.put(
+            update_resp = http_client.put(
                 f"{SUPABASE_URL}/auth/v1/user",
                 headers=_user_headers(verify_token),
                 json={"password": new_password}
@@ -613,7 +805,7 @@ def verify_password_change(token_claims, token):
         except Exception as exc:
             return jsonify({"error": f"password_update_failed: {exc}"}), 400
 
-        _pending_password_changes.pop(user_id, None)
+        _clear_pending(_PENDING_PASSWORD_KEY + user_id)
         
         # Extract complete session and user data
         user_data = update_data.get("user", verify_data.get("user", {}))
@@ -648,6 +840,51 @@ def health():
     return jsonify({"status": "ok", "message": "Chef-Kit backend is running"}), 200
 
 
+@app.route("/health/http", methods=["GET"])
+def http_pool_health():
+    """Outbound HTTP connection pool counters (keep-alive reuse vs new connections)."""
+    return jsonify({"pools": http_client.pool_stats()}), 200
+
+
+@app.route("/health/uploads", methods=["GET"])
+def upload_dedupe_health():
+    """Upload dedupe index counters (hits, misses, hit rate, entries) for this worker."""
+    return jsonify(upload_dedupe.stats()), 200
+
+
+@app.route("/health/kv", methods=["GET"])
+def kv_store_health():
+    """Auth state store backend, live keys and this worker's hit/miss/expiry counters."""
+    try:
+        return jsonify(kv_store.stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/health/limits", methods=["GET"])
+def rate_limit_health():
+    """Requests holding a bulkhead slot on this host per route group, against each cap."""
+    try:
+        running = rate_limit.running()
+        groups = sorted({"auth", "default", *rate_limit.ROUTE_GROUPS.values()})
+        return jsonify({
+            "enabled": rate_limit.ENABLED,
+            "trusted_proxies": rate_limit.TRUSTED_PROXIES,
+            "bulkheads": {group: {"running": running.get(group, 0), "cap": rate_limit.bulkhead_for(group)}
+                          for group in groups},
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Prometheus metrics for all workers of this server."""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        return jsonify({"error": "Unauthorized"}), 401
+    return metrics.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
+
 @app.route("/wake-up", methods=["GET"])
 def wake_up():
     """Useless route to keep Render backend awake."""
@@ -661,19 +898,11 @@ def get_users(token_claims, token):
     try:
         users = get_all_users()
         
-        # If user is authenticated, check follow status for each user
-        if token_claims:
-            from services import check_if_following
-            current_user_id = token_claims.get("sub")
-            if current_user_id:
-                for user in users:
-                    user["is_followed"] = check_if_following(current_user_id, user["user_id"])
-            else:
-                for user in users:
-                    user["is_followed"] = False
-        else:
-            for user in users:
-                user["is_followed"] = False
+        # If user is authenticated, resolve follow status for all users in one query
+        current_user_id = token_claims.get("sub") if token_claims else None
+        following = get_following_set(current_user_id, [u.get("user_id") for u in users]) if current_user_id else set()
+        for user in users:
+            user["is_followed"] = user.get("user_id") in following
         
         return jsonify(users), 200
     except Exception as e:
@@ -729,84 +958,36 @@ def update_user(user_id, token_claims, token):
 def upload_avatar(user_id, token_claims, token):
     """Upload avatar image to Cloudinary and update user_avatar.
 
-    Expects JSON: { "image_base64": "data:image/...;base64,XXX" or pure base64 }
+    Send the image as the raw body (Content-Type: image/*), as multipart/form-data
+    part `file`, or (older app builds) as JSON { "image_base64": "..." }.
     """
     try:
         print(f"[avatar] Upload requested for user_id={user_id}")
-        print(f"[avatar] Token claims: {token_claims}")
         # Enforce user can only update their own avatar
         if token_claims["sub"] != user_id:
             print(f"[avatar] Token subject {token_claims.get('sub')} does not match path {user_id}")
             return jsonify({"error": "Cannot update another user's avatar"}), 403
 
-        payload = request.get_json() or {}
-        image_b64 = payload.get("image_base64") or ""
-        if not image_b64:
-            print("[avatar] Missing image_base64 in payload")
-            return jsonify({"error": "image_base64 is required"}), 400
-
-        # Strip data URL prefix if present
-        if "," in image_b64:
-            image_b64 = image_b64.split(",", 1)[1]
-        print(f"[avatar] Base64 payload length: {len(image_b64)}")
-
-        cloud_name, api_key, api_secret = get_cloudinary_config()
-        print(f"[avatar] Using Cloudinary cloud={cloud_name}")
-
-        timestamp = int(time.time())
-        folder = "chef-kit/avatars"
-        params_to_sign = {
-            "folder": folder,
-            "timestamp": str(timestamp),
-        }
-
-        to_sign = "&".join(f"{k}={v}" for k, v in sorted(params_to_sign.items()))
-        signature = hashlib.sha1((to_sign + api_secret).encode("utf-8")).hexdigest()
-        print(f"[avatar] Signature string: {to_sign}")
-
-        data = {
-            "file": f"data:image/jpeg;base64,{image_b64}",
-            "folder": folder,
-            "timestamp": timestamp,
-            "api_key": api_key,
-            "signature": signature,
-        }
-
-        upload_url = f"https://api.cloudinary.com/v1_1/{cloud_name}/image/upload"
-        print(f"[avatar] Uploading to Cloudinary endpoint: {upload_url}")
-        resp = requests.post(upload_url, data=data)
-        if resp.status_code != 200:
-            print(f"[avatar] Cloudinary upload failed: {resp.status_code} {resp.text}")
-            return jsonify({"error": "cloudinary_upload_failed", "details": resp.text}), 502
-
-        upload_json = resp.json()
-        secure_url = upload_json.get("secure_url")
-        if not secure_url:
-            print("[avatar] Cloudinary response missing secure_url")
-            return jsonify({"error": "cloudinary_no_url"}), 502
-
-        print(f"[avatar] Cloudinary upload succeeded. URL={secure_url}")
+        secure_url = image_upload.upload_request_image(request, "chef-kit/avatars", "[avatar]")["secure_url"]
         set_postgrest_token(token)
         updated = update_user_service(user_id, {"user_avatar": secure_url})
         print(f"[avatar] Supabase update result: {updated}")
         return jsonify({"avatar_url": secure_url, "user": updated}), 200
+    except image_upload.UploadError as e:
+        return jsonify(e.payload), e.status
     except Exception as e:
         print(f"[avatar] Unexpected error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
-# Recipes 
 @app.route("/api/recipes", methods=["GET"])
 def get_recipes():
-    """Fetch all recipes. RLS allows public read."""
-    tag = request.args.get('tag')
+    """Fetch recipes one page at a time (?cursor=&limit=). RLS allows public read."""
     try:
-        recipes = get_all_recipes(tag=tag)
-        response = jsonify(recipes)
-        response.headers["Connection"] = "close"
-        return response, 200
+        page = get_recipes_page(tag=request.args.get('tag'), **_recipe_page_args("card"))
+        return _page_response(page, cacheable=True)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _list_error(e)
 
 
 # TODO: Implement actual logic for recipe results
@@ -834,7 +1015,11 @@ def generate_recipes_route():
 def get_recipe_route(recipe_id):
     """Fetch a single recipe by ID."""
     try:
-        recipe = get_recipe(recipe_id)
+        columns = _recipe_columns("detail")
+    except InvalidQueryParam as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        recipe = get_recipe(recipe_id, columns=columns)
         return jsonify(recipe), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 404
@@ -843,14 +1028,14 @@ def get_recipe_route(recipe_id):
 @app.route("/api/user/recipes", methods=["GET"])
 @token_required
 def get_current_user_recipes(token_claims, token):
-    """Get all recipes for the authenticated user/chef. Requires valid JWT token."""
+    """Get the authenticated user's recipes, one page at a time. Requires valid JWT token."""
     try:
         user_id = token_claims["sub"]
+        args = _recipe_page_args("card", unbounded=True)
         set_postgrest_token(token)
-        recipes = get_recipes_by_chef(user_id)
-        return jsonify(recipes), 200
+        return _page_response(get_recipes_by_chef_page(user_id, **args))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _list_error(e)
 
 
 @app.route("/api/recipes/upload-image", methods=["POST"])
@@ -858,63 +1043,93 @@ def get_current_user_recipes(token_claims, token):
 def upload_recipe_image(token_claims, token):
     """Upload recipe image to Cloudinary.
 
-    Expects JSON: { "image_base64": "data:image/...;base64,XXX" or pure base64 }
+    Same body formats as the avatar upload.
     Returns: { "image_url": "https://..." }
     """
     try:
         print("[recipe-image] Upload requested")
-        print(f"[recipe-image] Token claims: {token_claims}")
-
-        payload = request.get_json() or {}
-        image_b64 = payload.get("image_base64") or ""
-        if not image_b64:
-            print("[recipe-image] Missing image_base64 in payload")
-            return jsonify({"error": "image_base64 is required"}), 400
-
-        # Strip data URL prefix if present
-        if "," in image_b64:
-            image_b64 = image_b64.split(",", 1)[1]
-        print(f"[recipe-image] Base64 payload length: {len(image_b64)}")
-
-        cloud_name, api_key, api_secret = get_cloudinary_config()
-        print(f"[recipe-image] Using Cloudinary cloud={cloud_name}")
-
-        timestamp = int(time.time())
-        folder = "chef-kit/recipes"
-        params_to_sign = {
-            "folder": folder,
-            "timestamp": str(timestamp),
-        }
+        secure_url = image_upload.upload_request_image(request, "chef-kit/recipes", "[recipe-image]")["secure_url"]
+        return jsonify({"image_url": secure_url}), 200
+    except image_upload.UploadError as e:
+        return jsonify(e.payload), e.status
+    except Exception as e:
+        print(f"[recipe-image] Unexpected error: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        to_sign = "&".join(f"{k}={v}" for k, v in sorted(params_to_sign.items()))
-        signature = hashlib.sha1((to_sign + api_secret).encode("utf-8")).hexdigest()
-        print(f"[recipe-image] Signature string: {to_sign}")
 
-        data = {
-            "file": f"data:image/jpeg;base64,{image_b64}",
-            "folder": folder,
-            "timestamp": timestamp,
-            "api_key": api_key,
-            "signature": signature,
-        }
+@app.route("/api/uploads/ticket", methods=["POST"])
+@token_required
+def upload_ticket_route(token_claims, token):
+    """Signed parameters for uploading an image straight to Cloudinary.
 
-        upload_url = f"https://api.cloudinary.com/v1_1/{cloud_name}/image/upload"
-        print(f"[recipe-image] Uploading to Cloudinary endpoint: {upload_url}")
-        resp = requests.post(upload_url, data=data)
-        if resp.status_code != 200:
-            print(f"[recipe-image] Cloudinary upload failed: {resp.status_code} {resp.text}")
-            return jsonify({"error": "cloudinary_upload_failed", "details": resp.text}), 502
+    Expects JSON: { "kind": "avatar" | "recipe" }
+    Returns: { "upload_url", "fields", "public_id", "max_bytes", "expires_at" }.
+    POST `fields` plus the image (part `file`) to upload_url, then send
+    Cloudinary's response to /api/uploads/confirm.
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        ticket = image_upload.issue_ticket(token_claims["sub"], payload.get("kind") or "")
+        print(f"[upload-ticket] Issued {ticket['public_id']}")
+        return jsonify(ticket), 200
+    except image_upload.UploadError as e:
+        return jsonify(e.payload), e.status
+    except Exception as e:
+        print(f"[upload-ticket] Unexpected error: {e}")
+        return jsonify({"error": str(e)}), 500
 
-        upload_json = resp.json()
-        secure_url = upload_json.get("secure_url")
-        if not secure_url:
-            print("[recipe-image] Cloudinary response missing secure_url")
-            return jsonify({"error": "cloudinary_no_url"}), 502
 
-        print(f"[recipe-image] Cloudinary upload succeeded. URL={secure_url}")
-        return jsonify({"image_url": secure_url}), 200
+@app.route("/api/uploads/confirm", methods=["POST"])
+@token_required
+def upload_confirm_route(token_claims, token):
+    """Record a direct Cloudinary upload after checking its signature.
+
+    Expects JSON with Cloudinary's upload response fields
+    { "public_id", "version", "signature", "format" }, plus "recipe_id" to
+    set that recipe's image. Avatars update user_avatar. 404 when there is no
+    such profile or recipe, 403 when the recipe is not the caller's. The size
+    is checked afterwards: an image over the ticket's max_bytes is deleted
+    from Cloudinary and its URL unset.
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        user_id = token_claims["sub"]
+        public_id = payload.get("public_id")
+        kind, secure_url = image_upload.confirm_upload(
+            user_id,
+            public_id,
+            payload.get("version"),
+            payload.get("signature"),
+            payload.get("format") or "jpg",
+        )
+        print(f"[upload-confirm] Verified {kind} upload for user_id={user_id}: {secure_url}")
+        set_postgrest_token(token)
+        if kind == "avatar":
+            updated = update_user_service(user_id, {"user_avatar": secure_url})
+            if not updated:
+                return jsonify({"error": "User profile not found"}), 404
+            queue_upload_size_check(public_id, secure_url, user_id, kind)
+            return jsonify({"avatar_url": secure_url, "user": updated}), 200
+        recipe_id = payload.get("recipe_id")
+        if not recipe_id:
+            queue_upload_size_check(public_id, secure_url, user_id, kind)
+            return jsonify({"image_url": secure_url}), 200
+        updated = set_recipe_image(recipe_id, secure_url)
+        if updated is None:
+            # RLS hides other users' rows from the update, not from reads
+            try:
+                exists = bool(get_recipe(recipe_id, columns="recipe_id"))
+            except Exception:
+                exists = False
+            if not exists:
+                return jsonify({"error": "Recipe not found"}), 404
+            return jsonify({"error": "Cannot change another user's recipe"}), 403
+        queue_upload_size_check(public_id, secure_url, user_id, kind, recipe_id)
+        return jsonify({"image_url": secure_url, "recipe": updated}), 200
+    except image_upload.UploadError as e:
+        return jsonify(e.payload), e.status
     except Exception as e:
-        print(f"[recipe-image] Unexpected error: {e}")
+        print(f"[upload-confirm] Unexpected error: {e}")
         return jsonify({"error": str(e)}), 500
 
 
@@ -1008,11 +1223,11 @@ def get_notifications(user_id, token_claims, token):
         # Users can only fetch their own notifications
         if token_claims["sub"] != user_id:
             return jsonify({"error": "Cannot access another user's notifications"}), 403
+        args = _notification_page_args()
         set_postgrest_token(token)
-        notifications = get_notifications_for_user(user_id)
-        return jsonify(notifications), 200
+        return _page_response(get_notifications_page(user_id, **args))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _list_error(e)
 
 
 @app.route("/api/notifications", methods=["POST"])
@@ -1039,21 +1254,10 @@ def get_chefs_on_fire_route(token_claims, token):
     try:
         chefs = get_chefs_on_fire()
         
-        # If user is authenticated, check follow status for each chef
-        if token_claims:
-            from services import check_if_following
-            current_user_id = token_claims.get("sub")
-            if current_user_id:
-                for chef in chefs:
-                    chef["is_followed"] = check_if_following(current_user_id, chef["user_id"])
-            else:
-                for chef in chefs:
-                    chef["is_followed"] = False
-        else:
-            for chef in chefs:
-                chef["is_followed"] = False
-        
-        return jsonify(chefs), 200
+        # If user is authenticated, resolve follow status for all chefs in one query
+        current_user_id = _viewer_id(token_claims)
+        following = get_following_set(current_user_id, [c.get("user_id") for c in chefs]) if current_user_id else set()
+        return jsonify(_mark_followed(chefs, following)), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1066,17 +1270,8 @@ def get_chef_route(chef_id, token_claims, token):
         chef = get_chef_by_id(chef_id)
         
         # If user is authenticated, check if they're following this chef
-        if token_claims:
-            from services import check_if_following
-            current_user_id = token_claims.get("sub")
-            if current_user_id:
-                is_following = check_if_following(current_user_id, chef_id)
-                chef["is_followed"] = is_following
-            else:
-                chef["is_followed"] = False
-        else:
-            chef["is_followed"] = False
-        
+        current_user_id = _viewer_id(token_claims)
+        chef["is_followed"] = bool(current_user_id) and check_if_following(current_user_id, chef_id)
         return jsonify(chef), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 404
@@ -1084,24 +1279,21 @@ def get_chef_route(chef_id, token_claims, token):
 
 @app.route("/api/chefs/<chef_id>/recipes", methods=["GET"])
 def get_chef_recipes_route(chef_id):
-    """Get all recipes by a specific chef. Public endpoint."""
+    """Get a chef's recipes, one page at a time. Public endpoint."""
     try:
-        recipes = get_recipes_by_chef(chef_id)
-        return jsonify(recipes), 200
+        return _page_response(get_recipes_by_chef_page(chef_id, **_recipe_page_args("card", unbounded=True)))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _list_error(e)
 
 
 @app.route("/api/recipes/trending", methods=["GET"])
 def get_trending_recipes_route():
     """Get all trending recipes. Public endpoint."""
     try:
-        recipes = get_trending_recipes()
-        response = jsonify(recipes)
-        response.headers["Connection"] = "close"
-        return response, 200
+        recipes = get_trending_recipes(columns=_recipe_columns("card"))
+        return _cacheable_json(recipes)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _list_error(e)
 
 
 @app.route("/api/recipes/seasonal", methods=["GET"])
@@ -1109,12 +1301,10 @@ def get_seasonal_recipes_route():
     """Get all seasonal recipes. Public endpoint."""
     try:
         from services import get_seasonal_recipes
-        recipes = get_seasonal_recipes()
-        response = jsonify(recipes)
-        response.headers["Connection"] = "close"
-        return response, 200
+        recipes = get_seasonal_recipes(columns=_recipe_columns("card"))
+        return _cacheable_json(recipes)
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _list_error(e)
 
 
 @app.route("/api/chefs/<chef_id>/follow", methods=["POST"])
@@ -1140,14 +1330,10 @@ def toggle_follow_route(chef_id, token_claims, token):
 def get_favorites(token_claims, token=None):
     try:
         user_id = token_claims.get("sub")
-        favorites = get_user_favorites(user_id)
+        favorites = get_user_favorites(user_id, columns=_recipe_columns("card"))
         return jsonify(favorites), 200
     except Exception as e:
-        error_str = str(e).lower()
-        # Return 401 for JWT errors so frontend can refresh token
-        if 'jwt' in error_str or 'expired' in error_str or 'pgrst303' in error_str:
-            return jsonify({"error": str(e), "code": "JWT_EXPIRED"}), 401
-        return jsonify({"error": str(e)}), 400
+        return _favorites_error(e)
 
 
 @app.route("/api/favorites/<recipe_id>/toggle", methods=["POST"])
@@ -1182,10 +1368,9 @@ def get_favorite_ids(token_claims, token=None):
 def get_notifications_route(token_claims, token=None):
     try:
         user_id = token_claims.get("sub")
-        notifications = get_notifications_for_user(user_id)
-        return jsonify(notifications), 200
+        return _page_response(get_notifications_page(user_id, **_notification_page_args()))
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return _list_error(e)
 
 
 @app.route("/api/notifications/<notification_id>/read", methods=["PUT"])
@@ -1233,8 +1418,11 @@ def cook_recipe():
         payload = request.get_json() or {}
         ingredients = payload.get("ingredients", [])
         time = payload.get("time")  # Optional time constraint in 'mm:ss' format
+        columns = _recipe_columns("detail")
         recipe_instructions = generate_cooking_instructions(ingredients, time)
-        return jsonify({"recipes": recipe_instructions}), 200
+        return jsonify({"recipes": project_recipe_rows(recipe_instructions, columns)}), 200
+    except InvalidQueryParam as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1259,25 +1447,43 @@ def get_schedule_status():
     try:
         from apscheduler.schedulers.background import BackgroundScheduler
         jobs = []
-        if 'scheduler' in globals():
+        if scheduler is not None:
             for job in scheduler.get_jobs():
                 jobs.append({
                     "id": job.id,
                     "name": job.name,
                     "next_run": str(job.next_run_time) if job.next_run_time else None
                 })
-        return jsonify({"jobs": jobs, "scheduler_running": len(jobs) > 0}), 200
+        return jsonify({
+            "jobs": jobs,
+            "scheduler_running": len(jobs) > 0,
+            "broadcast": get_broadcast_stats(),
+        }), 200
     except ImportError:
         return jsonify({"error": "APScheduler not installed", "scheduler_running": False}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/notifications/outbox-status", methods=["GET"])
+def get_outbox_status():
+    """Queue depth and worker counters for the notification outbox."""
+    try:
+        return jsonify(notification_outbox.stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
 
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({"error": "request_too_large", "details": f"limit is {image_upload.MAX_REQUEST_BYTES} bytes"}), 413
+
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
@@ -0,0 +1,357 @@
+"""ASGI entry point for the async serving mode.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+
+Every request is routed by the Flask app's own url_map and runs inside a
+Flask request context, so before/after-request hooks, CORS and error
+handling behave exactly as under WSGI. The read endpoints listed in
+`_ASYNC_VIEWS` are served on the event loop with `async_services`, and their
+upstream I/O is awaited on one shared httpx connection pool; their Flask
+hooks, which may block (SQLite, token checks), still run on a thread pool.
+All other routes are handed to the regular Flask view through a WSGI
+adapter on the same pool. Routes and JSON shapes are the same in both
+modes, and both build them with the helpers in app.py.
+"""
+import asyncio
+import contextvars
+import functools
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from asgiref.sync import AsyncToSync, sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+from flask import request, jsonify
+from werkzeug.exceptions import HTTPException
+
+import async_http_client
+import async_services
+from app import (
+    app as flask_app,
+    _cacheable_json,
+    _favorites_error,
+    _list_error,
+    _mark_followed,
+    _notification_page_args,
+    _page_response,
+    _recipe_columns,
+    _recipe_page_args,
+    _viewer_id,
+)
+from auth import async_token_required, async_optional_token
+from services import InvalidQueryParam
+
+# Threads for the routes that still run as WSGI views
+_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+
+# -----------------------------
+# Async views (same endpoint names as app.py; response shaping is shared
+# through app.py's helpers, only the service calls are awaited)
+# -----------------------------
+async def get_recipes():
+    try:
+        page = await async_services.get_recipes_page(tag=request.args.get('tag'), **_recipe_page_args("card"))
+        return _page_response(page, cacheable=True)
+    except Exception as e:
+        return _list_error(e)
+
+
+async def get_recipe_route(recipe_id):
+    try:
+        columns = _recipe_columns("detail")
+    except InvalidQueryParam as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        recipe = await async_services.get_recipe(recipe_id, columns=columns)
+        return jsonify(recipe), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 404
+
+
+@async_token_required
+async def get_current_user_recipes(token_claims, token):
+    try:
+        args = _recipe_page_args("card", unbounded=True)
+        return _page_response(await async_services.get_recipes_by_chef_page(token_claims["sub"], token=token, **args))
+    except Exception as e:
+        return _list_error(e)
+
+
+@async_token_required
+async def get_notifications(user_id, token_claims, token):
+    try:
+        if token_claims["sub"] != user_id:
+            return jsonify({"error": "Cannot access another user's notifications"}), 403
+        return _page_response(await async_services.get_notifications_page(user_id, **_notification_page_args()))
+    except Exception as e:
+        return _list_error(e)
+
+
+@async_optional_token
+async def get_chefs_on_fire_route(token_claims, token):
+    try:
+        chefs = await async_services.get_chefs_on_fire()
+        current_user_id = _viewer_id(token_claims)
+        following = (
+            await async_services.get_following_set(current_user_id, [c.get("user_id") for c in chefs])
+            if current_user_id else set()
+        )
+        return jsonify(_mark_followed(chefs, following)), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@async_optional_token
+async def get_chef_route(chef_id, token_claims, token):
+    try:
+        chef = await async_services.get_chef_by_id(chef_id)
+        current_user_id = _viewer_id(token_claims)
+        chef["is_followed"] = bool(current_user_id) and await async_services.check_if_following(current_user_id, chef_id)
+        return jsonify(chef), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 404
+
+
+async def get_chef_recipes_route(chef_id):
+    try:
+        args = _recipe_page_args("card", unbounded=True)
+        return _page_response(await async_services.get_recipes_by_chef_page(chef_id, **args))
+    except Exception as e:
+        return _list_error(e)
+
+
+async def get_trending_recipes_route():
+    try:
+        return _cacheable_json(await async_services.get_trending_recipes(columns=_recipe_columns("card")))
+    except Exception as e:
+        return _list_error(e)
+
+
+async def get_seasonal_recipes_route():
+    try:
+        return _cacheable_json(await async_services.get_seasonal_recipes(columns=_recipe_columns("card")))
+    except Exception as e:
+        return _list_error(e)
+
+
+@async_token_required
+async def get_favorites(token_claims, token=None):
+    try:
+        favorites = await async_services.get_user_favorites(token_claims.get("sub"), columns=_recipe_columns("card"))
+        return jsonify(favorites), 200
+    except Exception as e:
+        return _favorites_error(e)
+
+
+@async_token_required
+async def get_favorite_ids(token_claims, token=None):
+    try:
+        ids = await async_services.get_user_favorite_ids(token_claims.get("sub"))
+        return jsonify(ids), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@async_token_required
+async def get_notifications_route(token_claims, token=None):
+    try:
+        page = await async_services.get_notifications_page(token_claims.get("sub"), **_notification_page_args())
+        return _page_response(page)
+    except Exception as e:
+        return _list_error(e)
+
+
+# Flask endpoint name -> async view. GET only; other methods go to Flask.
+_ASYNC_VIEWS = {
+    view.__name__: view
+    for view in (
+        get_recipes,
+        get_recipe_route,
+        get_current_user_recipes,
+        get_notifications,
+        get_chefs_on_fire_route,
+        get_chef_route,
+        get_chef_recipes_route,
+        get_trending_recipes_route,
+        get_seasonal_recipes_route,
+        get_favorites,
+        get_favorite_ids,
+        get_notifications_route,
+    )
+}
+
+
+# -----------------------------
+# ASGI application
+# -----------------------------
+class _WsgiInstance(WsgiToAsgiInstance):
+    """Runs one WSGI request on the loop's thread pool.
+
+    asgiref's own run_wsgi_app is thread-sensitive: every WSGI request would
+    run on one shared thread, serializing all the routes that stay sync.
+    Only build_environ() is taken from asgiref (public since 3.x; see
+    requirements.txt for the pinned range); reading the body, start_response
+    and sending the response are done here.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            raise ValueError("WSGI adapter received a non-HTTP scope")
+        self.scope = scope
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return  # client went away before sending the whole body
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+            await sync_to_async(self._run, thread_sensitive=False)(body, AsyncToSync(send))
+
+    def _run(self, body, send) -> None:
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            # build_environ's duplicate header limit
+            send({"type": "http.response.start", "status": 400, "headers": [(b"content-type", b"text/plain")]})
+            send({"type": "http.response.body", "body": b"Bad Request: Too many duplicate headers"})
+            return
+        started = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            if exc_info and started.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            started["message"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                            for name, value in response_headers],
+            }
+
+        def send_start():
+            if not started.get("sent"):
+                started["sent"] = True
+                send(started["message"])
+
+        chunks = self.wsgi_application(environ, start_response)
+        try:
+            for chunk in chunks:
+                if chunk:
+                    send_start()
+                    send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+        send_start()
+        send({"type": "http.response.body"})
+
+
+def _reraised(handler):
+    """Call a Flask exception handler with `e` as the exception being handled.
+
+    handle_user_exception re-raises with a bare `raise` and handle_exception
+    logs sys.exc_info(), so in a pool thread the exception has to be live.
+    """
+    def call(e):
+        try:
+            raise e
+        except Exception as live:
+            return handler(live)
+    return call
+
+
+class AsyncApp:
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and scope["method"] == "GET":
+            if await self._serve_async(scope, send):
+                return
+        await _WsgiInstance(self.wsgi_app)(scope, receive, send)
+
+    async def _serve_async(self, scope, send) -> bool:
+        """Serve the request natively if its endpoint has an async view.
+
+        Only the view runs on the event loop. Flask's request context is
+        pushed and popped, and the before/after/teardown hooks (rate limits,
+        request accounting, metrics) run, on the thread pool, all inside one
+        contextvars.Context that the view's task also starts from.
+        """
+        adapter = _WsgiInstance(self.wsgi_app)
+        adapter.scope = scope
+        environ = adapter.build_environ(scope, io.BytesIO(b""))
+        ctx = flask_app.request_context(environ)
+        if ctx.url_adapter is None:
+            return False
+        try:
+            rule, view_args = ctx.url_adapter.match(return_rule=True)
+        except HTTPException:
+            return False
+        view = _ASYNC_VIEWS.get(rule.endpoint)
+        if view is None:
+            return False
+
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+
+        def off_loop(fn, *args):
+            return loop.run_in_executor(None, functools.partial(context.run, fn, *args))
+
+        await off_loop(ctx.push)
+        try:
+            response = await self._dispatch(view, view_args, context, off_loop)
+            # Same header/body finalisation as a WSGI response (e.g. no body on 304)
+            headers = response.get_wsgi_headers(environ)
+            body = b"".join(response.get_app_iter(environ))
+            response.close()
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers.items()
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return True
+        finally:
+            await off_loop(ctx.pop)
+
+    async def _dispatch(self, view, view_args, context, off_loop):
+        """Flask's full_dispatch_request with an awaited view."""
+        try:
+            try:
+                rv = await off_loop(flask_app.preprocess_request)
+                if rv is None:
+                    # The task copies `context`, so the view sees the pushed request
+                    rv = await context.run(asyncio.ensure_future, view(**view_args))
+            except Exception as e:
+                rv = await off_loop(_reraised(flask_app.handle_user_exception), e)
+            return await off_loop(flask_app.finalize_request, rv)
+        except Exception as e:
+            return await off_loop(_reraised(flask_app.handle_exception), e)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                asyncio.get_running_loop().set_default_executor(
+                    ThreadPoolExecutor(max_workers=_WSGI_THREADS, thread_name_prefix="wsgi")
+                )
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_http_client.aclose()
+                async_services.reset_clients()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = AsyncApp(flask_app.wsgi_app)
@@ -0,0 +1,98 @@
+"""Shared asynchronous HTTP client for the ASGI serving mode.
+
+The async counterpart of `http_client`: one `httpx.AsyncClient` per process
+whose connection pool is also used by the async PostgREST clients, so a
+single event loop can keep thousands of upstream calls in flight over a
+bounded set of keep-alive connections.
+
+Must be used from the event loop that serves requests; `aclose()` is called
+on ASGI lifespan shutdown.
+"""
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+import metrics
+from http_client import DEFAULT_TIMEOUT
+
+_MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", "1000"))
+_MAX_KEEPALIVE = int(os.getenv("ASYNC_HTTP_MAX_KEEPALIVE", "100"))
+_KEEPALIVE_EXPIRY = float(os.getenv("ASYNC_HTTP_KEEPALIVE_EXPIRY", "30"))
+# Connection failures are retried; the request was never sent.
+_CONNECT_RETRIES = int(os.getenv("HTTP_RETRY_TOTAL", "3"))
+
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+TIMEOUT = httpx.Timeout(DEFAULT_TIMEOUT[1], connect=DEFAULT_TIMEOUT[0])
+
+_transport: Optional[httpx.AsyncHTTPTransport] = None
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_transport() -> httpx.AsyncHTTPTransport:
+    global _transport
+    if _transport is None:
+        _transport = httpx.AsyncHTTPTransport(
+            http2=_HTTP2,
+            retries=_CONNECT_RETRIES,
+            limits=httpx.Limits(
+                max_connections=_MAX_CONNECTIONS,
+                max_keepalive_connections=_MAX_KEEPALIVE,
+                keepalive_expiry=_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _transport
+
+
+def get_client() -> httpx.AsyncClient:
+    """The process-wide AsyncClient."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            transport=_get_transport(),
+            timeout=TIMEOUT,
+            follow_redirects=True,
+            event_hooks=metrics.httpx_event_hooks(is_async=True),
+        )
+    return _client
+
+
+def scoped_client(base_url: str, headers: Dict[str, str], timeout: Any = None) -> httpx.AsyncClient:
+    """An AsyncClient with its own base URL and default headers on the shared pool."""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=timeout or TIMEOUT,
+        transport=_get_transport(),
+        follow_redirects=True,
+        event_hooks=metrics.httpx_event_hooks(is_async=True),
+    )
+
+
+async def request(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    return await get_client().request(method, url, **kwargs)
+
+
+async def get(url: str, **kwargs: Any) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs: Any) -> httpx.Response:
+    return await request("POST", url, **kwargs)
+
+
+async def aclose() -> None:
+    """Close the shared pool (every client built on it stops working)."""
+    global _client, _transport
+    client, transport = _client, _transport
+    _client = None
+    _transport = None
+    if client is not None:
+        await client.aclose()
+    elif transport is not None:
+        await transport.aclose()
@@ -0,0 +1,237 @@
+"""Async versions of the read-path service functions.
+
+Used by the ASGI entry point (`asgi.py`). Each function mirrors the
+synchronous one in `services.py` query for query and shares its caches,
+projections and cursor helpers, but awaits PostgREST through
+`AsyncPostgrestClient` on the shared `async_http_client` pool instead of
+blocking a worker thread.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+
+from postgrest import AsyncPostgrestClient
+
+import async_http_client
+import services
+from services import (
+    _extract_response_data,
+    _keyset_query,
+    _keyset_result,
+    _page_limit,
+    _NOTIFICATION_PAGE_ORDER,
+    _RECIPE_COLUMNS,
+    _RECIPE_PAGE_ORDER,
+    _IN_FILTER_CHUNK,
+    DEFAULT_PAGE_SIZE,
+    RECIPE_PAGE_SIZE,
+)
+from supabase_client import SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY
+
+_MISSING = object()
+
+
+class _SharedPoolPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient whose session runs on the shared connection pool."""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return async_http_client.scoped_client(base_url, headers)
+
+
+_clients: Dict[str, AsyncPostgrestClient] = {}
+
+
+def _rest_client(key: str) -> AsyncPostgrestClient:
+    client = _clients.get(key)
+    if client is None:
+        client = _SharedPoolPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers={
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "apikey": key,
+                "Authorization": f"Bearer {key}",
+            },
+        )
+        _clients[key] = client
+    return client
+
+
+def _anon() -> AsyncPostgrestClient:
+    """Counterpart of `supabase` (anon key)."""
+    return _rest_client(SUPABASE_ANON_KEY or SUPABASE_SERVICE_ROLE_KEY)
+
+
+def _admin() -> AsyncPostgrestClient:
+    """Counterpart of `supabase_admin if supabase_admin else supabase`."""
+    return _rest_client(SUPABASE_SERVICE_ROLE_KEY or SUPABASE_ANON_KEY)
+
+
+def _as_user(query, token: Optional[str]):
+    """Run an anon-key query with the caller's JWT (per request, not shared)."""
+    if token:
+        query.headers["Authorization"] = f"Bearer {token}"
+    return query
+
+
+def reset_clients() -> None:
+    """Forget the PostgREST clients (their pool is closed on shutdown)."""
+    _clients.clear()
+
+
+async def _cached(key, loader):
+    """Async read-through on services._recipe_list_cache."""
+    value = services._recipe_list_cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = await loader()
+        services._recipe_list_cache.set(key, value)
+    return value
+
+
+async def _keyset_page(query, order: List[tuple], cursor: Optional[str], limit: Optional[int]) -> Dict[str, Any]:
+    limit = _page_limit(limit)
+    resp = await _keyset_query(query, order, cursor, limit).execute()
+    rows = _extract_response_data(resp) or []
+    return _keyset_result(rows, order, limit)
+
+
+# -----------------------------
+# Recipes
+# -----------------------------
+async def get_recipes_page(tag: Optional[str] = None, cursor: Optional[str] = None, limit: int = RECIPE_PAGE_SIZE,
+                           columns: str = _RECIPE_COLUMNS) -> Dict[str, Any]:
+    async def load():
+        query = _anon().table("recipe").select(columns)
+        if tag:
+            query = query.contains("recipe_tags", [tag])
+        return await _keyset_page(query, _RECIPE_PAGE_ORDER, cursor, limit)
+
+    return await _cached(("all", tag, cursor, limit, columns), load)
+
+
+async def get_seasonal_recipes(columns: str = _RECIPE_COLUMNS) -> List[Dict[str, Any]]:
+    async def load():
+        resp = await _anon().table("recipe").select(columns).eq("recipe_is_seasonal", True).limit(20).execute()
+        return _extract_response_data(resp) or []
+
+    return await _cached(("seasonal", columns), load)
+
+
+async def get_trending_recipes(columns: str = _RECIPE_COLUMNS) -> List[Dict[str, Any]]:
+    async def load():
+        resp = await _anon().table("recipe").select(columns).eq("recipe_is_trending", True).limit(10).execute()
+        return _extract_response_data(resp) or []
+
+    return await _cached(("trending", columns), load)
+
+
+async def get_recipe(recipe_id: str, columns: str = "*") -> Dict[str, Any]:
+    resp = await _anon().table("recipe").select(columns).eq("recipe_id", recipe_id).single().execute()
+    return _extract_response_data(resp) or {}
+
+
+async def get_recipes_by_chef_page(chef_id: str, cursor: Optional[str] = None, limit: Optional[int] = RECIPE_PAGE_SIZE,
+                                   columns: str = "*", token: Optional[str] = None) -> Dict[str, Any]:
+    query = _as_user(_anon().table("recipe").select(columns), token).eq("recipe_owner", chef_id)
+    return await _keyset_page(query, _RECIPE_PAGE_ORDER, cursor, limit)
+
+
+# -----------------------------
+# Notifications
+# -----------------------------
+async def get_notifications_page(user_id: str, cursor: Optional[str] = None,
+                                 limit: Optional[int] = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    query = _admin().table("notifications").select("*").eq("user_id", user_id)
+    return await _keyset_page(query, _NOTIFICATION_PAGE_ORDER, cursor, limit)
+
+
+# -----------------------------
+# Chefs & follows
+# -----------------------------
+async def get_chefs_on_fire() -> List[Dict[str, Any]]:
+    resp = await _anon().table("users").select("*").eq("user_is_on_fire", True).eq("user_is_chef", True).execute()
+    return _extract_response_data(resp) or []
+
+
+async def get_chef_by_id(chef_id: str) -> Dict[str, Any]:
+    resp = await _anon().table("users").select("*").eq("user_id", chef_id).single().execute()
+    return _extract_response_data(resp) or {}
+
+
+async def _following_among(follower_id: str, candidate_ids: List[str]) -> frozenset:
+    key = services._following_cache_key(follower_id, candidate_ids)
+    cached = services._following_cache.get(key)
+    if cached is not None:
+        return cached
+    following: Set[str] = set()
+    for start in range(0, len(candidate_ids), _IN_FILTER_CHUNK):
+        chunk = candidate_ids[start:start + _IN_FILTER_CHUNK]
+        resp = await (
+            _admin().table("follows")
+            .select("following_id")
+            .eq("follower_id", follower_id)
+            .in_("following_id", chunk)
+            .execute()
+        )
+        following.update(row["following_id"] for row in _extract_response_data(resp) or [])
+    result = frozenset(following)
+    # The shared copy is a kv_store write, which may wait on another worker
+    await asyncio.to_thread(services._following_cache.fill, key, result)
+    return result
+
+
+async def check_if_following(follower_id: str, following_id: str) -> bool:
+    try:
+        return following_id in await _following_among(follower_id, [following_id])
+    except Exception as e:
+        print(f"Error checking follow status: {e}")
+        return False
+
+
+async def get_following_set(follower_id: str, candidate_ids: List[str]) -> Set[str]:
+    candidate_ids = list(dict.fromkeys(cid for cid in candidate_ids if cid))
+    if not follower_id or not candidate_ids:
+        return set()
+    try:
+        return set(await _following_among(follower_id, candidate_ids))
+    except Exception as e:
+        print(f"Error resolving follow status: {e}")
+        return set()
+
+
+# -----------------------------
+# Favorites
+# -----------------------------
+async def _load_favorite_ids(user_id: str) -> List[str]:
+    resp = await _admin().table("users").select("user_favourite_recipees").eq("user_id", user_id).single().execute()
+    user_data = _extract_response_data(resp)
+    return user_data.get("user_favourite_recipees") or []
+
+
+async def get_user_favorite_ids(user_id: str) -> List[str]:
+    try:
+        cached = services._favorite_ids_cache.get(user_id, _MISSING)
+        if cached is _MISSING:
+            cached = await _load_favorite_ids(user_id)
+            await asyncio.to_thread(services._favorite_ids_cache.fill, user_id, cached)
+        return list(cached)
+    except Exception:
+        return []
+
+
+async def get_user_favorites(user_id: str, columns: str = "*") -> List[Dict[str, Any]]:
+    try:
+        fav_ids = await _load_favorite_ids(user_id)
+        if not fav_ids:
+            return []
+
+        resp = await _admin().table("recipe").select(columns).in_("recipe_id", fav_ids).execute()
+        recipes = _extract_response_data(resp) or []
+        for r in recipes:
+            r["isFavorite"] = True
+        return recipes
+    except Exception as e:
+        # Re-raise JWT errors so frontend can handle token refresh
+        error_str = str(e).lower()
+        if 'jwt' in error_str or 'pgrst303' in error_str or 'expired' in error_str:
+            raise RuntimeError(f"JWT expired: {e}")
+        raise
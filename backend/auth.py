@@ -1,20 +1,157 @@
 """JWT middleware for Supabase Auth token verification.
 
-Verifies Supabase access tokens by calling the Supabase Auth REST API.
+Verifies Supabase access tokens locally with PyJWT, using the project's JWT
+secret (HS256) or the signing keys published at the Auth JWKS endpoint.
+The Supabase Auth REST API is only called when local verification is not
+possible and the remote fallback is enabled.
 Protects endpoints by checking for valid, non-expired tokens.
 """
 
+import asyncio
+import copy
 import os
+import threading
+import time
+from collections import OrderedDict
+import jwt
 import requests
+import http_client
 from functools import wraps
 from flask import request, jsonify
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY", "")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL") or (
+    f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else None
+)
 
+# Remote verification (GET /auth/v1/user) is opt-in once a JWT secret is configured.
+# Without a secret it stays on by default so existing deployments keep working.
+_REMOTE_FALLBACK = os.getenv(
+    "SUPABASE_AUTH_REMOTE_FALLBACK", "false" if SUPABASE_JWT_SECRET else "true"
+).lower() in ("1", "true", "yes")
+_JWKS_CACHE_SECONDS = int(os.getenv("SUPABASE_JWKS_CACHE_SECONDS", "600"))
+_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+_LEEWAY_SECONDS = 10
 
-def verify_token(token: str) -> Dict[str, Any]:
+
+class _LocalVerificationUnavailable(Exception):
+    """Raised when a token cannot be checked locally (no secret, JWKS unreachable)."""
+
+
+class _TokenCache:
+    """Bounded LRU of verified tokens; entries expire with the token itself.
+
+    Claims are copied in and out, so a route that changes the dict it was
+    given does not change what later requests with the same token see.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, claims = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+        return copy.deepcopy(claims)
+
+    def put(self, token: str, claims: Dict[str, Any], expires_at: float) -> None:
+        if self._max_size <= 0 or expires_at <= time.time():
+            return
+        claims = copy.deepcopy(claims)
+        with self._lock:
+            self._entries[token] = (expires_at, claims)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+
+_token_cache = _TokenCache(_TOKEN_CACHE_SIZE)
+_jwks_client: Optional[jwt.PyJWKClient] = None
+_jwks_lock = threading.Lock()
+
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    global _jwks_client
+    if not SUPABASE_JWKS_URL:
+        raise _LocalVerificationUnavailable("SUPABASE_URL not set")
+    with _jwks_lock:
+        if _jwks_client is None:
+            _jwks_client = jwt.PyJWKClient(
+                SUPABASE_JWKS_URL,
+                cache_keys=True,
+                lifespan=_JWKS_CACHE_SECONDS,
+                timeout=5,
+                headers={"apikey": SUPABASE_KEY} if SUPABASE_KEY else None,
+            )
+        return _jwks_client
+
+
+def _claims_to_user(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape JWT claims like the /auth/v1/user payload the routes read."""
+    return {
+        "id": claims.get("sub"),
+        "aud": claims.get("aud"),
+        "role": claims.get("role"),
+        "email": claims.get("email"),
+        "phone": claims.get("phone"),
+        "app_metadata": claims.get("app_metadata") or {},
+        "user_metadata": claims.get("user_metadata") or {},
+        "is_anonymous": claims.get("is_anonymous", False),
+    }
+
+
+def _verify_local(token: str) -> Dict[str, Any]:
+    """Verify signature, `exp` and `aud` without leaving the process."""
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError:
+        raise ValueError("Invalid or expired token")
+
+    alg = header.get("alg")
+    if alg == "HS256":
+        if not SUPABASE_JWT_SECRET:
+            raise _LocalVerificationUnavailable("SUPABASE_JWT_SECRET not set")
+        key = SUPABASE_JWT_SECRET
+    elif alg in ("RS256", "ES256", "EdDSA"):
+        try:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientError as exc:
+            raise _LocalVerificationUnavailable(f"JWKS lookup failed: {exc}")
+    else:
+        raise ValueError(f"Unsupported token algorithm: {alg}")
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[alg],
+            audience=SUPABASE_JWT_AUDIENCE,
+            leeway=_LEEWAY_SECONDS,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise ValueError("Invalid or expired token")
+    except jwt.InvalidAudienceError:
+        raise ValueError("Invalid token audience")
+    except jwt.InvalidTokenError:
+        raise ValueError("Invalid or expired token")
+
+    return {"sub": claims["sub"], "user": _claims_to_user(claims), "exp": claims["exp"]}
+
+
+def _verify_remote(token: str) -> Dict[str, Any]:
     """Validate the access token via Supabase Auth REST API."""
     if not SUPABASE_URL:
         raise ValueError("SUPABASE_URL not set")
@@ -26,21 +163,108 @@ def verify_token(token: str) -> Dict[str, Any]:
 
     url = f"{SUPABASE_URL}/auth/v1/user"
     try:
-        response = requests.get(url, headers=headers, timeout=5)
-        print(f"[auth] GET {url} -> {response.status_code}")
-        if response.status_code == 200:
-            data = response.json()
-            sub = data.get("id")
-            if not sub:
-                raise ValueError("Supabase response missing user id")
-            print(f"[auth] Supabase user verified: id={sub}")
-            return {"sub": sub, "user": data}
-        elif response.status_code == 401:
-            raise ValueError("Invalid or expired token")
-        else:
-            raise ValueError(f"Supabase auth error ({response.status_code}): {response.text}")
+        response = http_client.get(url, headers=headers, timeout=5)
     except requests.RequestException as exc:
         raise ValueError(f"Supabase auth request failed: {exc}")
+    print(f"[auth] GET {url} -> {response.status_code}")
+    return _remote_claims(response)
+
+
+def _remote_claims(response) -> Dict[str, Any]:
+    """Turn a /auth/v1/user response (requests or httpx) into claims."""
+    if response.status_code == 200:
+        data = response.json()
+        sub = data.get("id")
+        if not sub:
+            raise ValueError("Supabase response missing user id")
+        print(f"[auth] Supabase user verified: id={sub}")
+        return {"sub": sub, "user": data}
+    elif response.status_code == 401:
+        raise ValueError("Invalid or expired token")
+    else:
+        raise ValueError(f"Supabase auth error ({response.status_code}): {response.text}")
+
+
+async def _verify_remote_async(token: str) -> Dict[str, Any]:
+    """Async `_verify_remote` over the shared httpx.AsyncClient."""
+    # Imported here so the WSGI app does not pay for httpx at cold start
+    import httpx
+    import async_http_client
+
+    if not SUPABASE_URL:
+        raise ValueError("SUPABASE_URL not set")
+
+    url = f"{SUPABASE_URL}/auth/v1/user"
+    try:
+        response = await async_http_client.get(
+            url, headers={"Authorization": f"Bearer {token}", "apikey": SUPABASE_KEY}, timeout=5
+        )
+    except httpx.HTTPError as exc:
+        raise ValueError(f"Supabase auth request failed: {exc}")
+    print(f"[auth] GET {url} -> {response.status_code}")
+    return _remote_claims(response)
+
+
+def _token_expiry(token: str) -> float:
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        return float(exp) if exp else 0.0
+    except (jwt.InvalidTokenError, TypeError, ValueError):
+        return 0.0
+
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Verify a Supabase access token and return `{"sub", "user"}` claims.
+
+    Tokens are checked locally; the remote Auth API is used only when local
+    verification is unavailable and SUPABASE_AUTH_REMOTE_FALLBACK is enabled.
+    Verified tokens are cached until they expire.
+    """
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached
+
+    try:
+        verified = _verify_local(token)
+        expires_at = float(verified.pop("exp"))
+    except _LocalVerificationUnavailable as exc:
+        if not _REMOTE_FALLBACK:
+            raise ValueError(f"Token verification unavailable: {exc}")
+        verified = _verify_remote(token)
+        expires_at = _token_expiry(token)
+
+    _token_cache.put(token, verified, expires_at)
+    return verified
+
+
+async def verify_token_async(token: str) -> Dict[str, Any]:
+    """`verify_token` for the ASGI serving mode; never blocks the event loop.
+
+    HS256 tokens are checked inline (pure CPU). Asymmetric tokens may need a
+    JWKS fetch, so they are verified in a worker thread.
+    """
+    cached = _token_cache.get(token)
+    if cached is not None:
+        return cached
+
+    try:
+        try:
+            alg = jwt.get_unverified_header(token).get("alg")
+        except jwt.InvalidTokenError:
+            raise ValueError("Invalid or expired token")
+        if alg == "HS256":
+            verified = _verify_local(token)
+        else:
+            verified = await asyncio.to_thread(_verify_local, token)
+        expires_at = float(verified.pop("exp"))
+    except _LocalVerificationUnavailable as exc:
+        if not _REMOTE_FALLBACK:
+            raise ValueError(f"Token verification unavailable: {exc}")
+        verified = await _verify_remote_async(token)
+        expires_at = _token_expiry(token)
+
+    _token_cache.put(token, verified, expires_at)
+    return verified
 
 
 def token_required(f):
@@ -126,3 +350,55 @@ def optional_token(f):
         return f(token_claims=token_claims, token=token, *args, **kwargs)
     
     return decorated_function
+
+
+def async_token_required(f):
+    """`token_required` for async handlers served by the ASGI entry point."""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        auth_header = request.headers.get("Authorization")
+        if not auth_header:
+            return jsonify({"error": "Missing Authorization header"}), 401
+
+        parts = auth_header.split()
+        if len(parts) != 2 or parts[0].lower() != "bearer":
+            return jsonify({"error": "Invalid Authorization header format. Use 'Bearer <token>'"}), 401
+
+        token = parts[1]
+        try:
+            token_claims = await verify_token_async(token)
+        except ValueError as e:
+            print(f"[token_required] Verification error: {e}")
+            return jsonify({"error": str(e)}), 401
+        except Exception as e:
+            print(f"[token_required] Unexpected auth failure: {e}")
+            return jsonify({"error": f"Authentication failed: {str(e)}"}), 500
+        return await f(token_claims=token_claims, token=token, *args, **kwargs)
+
+    return decorated_function
+
+
+def async_optional_token(f):
+    """`optional_token` for async handlers served by the ASGI entry point."""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        auth_header = request.headers.get("Authorization")
+        token_claims = None
+        token = None
+
+        if auth_header:
+            parts = auth_header.split()
+            if len(parts) != 2 or parts[0].lower() != "bearer":
+                return jsonify({"error": "Invalid Authorization header format. Use 'Bearer <token>'"}), 401
+
+            token = parts[1]
+            try:
+                token_claims = await verify_token_async(token)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 401
+            except Exception as e:
+                return jsonify({"error": f"Authentication failed: {str(e)}"}), 500
+
+        return await f(token_claims=token_claims, token=token, *args, **kwargs)
+
+    return decorated_function
@@ -0,0 +1,268 @@
+"""Offline API benchmark against a local Supabase/Cloudinary stand-in.
+
+Starts benchmarks/fake_supabase.py (seeded from seed_database's sample data,
+scaled by --scale), boots the real app under gunicorn pointed at it, and
+drives each scenario from concurrent keep-alive clients signed in as
+different users. Nothing leaves the machine.
+
+    cd backend && python benchmarks/bench_api.py                  # compare with baselines.json
+    cd backend && python benchmarks/bench_api.py --save-baseline  # record new baselines
+    cd backend && python benchmarks/bench_api.py --scenario recipes --scenario cook
+
+For each scenario prints requests/second, p50/p95/p99 latency and upstream
+calls per request (from the Server-Timing header), as the median of
+--repeat runs. With a stored baseline for the same settings, a scenario
+whose p95 or throughput is worse by more than --tolerance, or that makes
+more upstream calls, is reported as a regression and the script exits with
+status 1. Baselines are only comparable on the machine that recorded them.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import jwt
+import requests
+
+from harness import BACKEND_DIR, drive, free_port, start_gunicorn, stop, wait_for
+
+import fake_supabase
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+_JWT_SECRET = "bench-jwt-secret"
+_SERVER_TIMING_TOTAL = re.compile(r'(?:^|,)\s*upstream;desc="(\d+) calls"')
+
+_INGREDIENTS = sorted({
+    item.strip()
+    for recipe in fake_supabase.SAMPLE_RECIPES
+    for item in (recipe.get("basic_ingredients") or "").split(",")
+    if item.strip()
+})
+
+
+class Scenario:
+    def __init__(self, method: str, path: Callable[[int, int], str], auth: bool = True,
+                 body: Optional[Callable[[random.Random], Dict[str, Any]]] = None):
+        self.method = method
+        self.path = path
+        self.auth = auth
+        self.body = body
+
+
+def _cook_body(rng: random.Random) -> Dict[str, Any]:
+    return {"ingredients": rng.sample(_INGREDIENTS, 4), "time": "45:00"}
+
+
+def _avatar_body(rng: random.Random) -> Dict[str, Any]:
+    return {"image_base64": "data:image/jpeg;base64," + base64.b64encode(os.urandom(200 * 1024)).decode()}
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "cook": Scenario("POST", lambda user, n: "/api/cook", auth=False, body=_cook_body),
+    "recipes": Scenario("GET", lambda user, n: "/api/recipes", auth=False),
+    "chefs_on_fire": Scenario("GET", lambda user, n: "/api/chefs/on-fire"),
+    "favorites": Scenario("GET", lambda user, n: "/api/favorites"),
+    "favorite_ids": Scenario("GET", lambda user, n: "/api/favorites/ids"),
+    "favorite_toggle": Scenario("POST", lambda user, n: f"/api/favorites/{fake_supabase.recipe_id(n % 50)}/toggle"),
+    "notifications": Scenario("GET", lambda user, n: "/api/notifications"),
+    # Opt-in: 200 KB avatar through the JSON/base64 route to the Cloudinary stand-in
+    "avatar_upload": Scenario(
+        "POST", lambda user, n: f"/api/users/{fake_supabase.user_id(user)}/avatar", body=_avatar_body
+    ),
+}
+DEFAULT_SCENARIOS = [name for name in SCENARIOS if name != "avatar_upload"]
+
+
+def _token(index: int) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": fake_supabase.user_id(index),
+        "email": f"user{index}@bench.local",
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + 6 * 3600,
+    }
+    return jwt.encode(claims, _JWT_SECRET, algorithm="HS256")
+
+
+def _start_fake(scale: int, delay: float) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_supabase.py"),
+         "--port", str(port), "--scale", str(scale), "--delay", str(delay)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    if not wait_for(f"{url}/rest/v1/recipe?limit=1"):
+        proc.terminate()
+        raise RuntimeError("fake_supabase did not start")
+    return proc, url
+
+
+def _run_scenario(base_url: str, scenario: Scenario, tokens: List[str], concurrency: int,
+                  duration: float) -> Dict[str, float]:
+    upstream_calls: List[int] = []
+
+    def send(session: requests.Session, index: int, n: int) -> requests.Response:
+        user = index % len(tokens)
+        rng = random.Random(index * 100003 + n)
+        headers = {"Authorization": f"Bearer {tokens[user]}"} if scenario.auth else {}
+        body = scenario.body(rng) if scenario.body else None
+        return session.request(scenario.method, base_url + scenario.path(user, n),
+                               json=body, headers=headers, timeout=30)
+
+    def on_response(resp: requests.Response) -> None:
+        match = _SERVER_TIMING_TOTAL.search(resp.headers.get("Server-Timing") or "")
+        if match:
+            upstream_calls.append(int(match.group(1)))
+
+    # Warm caches, the recipe index and keep-alive connections first
+    drive(send, concurrency, min(1.0, duration))
+    result = drive(send, concurrency, duration, on_response)
+    result["upstream_calls"] = sum(upstream_calls) / len(upstream_calls) if upstream_calls else 0.0
+    return result
+
+
+def _compare(result: Dict[str, float], baseline: Optional[Dict[str, float]],
+             tolerance: float) -> List[str]:
+    if not baseline:
+        return []
+    problems = []
+    if result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance):
+        problems.append(f"p95 {result['p95_ms']:.1f}ms vs {baseline['p95_ms']:.1f}ms")
+    if result["rps"] < baseline["rps"] * (1 - tolerance):
+        problems.append(f"{result['rps']:.1f} req/s vs {baseline['rps']:.1f}")
+    if result["upstream_calls"] > baseline.get("upstream_calls", 0) + 0.01:
+        problems.append(f"{result['upstream_calls']:.2f} upstream calls/request vs {baseline['upstream_calls']:.2f}")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", action="append", dest="scenarios", choices=sorted(SCENARIOS),
+                        help=f"scenario to run (repeatable; default: {', '.join(DEFAULT_SCENARIOS)})")
+    parser.add_argument("--scale", type=int, default=10, help="dataset multiplier for fake_supabase")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="measured seconds per scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the median is reported")
+    parser.add_argument("--users", type=int, default=20, help="distinct signed-in users")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn processes")
+    parser.add_argument("--worker-class", default="gevent")
+    parser.add_argument("--upstream-delay", type=float, default=0.005, help="simulated upstream latency (s)")
+    parser.add_argument("--remote-auth", action="store_true",
+                        help="verify tokens through /auth/v1/user instead of the local JWT secret")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    names = args.scenarios or DEFAULT_SCENARIOS
+    users = min(args.users, fake_supabase.dataset_sizes(args.scale)["users"])
+    settings = {
+        "scale": args.scale,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "repeat": args.repeat,
+        "users": users,
+        "workers": args.workers,
+        "worker_class": args.worker_class,
+        "upstream_delay": args.upstream_delay,
+        "remote_auth": args.remote_auth,
+    }
+
+    fake, fake_url = _start_fake(args.scale, args.upstream_delay)
+    workdir = tempfile.mkdtemp(prefix="chefkit-bench-")
+    env = {
+        "SUPABASE_URL": fake_url,
+        "SUPABASE_ANON_KEY": "bench.anon.key",
+        "SUPABASE_SERVICE_ROLE_KEY": "bench.service.key",
+        "CLOUDINARY_API_URL": fake_url,
+        "CLOUDINARY_CLOUD_NAME": "bench",
+        "CLOUDINARY_API_KEY": "bench-key",
+        "CLOUDINARY_API_SECRET": "bench-secret",
+        "NOTIFICATION_OUTBOX_PATH": os.path.join(workdir, "outbox.db"),
+        "UPLOAD_DEDUPE_PATH": os.path.join(workdir, "upload_dedupe.db"),
+        "KV_STORE_PATH": os.path.join(workdir, "kv_store.db"),
+        # One client IP sends every request; measure the app, not the limiter
+        "RATE_LIMIT_ENABLED": "false",
+        "FIREBASE_CREDENTIALS_JSON": "",
+        "GOOGLE_APPLICATION_CREDENTIALS": "",
+        # Budget logging would only add noise to the run
+        "UPSTREAM_CALL_BUDGET": "1000000",
+        "N_PLUS_ONE_THRESHOLD": "1000000",
+    }
+    if not args.remote_auth:
+        env["SUPABASE_JWT_SECRET"] = _JWT_SECRET
+    port = free_port()
+    app = start_gunicorn(env, port, args.worker_class, args.workers)
+    base_url = f"http://127.0.0.1:{port}"
+    tokens = [_token(i) for i in range(users)]
+
+    baseline: Dict[str, Any] = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    comparable = baseline.get("settings") == settings
+    if baseline and not comparable and not args.save_baseline:
+        print(f"note: {args.baseline} was recorded with different settings; not comparing")
+
+    print(f"scale {args.scale}, {args.concurrency} clients, {users} users, {args.workers} {args.worker_class} "
+          f"worker(s), {args.upstream_delay * 1000:.0f}ms upstream delay, {args.duration:.0f}s per scenario")
+    print(f"{'scenario':<16} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calls':>6} {'errors':>7}")
+
+    results: Dict[str, Dict[str, float]] = {}
+    regressions: Dict[str, List[str]] = {}
+    try:
+        for name in names:
+            runs = [
+                _run_scenario(base_url, SCENARIOS[name], tokens, args.concurrency, args.duration)
+                for _ in range(args.repeat)
+            ]
+            # Median of each figure over the repeats damps scheduler noise
+            result = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            results[name] = {key: round(value, 2) for key, value in result.items()}
+            print(f"{name:<16} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                  f"{result['p99_ms']:>8.1f} {result['upstream_calls']:>6.2f} {result['errors']:>7}")
+            if comparable:
+                problems = _compare(result, baseline.get("scenarios", {}).get(name), args.tolerance)
+                if problems:
+                    regressions[name] = problems
+    finally:
+        stop(app)
+        stop(fake)
+
+    if args.save_baseline:
+        stored = baseline if comparable else {}
+        stored.update({
+            "settings": settings,
+            "environment": {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "recorded_at": time.strftime("%Y-%m-%d"),
+            },
+        })
+        stored.setdefault("scenarios", {}).update(results)
+        with open(args.baseline, "w") as fh:
+            json.dump(stored, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"baseline saved to {args.baseline}")
+    elif regressions:
+        for name, problems in regressions.items():
+            print(f"REGRESSION {name}: {'; '.join(problems)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
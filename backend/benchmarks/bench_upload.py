@@ -0,0 +1,140 @@
+"""Peak worker memory per image upload, for each request body format.
+
+Boots the app under gunicorn (one worker) against the local Cloudinary
+stand-in in fake_supabase.py, warms the worker with a small upload, then
+sends --count different images of --size MB (so the upload dedupe index
+never hits) and reports how much the worker's peak RSS (VmHWM) grew. Every
+mode gets a fresh worker.
+
+    cd backend && python benchmarks/bench_upload.py
+    cd backend && python benchmarks/bench_upload.py --mode raw --size 20
+
+Linux only (reads /proc).
+"""
+import argparse
+import base64
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Iterator
+
+import jwt
+import requests
+
+from harness import free_port, start_gunicorn, stop
+
+import fake_supabase
+from bench_api import _JWT_SECRET, _start_fake, _token
+
+_CHUNK = 64 * 1024
+
+
+def _vm_hwm_kb(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    raise RuntimeError(f"no VmHWM for pid {pid}")
+
+
+def _worker_pid(master_pid: int) -> int:
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as fh:
+            children = fh.read().split()
+        if children:
+            return int(children[0])
+        time.sleep(0.1)
+    raise RuntimeError("gunicorn worker did not start")
+
+
+def _send_raw(url: str, headers: Dict[str, str], image: bytes) -> requests.Response:
+    return requests.post(url, data=image, headers=dict(headers, **{"Content-Type": "image/jpeg"}), timeout=60)
+
+
+def _send_chunked(url: str, headers: Dict[str, str], image: bytes) -> requests.Response:
+    def chunks() -> Iterator[bytes]:
+        for offset in range(0, len(image), _CHUNK):
+            yield image[offset:offset + _CHUNK]
+
+    return requests.post(url, data=chunks(), headers=dict(headers, **{"Content-Type": "image/jpeg"}), timeout=60)
+
+
+def _send_multipart(url: str, headers: Dict[str, str], image: bytes) -> requests.Response:
+    return requests.post(url, files={"file": ("photo.jpg", image, "image/jpeg")}, headers=headers, timeout=60)
+
+
+def _send_json(url: str, headers: Dict[str, str], image: bytes) -> requests.Response:
+    body = {"image_base64": "data:image/jpeg;base64," + base64.b64encode(image).decode()}
+    return requests.post(url, json=body, headers=headers, timeout=60)
+
+
+MODES: Dict[str, Callable[[str, Dict[str, str], bytes], requests.Response]] = {
+    "raw": _send_raw,
+    "chunked": _send_chunked,
+    "multipart": _send_multipart,
+    "json": _send_json,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", action="append", dest="modes", choices=sorted(MODES),
+                        help="body format to measure (repeatable; default: all)")
+    parser.add_argument("--size", type=float, default=8.0, help="image size in MB")
+    parser.add_argument("--count", type=int, default=3, help="uploads per mode")
+    parser.add_argument("--worker-class", default="gevent")
+    args = parser.parse_args()
+
+    size = int(args.size * 1024 * 1024)
+    fake, fake_url = _start_fake(1, 0.0)
+    workdir = tempfile.mkdtemp(prefix="chefkit-bench-upload-")
+    env = {
+        "SUPABASE_URL": fake_url,
+        "SUPABASE_ANON_KEY": "bench.anon.key",
+        "SUPABASE_SERVICE_ROLE_KEY": "bench.service.key",
+        "SUPABASE_JWT_SECRET": _JWT_SECRET,
+        "CLOUDINARY_API_URL": fake_url,
+        "CLOUDINARY_CLOUD_NAME": "bench",
+        "CLOUDINARY_API_KEY": "bench-key",
+        "CLOUDINARY_API_SECRET": "bench-secret",
+        "MAX_UPLOAD_BYTES": str(size + 1024),
+        "UPLOAD_DEDUPE_PATH": os.path.join(workdir, "upload_dedupe.db"),
+        "KV_STORE_PATH": os.path.join(workdir, "kv_store.db"),
+        # One client IP sends every request; measure the app, not the limiter
+        "RATE_LIMIT_ENABLED": "false",
+        "NOTIFICATION_OUTBOX_PATH": os.path.join(workdir, "outbox.db"),
+        "FIREBASE_CREDENTIALS_JSON": "",
+        "GOOGLE_APPLICATION_CREDENTIALS": "",
+    }
+    headers = {"Authorization": f"Bearer {_token(0)}"}
+    print(f"{args.count} x {args.size:g} MB uploads, 1 {args.worker_class} worker")
+    print(f"{'mode':<10} {'peak RSS growth':>16} {'per MB':>8} {'ms/upload':>10}")
+    try:
+        for mode in args.modes or list(MODES):
+            port = free_port()
+            app = start_gunicorn(env, port, args.worker_class, 1)
+            try:
+                url = f"http://127.0.0.1:{port}/api/users/{fake_supabase.user_id(0)}/avatar"
+                worker = _worker_pid(app.pid)
+                warm = MODES[mode](url, headers, os.urandom(16 * 1024))
+                if warm.status_code != 200:
+                    raise RuntimeError(f"{mode} warm-up failed: {warm.status_code} {warm.text}")
+                images = [os.urandom(size) for _ in range(args.count)]
+                before = _vm_hwm_kb(worker)
+                started = time.perf_counter()
+                for image in images:
+                    resp = MODES[mode](url, headers, image)
+                    if resp.status_code != 200:
+                        raise RuntimeError(f"{mode} upload failed: {resp.status_code} {resp.text}")
+                elapsed = (time.perf_counter() - started) / args.count
+                growth_mb = (_vm_hwm_kb(worker) - before) / 1024
+                print(f"{mode:<10} {growth_mb:>13.1f} MB {growth_mb / args.size:>8.2f} {elapsed * 1000:>10.0f}")
+            finally:
+                stop(app)
+    finally:
+        stop(fake)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Compare gunicorn sync and gevent workers under concurrent load.
+
+Starts a local stand-in for PostgREST that answers after a fixed delay,
+boots the real app under gunicorn (backend/gunicorn.conf.py) once per worker
+class with the same number of processes, and drives GET /api/recipes/<id>
+(uncached, one upstream call per request) from concurrent keep-alive clients.
+
+    cd backend && python benchmarks/bench_workers.py --workers 2 --concurrency 100
+
+Prints requests/second and latency percentiles for each worker class.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from harness import BACKEND_DIR, drive, free_port, start_gunicorn, stop
+
+
+def _start_upstream(delay: float) -> ThreadingHTTPServer:
+    """Minimal PostgREST stand-in: every GET returns one recipe row after `delay`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            # postgrest-py sends a JSON body even on GET; drain it to keep the connection usable
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay)
+            row = {"recipe_id": self.path.rsplit("=", 1)[-1], "recipe_name": "Bench recipe"}
+            single = "vnd.pgrst.object" in (self.headers.get("Accept") or "")
+            body = json.dumps(row if single else [row]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _start_app(worker_class: str, workers: int, upstream_url: str, port: int):
+    env = {
+        "SUPABASE_URL": upstream_url,
+        "SUPABASE_ANON_KEY": "bench.anon.key",
+        "NOTIFICATION_OUTBOX_PATH": os.path.join(BACKEND_DIR, "bench_outbox.db"),
+        # One client IP sends every request; measure the app, not the limiter
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    return start_gunicorn(env, port, worker_class, workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn processes for both runs")
+    parser.add_argument("--concurrency", type=int, default=100, help="concurrent client connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--upstream-delay", type=float, default=0.05, help="simulated PostgREST latency (s)")
+    parser.add_argument("--worker-class", action="append", dest="worker_classes",
+                        help="worker class to test (repeatable; default: sync and gevent)")
+    args = parser.parse_args()
+
+    upstream = _start_upstream(args.upstream_delay)
+    upstream_url = f"http://127.0.0.1:{upstream.server_address[1]}"
+    print(f"upstream delay {args.upstream_delay * 1000:.0f}ms, {args.workers} workers, "
+          f"{args.concurrency} clients, {args.duration:.0f}s per run")
+    print(f"{'worker':<8} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    for worker_class in args.worker_classes or ["sync", "gevent"]:
+        port = free_port()
+        proc = _start_app(worker_class, args.workers, upstream_url, port)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            # Distinct IDs so every request misses the caches and goes upstream
+            result = drive(
+                lambda session, index, n: session.get(f"{base_url}/api/recipes/{index}-{n}", timeout=30),
+                args.concurrency,
+                args.duration,
+            )
+        finally:
+            stop(proc)
+        print(f"{worker_class:<8} {result['rps']:>9.1f} {result['p50_ms']:>8.1f} "
+              f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result['errors']:>7}")
+
+    upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
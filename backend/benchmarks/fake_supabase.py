@@ -0,0 +1,600 @@
+"""Local stand-in for the Supabase and Cloudinary APIs the backend calls.
+
+    cd backend && python benchmarks/fake_supabase.py --port 54321 --scale 10
+
+Serves, from in-memory tables:
+
+- PostgREST under /rest/v1: select/insert/update/upsert/delete on any table
+  with the filters the backend uses (eq, neq, gt, gte, lt, lte, in, is, cs,
+  and or/and groups), order, limit/offset, single-object responses,
+  many-to-one embeds in write responses (select=alias:table!column(cols)),
+  and the
+  toggle_user_favourite / toggle_follow RPCs. Unknown RPCs answer PGRST202
+  like a database without the function.
+- Supabase Auth GET /auth/v1/user: echoes the user of the bearer JWT (the
+  signature is not checked).
+- Cloudinary POST /v1_1/<cloud>/image/upload: drains the upload and returns
+  a secure_url, keeping a requested public_id and signing public_id/version
+  with CLOUDINARY_API_SECRET (default "bench-secret") like Cloudinary does
+  (point CLOUDINARY_API_URL at this server). The Admin API's
+  GET /v1_1/<cloud>/resources/image/upload/<public_id> reports the size of
+  an upload and POST /v1_1/<cloud>/image/destroy removes it.
+
+FCM is not stubbed: firebase-admin has no endpoint override, so benchmark
+runs leave Firebase credentials unset and pushes are skipped.
+
+Tables are seeded from seed_database.SAMPLE_CHEFS / SAMPLE_RECIPES,
+multiplied by --scale, plus synthetic users with favourites, follows and
+notifications (seed_database.generate_dataset, the rows `seed_database.py
+--scale` writes to a real project). IDs are deterministic (see user_id/recipe_id), so a load
+generator can build requests without asking the server.
+"""
+import argparse
+import base64
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# seed_database imports supabase_client, which only needs these to be set
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "fake.service.key")
+from seed_database import (  # noqa: E402,F401
+    SAMPLE_CHEFS, SAMPLE_RECIPES, _NAMESPACE, chef_id, dataset_sizes, generate_dataset, recipe_id, user_id,
+)
+from cloudinary_utils import sign_params  # noqa: E402
+
+_CLOUDINARY_SECRET = os.getenv("CLOUDINARY_API_SECRET", "bench-secret")
+_PUBLIC_ID_FIELD = re.compile(rb'name="public_id"\r\n\r\n([^\r]+)\r\n')
+
+PRIMARY_KEYS = {
+    "recipe": ("recipe_id",),
+    "users": ("user_id",),
+    "follows": ("follower_id", "following_id"),
+    "notifications": ("notification_id",),
+    "ingredients": ("ingredient_id",),
+}
+
+
+def build_tables(scale: int, favourites: int = 20, follows: int = 10, notifications: int = 50,
+                 seed: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+    """seed_database.generate_dataset plus notifications and the columns the schema defaults."""
+    tables = generate_dataset(scale, favourites, follows, seed)
+    users, recipes, follow_rows = tables["users"], tables["recipe"], tables["follows"]
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    for recipe in recipes:
+        recipe.update({
+            "title_ar": None, "title_fr": None, "tags_ar": None, "tags_fr": None,
+            "steps_ar": None, "steps_fr": None,
+        })
+
+    followers: Dict[str, int] = {}
+    for row in follow_rows:
+        followers[row["following_id"]] = followers.get(row["following_id"], 0) + 1
+    for user in users:
+        user["user_followers_count"] = followers.get(user["user_id"], 0)
+        user["user_devices"] = None
+
+    notification_rows = []
+    for i in range(dataset_sizes(scale)["users"]):
+        for n in range(notifications):
+            notification_rows.append({
+                "notification_id": str(uuid.uuid5(_NAMESPACE, f"notification-{i}-{n}")),
+                "user_id": user_id(i),
+                "notification_title": "New recipe",
+                "notification_type": "new_recipe",
+                "notification_message": f"Try {recipes[n % len(recipes)]['recipe_name']}",
+                "notification_data": {"recipe_id": recipes[n % len(recipes)]["recipe_id"]},
+                "notification_is_read": n % 3 == 0,
+                "notification_created_at": (now - timedelta(hours=n)).isoformat(),
+            })
+
+    return {
+        "users": users,
+        "recipe": recipes,
+        "follows": follow_rows,
+        "notifications": notification_rows,
+        "ingredients": [],
+    }
+
+
+# -----------------------------
+# PostgREST filter evaluation
+# -----------------------------
+def _index_key(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "null" if value is None else str(value)
+
+
+def _coerce(raw: str, current: Any) -> Any:
+    """Interpret a filter value with the type of the column value it is compared to."""
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        raw = raw[1:-1]
+    if raw == "null":
+        return None
+    if isinstance(current, bool):
+        return raw == "true"
+    if isinstance(current, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _split_top_level(text: str) -> List[str]:
+    """Split on commas that are not inside parentheses, braces or quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char in "({":
+            depth += 1
+        elif not quoted and char in ")}":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+def _compare(op: str, value: Any, raw: Any) -> bool:
+    """Evaluate one filter; `raw` is the parsed operand (a set for in, a list for cs)."""
+    negate = op.startswith("not.")
+    if negate:
+        op = op[4:]
+    if op == "is":
+        result = value is None if raw == "null" else value is (raw == "true")
+    elif op == "in":
+        result = _index_key(value) in raw
+    elif op == "cs":
+        result = isinstance(value, list) and all(item in value for item in raw)
+    else:
+        other = _coerce(raw, value)
+        if op == "eq":
+            result = value == other
+        elif op == "neq":
+            result = value != other
+        elif value is None or other is None:
+            result = False
+        elif op == "gt":
+            result = value > other
+        elif op == "gte":
+            result = value >= other
+        elif op == "lt":
+            result = value < other
+        elif op == "lte":
+            result = value <= other
+        else:
+            raise ValueError(f"unsupported operator {op}")
+    return not result if negate else result
+
+
+def _group_matcher(kind: str, body: str) -> Callable[[Dict[str, Any]], bool]:
+    """or=(a.lt.1,and(a.eq.1,b.gt.2)) style groups."""
+    matchers = []
+    for term in _split_top_level(body):
+        term = term.strip()
+        nested = re.match(r"^(not\.)?(and|or)\((.*)\)$", term)
+        if nested:
+            inner = _group_matcher(nested.group(2), nested.group(3))
+            matchers.append((lambda m: lambda row: not m(row))(inner) if nested.group(1) else inner)
+            continue
+        column, op_value = term.split(".", 1)
+        matchers.append(_filter_matcher(column, op_value))
+    combine = all if kind == "and" else any
+    return lambda row: combine(m(row) for m in matchers)
+
+
+def _filter_matcher(column: str, op_value: str) -> Callable[[Dict[str, Any]], bool]:
+    op, _, raw = op_value.partition(".")
+    if op == "not":
+        inner_op, _, raw = raw.partition(".")
+        op = f"not.{inner_op}"
+    operand: Any = raw
+    if op.endswith("in"):
+        operand = {item.strip().strip('"') for item in _split_top_level(raw.strip("()"))}
+    elif op.endswith("cs"):
+        operand = [item.strip().strip('"') for item in _split_top_level(raw.strip("{}[]")) if item.strip()]
+    return lambda row: _compare(op, row.get(column), operand)
+
+
+def _project(row: Dict[str, Any], select: Optional[str]) -> Dict[str, Any]:
+    if not select or select.strip() == "*":
+        return dict(row)
+    columns = [c.strip() for c in _split_top_level(select) if c.strip() and "(" not in c]
+    if "*" in columns:
+        return dict(row)
+    return {c: row.get(c) for c in columns}
+
+
+_EMBED = re.compile(r"^(?:(\w+):)?(\w+)!(\w+)\((.*)\)$")
+
+
+def _embeds(select: Optional[str]) -> List[Tuple[str, str, str, str]]:
+    """(key, table, column, columns) for each alias:table!column(columns) in a select."""
+    out = []
+    for term in _split_top_level(select or ""):
+        match = _EMBED.match(term.strip())
+        if match:
+            alias, table, column, columns = match.groups()
+            out.append((alias or table, table, column, columns))
+    return out
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    return (1, 0) if value is None else (0, value)
+
+
+class FakeDatabase:
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]]):
+        self.tables = tables
+        self.lock = threading.Lock()
+        # (table, column) -> value -> rows; built on first eq filter, dropped on writes
+        self._indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+
+    def _rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def _changed(self, table: str) -> None:
+        for key in [key for key in self._indexes if key[0] == table]:
+            del self._indexes[key]
+
+    def _candidates(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Rows that can match: narrowed by the first eq filter through an index."""
+        for column, value in params:
+            if column in ("select", "order", "limit", "offset", "on_conflict", "columns", "or", "and"):
+                continue
+            if value.startswith("eq."):
+                index = self._indexes.get((table, column))
+                if index is None:
+                    index = {}
+                    for row in self._rows(table):
+                        index.setdefault(_index_key(row.get(column)), []).append(row)
+                    self._indexes[(table, column)] = index
+                raw = value[3:]
+                if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+                    raw = raw[1:-1]
+                return index.get(raw, [])
+        return self._rows(table)
+
+    @staticmethod
+    def _matchers(params: List[Tuple[str, str]]) -> List[Callable[[Dict[str, Any]], bool]]:
+        matchers = []
+        for key, value in params:
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                continue
+            if key in ("or", "and"):
+                matchers.append(_group_matcher(key, value.strip()[1:-1]))
+            else:
+                matchers.append(_filter_matcher(key, value))
+        return matchers
+
+    def query(self, table: str, params: List[Tuple[str, str]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Filtered, ordered and paged rows plus the total match count."""
+        options = dict(params)
+        matchers = self._matchers(params)
+        with self.lock:
+            rows = [row for row in self._candidates(table, params) if all(m(row) for m in matchers)]
+        if options.get("order"):
+            for term in reversed(options["order"].split(",")):
+                column, *modifiers = term.split(".")
+                rows.sort(key=lambda r: _sort_key(r.get(column)), reverse="desc" in modifiers)
+        total = len(rows)
+        offset = int(options.get("offset") or 0)
+        rows = rows[offset:]
+        if options.get("limit"):
+            rows = rows[:int(options["limit"])]
+        return [_project(row, options.get("select")) for row in rows], total
+
+    def matching(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Rows matching the filters (caller holds the lock)."""
+        matchers = self._matchers(params)
+        return [row for row in self._candidates(table, params) if all(m(row) for m in matchers)]
+
+    def embedded(self, rows: List[Dict[str, Any]], select: Optional[str]) -> List[Dict[str, Any]]:
+        """Each row's many-to-one embeds, keyed as the select names them."""
+        out = []
+        with self.lock:
+            for row in rows:
+                embeds = {}
+                for key, table, column, columns in _embeds(select):
+                    pk = PRIMARY_KEYS.get(table, ("id",))[0]
+                    target = next(iter(self.matching(table, [(pk, f"eq.{row.get(column)}")])), None)
+                    embeds[key] = _project(target, columns) if target is not None else None
+                out.append(embeds)
+        return out
+
+    def insert(self, table: str, records: List[Dict[str, Any]], upsert: bool,
+               ignore_duplicates: bool = False) -> List[Dict[str, Any]]:
+        keys = PRIMARY_KEYS.get(table, ("id",))
+        now = datetime.now(timezone.utc).isoformat()
+        out = []
+        with self.lock:
+            self._changed(table)
+            rows = self._rows(table)
+            for record in records:
+                record = dict(record)
+                for key in keys:
+                    if key.endswith("_id") and key not in record and len(keys) == 1:
+                        record[key] = str(uuid.uuid4())
+                if table == "notifications":
+                    record.setdefault("notification_created_at", now)
+                    record.setdefault("notification_is_read", False)
+                existing = None
+                if upsert or ignore_duplicates:
+                    existing = next((r for r in rows if all(r.get(k) == record.get(k) for k in keys)), None)
+                if existing is not None and ignore_duplicates:
+                    continue
+                if existing is not None:
+                    existing.update(record)
+                    out.append(dict(existing))
+                else:
+                    rows.append(record)
+                    out.append(dict(record))
+        return out
+
+    def update(self, table: str, params: List[Tuple[str, str]], changes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        with self.lock:
+            rows = self.matching(table, params)
+            self._changed(table)
+            for row in rows:
+                row.update(changes)
+            return [dict(row) for row in rows]
+
+    def delete(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        with self.lock:
+            doomed = self.matching(table, params)
+            self._changed(table)
+            ids = {id(row) for row in doomed}
+            self.tables[table] = [row for row in self._rows(table) if id(row) not in ids]
+            return [dict(row) for row in doomed]
+
+    # RPCs mirroring backend/sql/*.sql
+    def rpc(self, name: str, args: Dict[str, Any]) -> Tuple[int, Any]:
+        with self.lock:
+            self._changed("users")
+            self._changed("follows")
+            if name == "toggle_user_favourite":
+                user = next((u for u in self._rows("users") if u["user_id"] == args["p_user_id"]), None)
+                if user is None:
+                    return 200, None
+                favourites = list(user.get("user_favourite_recipees") or [])
+                recipe = args["p_recipe_id"]
+                if recipe in favourites:
+                    favourites.remove(recipe)
+                else:
+                    favourites.append(recipe)
+                user["user_favourite_recipees"] = favourites
+                return 200, {"is_favorite": recipe in favourites, "favourite_ids": favourites}
+            if name == "toggle_follow":
+                follower, following = args["p_follower_id"], args["p_following_id"]
+                rows = self._rows("follows")
+                before = len(rows)
+                self.tables["follows"] = rows = [
+                    r for r in rows if not (r["follower_id"] == follower and r["following_id"] == following)
+                ]
+                is_following = len(rows) == before
+                if is_following:
+                    rows.append({"follower_id": follower, "following_id": following})
+                count = sum(1 for r in rows if r["following_id"] == following)
+                for user in self._rows("users"):
+                    if user["user_id"] == following:
+                        user["user_followers_count"] = count
+                return 200, {"is_following": is_following, "followers_count": count}
+        return 404, {"code": "PGRST202", "message": f"Could not find the function public.{name}"}
+
+
+# -----------------------------
+# HTTP server
+# -----------------------------
+def _jwt_claims(authorization: str) -> Optional[Dict[str, Any]]:
+    token = authorization[7:] if authorization.startswith("Bearer ") else ""
+    try:
+        payload = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return None
+
+
+def _file_size(multipart: bytes) -> int:
+    """Length of the `file` part of a multipart body."""
+    start = multipart.find(b"\r\n\r\n", multipart.find(b'name="file"')) + 4
+    boundary = multipart[:multipart.find(b"\r\n")]
+    return multipart.find(b"\r\n" + boundary, start) - start
+
+
+def make_handler(db: FakeDatabase, delay: float):
+    auth_users: Dict[str, str] = {}
+    auth_lock = threading.Lock()
+    # public_id -> bytes of the uploaded file part
+    uploads: Dict[str, int] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self) -> bytes:
+            if "chunked" in (self.headers.get("Transfer-Encoding") or "").lower():
+                parts = []
+                while True:
+                    size = int(self.rfile.readline().split(b";", 1)[0], 16)
+                    if not size:
+                        self.rfile.readline()
+                        return b"".join(parts)
+                    parts.append(self.rfile.read(size))
+                    self.rfile.readline()
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self, method: str) -> None:
+            raw_body = self._body()
+            if delay:
+                time.sleep(delay)
+            parts = urlsplit(self.path)
+            path = unquote(parts.path)
+            params = parse_qsl(parts.query, keep_blank_values=True)
+            try:
+                if path.startswith("/rest/v1/rpc/") and method == "POST":
+                    status, payload = db.rpc(path.rsplit("/", 1)[1], json.loads(raw_body or b"{}"))
+                    self._send(status, payload)
+                elif path.startswith("/rest/v1/"):
+                    self._rest(method, path[len("/rest/v1/"):], params, raw_body)
+                elif path == "/auth/v1/user" and method == "GET":
+                    claims = _jwt_claims(self.headers.get("Authorization") or "")
+                    if not claims or not claims.get("sub"):
+                        self._send(401, {"msg": "invalid JWT"})
+                    else:
+                        self._send(200, {"id": claims["sub"], "email": claims.get("email"),
+                                         "aud": claims.get("aud", "authenticated"), "role": "authenticated",
+                                         "app_metadata": {}, "user_metadata": {}})
+                elif path == "/auth/v1/admin/users" and method == "POST":
+                    account = json.loads(raw_body or b"{}")
+                    with auth_lock:
+                        if account["email"] in auth_users:
+                            self._send(422, {"code": 422, "error_code": "email_exists",
+                                             "msg": "A user with this email address has already been registered"})
+                            return
+                        auth_users[account["email"]] = account.get("id") or str(uuid.uuid4())
+                    self._send(200, {"id": auth_users[account["email"]], "email": account["email"],
+                                     "user_metadata": account.get("user_metadata") or {}})
+                elif re.match(r"^/v1_1/[^/]+/image/upload$", path) and method == "POST":
+                    if b'name="file"' not in raw_body or b'name="signature"' not in raw_body:
+                        self._send(400, {"error": {"message": "Missing required parameter - file"}})
+                        return
+                    match = _PUBLIC_ID_FIELD.search(raw_body)
+                    public_id = match.group(1).decode() if match else f"bench/{uuid.uuid4().hex}"
+                    version = str(int(time.time()))
+                    uploads[public_id] = _file_size(raw_body)
+                    self._send(200, {"public_id": public_id, "version": int(version), "bytes": uploads[public_id],
+                                     "format": "jpg",
+                                     "signature": sign_params({"public_id": public_id, "version": version},
+                                                              _CLOUDINARY_SECRET),
+                                     "secure_url": f"http://{self.headers.get('Host')}/{public_id}.jpg"})
+                elif re.match(r"^/v1_1/[^/]+/resources/image/upload/", path) and method == "GET":
+                    public_id = path.split("/resources/image/upload/", 1)[1]
+                    if public_id not in uploads:
+                        self._send(404, {"error": {"message": f"Resource not found - {public_id}"}})
+                        return
+                    self._send(200, {"public_id": public_id, "bytes": uploads[public_id], "format": "jpg"})
+                elif re.match(r"^/v1_1/[^/]+/image/destroy$", path) and method == "POST":
+                    public_id = dict(parse_qsl(raw_body.decode())).get("public_id", "")
+                    self._send(200, {"result": "ok" if uploads.pop(public_id, None) is not None else "not found"})
+                else:
+                    self._send(404, {"message": f"{method} {path} is not stubbed"})
+            except (KeyError, ValueError) as e:
+                self._send(400, {"code": "PGRST100", "message": str(e)})
+
+        def _rest(self, method: str, table: str, params, raw_body: bytes) -> None:
+            select = dict(params).get("select")
+            if method == "GET":
+                rows, total = db.query(table, params)
+            elif method == "POST":
+                records = json.loads(raw_body or b"[]")
+                prefer = self.headers.get("Prefer") or ""
+                rows = db.insert(table, records if isinstance(records, list) else [records],
+                                 "merge-duplicates" in prefer, "ignore-duplicates" in prefer)
+                total = len(rows)
+            elif method == "PATCH":
+                rows = db.update(table, params, json.loads(raw_body or b"{}"))
+                total = len(rows)
+            elif method == "DELETE":
+                rows = db.delete(table, params)
+                total = len(rows)
+            else:
+                self._send(405, {"message": f"{method} not supported"})
+                return
+            if method != "GET":
+                # No triggers here, so embedded rows are as PostgREST reads them: before the write
+                rows = [dict(_project(row, select), **embedded)
+                        for row, embedded in zip(rows, db.embedded(rows, select))]
+            headers = {"Content-Range": f"0-{max(len(rows) - 1, 0)}/{total}"}
+            if "vnd.pgrst.object" in (self.headers.get("Accept") or ""):
+                if len(rows) != 1:
+                    self._send(406, {"code": "PGRST116",
+                                     "message": "JSON object requested, multiple (or no) rows returned",
+                                     "details": f"The result contains {len(rows)} rows"})
+                    return
+                self._send(200, rows[0], headers)
+                return
+            self._send(201 if method == "POST" else 200, rows, headers)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections at the end of a run are expected
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+def serve(port: int, scale: int, delay: float = 0.0, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Start the stand-in on a background thread and return the server."""
+    server = _Server((host, port), make_handler(FakeDatabase(build_tables(scale)), delay))
+    threading.Thread(target=server.serve_forever, name="fake-supabase", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--scale", type=int, default=10, help="multiply the sample chefs/recipes (default 10)")
+    parser.add_argument("--delay", type=float, default=0.0, help="simulated upstream latency per call (s)")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.scale, args.delay, args.host)
+    sizes = dataset_sizes(args.scale)
+    print(f"[fake-supabase] http://{args.host}:{args.port} "
+          f"({sizes['recipes']} recipes, {sizes['chefs']} chefs, {sizes['users']} users)", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Helpers shared by the benchmark scripts: ports, gunicorn, load, percentiles."""
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, timeout: float = 30.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code < 500:
+                return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+def start_gunicorn(env: Dict[str, str], port: int, worker_class: str, workers: int) -> subprocess.Popen:
+    """Boot the real app under gunicorn (backend/gunicorn.conf.py) and wait for /health."""
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=worker_class,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_ACCESS_LOG="/dev/null",
+        GUNICORN_LOG_LEVEL="warning",
+        **env,
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    if not wait_for(f"http://127.0.0.1:{port}/health"):
+        proc.terminate()
+        raise RuntimeError(f"gunicorn ({worker_class}) did not start")
+    return proc
+
+
+def stop(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def drive(send: Callable[[requests.Session, int, int], requests.Response], concurrency: int, duration: float,
+          on_response: Optional[Callable[[requests.Response], None]] = None) -> Dict[str, float]:
+    """Run `send(session, client_index, n)` from `concurrency` keep-alive clients for `duration` seconds.
+
+    Non-2xx/3xx responses and exceptions count as errors.
+    """
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(index: int):
+        nonlocal errors
+        session = requests.Session()
+        local, failed, n = [], 0, 0
+        while time.perf_counter() < stop_at:
+            n += 1
+            started = time.perf_counter()
+            try:
+                resp = send(session, index, n)
+                if resp.status_code >= 400:
+                    failed += 1
+                elif on_response is not None:
+                    on_response(resp)
+            except requests.RequestException:
+                failed += 1
+            local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
@@ -1,12 +1,21 @@
+import hashlib
 import os
-from typing import Tuple
+import time
+from functools import lru_cache
+from typing import Dict, Tuple
 
+# Overridable for local stand-ins (benchmarks/fake_supabase.py)
+CLOUDINARY_API_URL = os.getenv("CLOUDINARY_API_URL", "https://api.cloudinary.com").rstrip("/")
+CLOUDINARY_DELIVERY_URL = os.getenv("CLOUDINARY_DELIVERY_URL", "https://res.cloudinary.com").rstrip("/")
 
+
+@lru_cache(maxsize=1)
 def get_cloudinary_config() -> Tuple[str, str, str]:
     """Read Cloudinary credentials from environment.
 
     CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET
-    must be set in the backend environment.
+    must be set in the backend environment. Read on first upload and cached;
+    a missing variable raises (and is not cached).
     """
 
     cloud_name = os.getenv("CLOUDINARY_CLOUD_NAME")
@@ -17,3 +26,43 @@ def get_cloudinary_config() -> Tuple[str, str, str]:
         raise RuntimeError("Cloudinary env vars not set: CLOUDINARY_CLOUD_NAME/API_KEY/API_SECRET")
 
     return cloud_name, api_key, api_secret
+
+
+def get_upload_url(cloud_name: str) -> str:
+    """Image upload endpoint of the given Cloudinary cloud."""
+    return f"{CLOUDINARY_API_URL}/v1_1/{cloud_name}/image/upload"
+
+
+def get_delivery_url(cloud_name: str, public_id: str, version: str, fmt: str) -> str:
+    """secure_url of an uploaded image, as Cloudinary returns it from an upload."""
+    return f"{CLOUDINARY_DELIVERY_URL}/{cloud_name}/image/upload/v{version}/{public_id}.{fmt}"
+
+
+def sign_params(params: Dict[str, str], api_secret: str) -> str:
+    """Cloudinary request signature: sha1 of the sorted `k=v&...` string plus the secret."""
+    to_sign = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return hashlib.sha1((to_sign + api_secret).encode("utf-8")).hexdigest()
+
+
+def signed_upload_params(folder: str) -> Dict[str, str]:
+    """Form fields for a signed upload into `folder` (folder, timestamp, api_key, signature)."""
+    _, api_key, api_secret = get_cloudinary_config()
+    params = {"folder": folder, "timestamp": str(int(time.time()))}
+    return dict(params, api_key=api_key, signature=sign_params(params, api_secret))
+
+
+def get_resource_url(cloud_name: str, public_id: str) -> str:
+    """Admin API endpoint describing one uploaded image (bytes, format, ...)."""
+    return f"{CLOUDINARY_API_URL}/v1_1/{cloud_name}/resources/image/upload/{public_id}"
+
+
+def get_destroy_url(cloud_name: str) -> str:
+    """Endpoint deleting an uploaded image by public_id."""
+    return f"{CLOUDINARY_API_URL}/v1_1/{cloud_name}/image/destroy"
+
+
+def signed_destroy_params(public_id: str) -> Dict[str, str]:
+    """Form fields for deleting `public_id` (and its cached CDN copies)."""
+    _, api_key, api_secret = get_cloudinary_config()
+    params = {"invalidate": "true", "public_id": public_id, "timestamp": str(int(time.time()))}
+    return dict(params, api_key=api_key, signature=sign_params(params, api_secret))
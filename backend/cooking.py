@@ -2,17 +2,29 @@
 
 Provides functionality to find the best matching recipe based on available ingredients
 and time constraints using a scoring heuristic.
+
+Recipes are held in a process-local inverted index (ingredient trigram -> normalized
+ingredient strings -> recipe ids) so `/api/cook` only runs the substring heuristic
+against candidate recipes instead of scanning the whole `recipe` table per call.
 """
-from typing import List, Dict, Any, Optional
+import heapq
+import os
+import threading
+import time as _time
+from typing import List, Dict, Any, Optional, Set
 from supabase_client import supabase
 
+# Full rebuild interval; bounds staleness for writes made by other worker processes.
+_INDEX_TTL_SECONDS = int(os.getenv("COOK_INDEX_TTL_SECONDS", "300"))
+_NGRAM = 3
+
 
 def _parse_time(time_str: str) -> int:
     """Parse time string in format 'mm:ss' and return total minutes.
-    
+
     Args:
         time_str: Time in format 'mm:ss' (e.g., '45:30' for 45 minutes 30 seconds)
-        
+
     Returns:
         Total time in minutes (seconds are converted to fractional minutes)
     """
@@ -27,18 +39,216 @@ def _parse_time(time_str: str) -> int:
         return 0
 
 
+def _normalize(value: Any) -> str:
+    return str(value).lower().strip()
+
+
+def _trigrams(value: str) -> Set[str]:
+    return {value[i:i + _NGRAM] for i in range(len(value) - _NGRAM + 1)}
+
+
+class _IndexedRecipe:
+    __slots__ = ("row", "ingredients", "total_time")
+
+    def __init__(self, row: Dict[str, Any], ingredients: List[str]):
+        self.row = row
+        self.ingredients = ingredients
+        prep_time = row.get('recipe_prep_time', 0) or 0
+        cook_time = row.get('recipe_cook_time', 0) or 0
+        self.total_time = prep_time + cook_time
+
+
+class RecipeIngredientIndex:
+    """Inverted index over recipe ingredients.
+
+    Each distinct normalized ingredient string is indexed by its trigrams, which lets
+    us find every string that either contains an input ingredient or is contained in
+    it without comparing against every recipe. Strings shorter than a trigram are
+    kept aside and checked directly.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._recipes: Dict[Any, _IndexedRecipe] = {}
+        self._order: Dict[Any, int] = {}
+        self._next_position = 0
+        self._string_recipes: Dict[str, Dict[Any, int]] = {}
+        self._trigram_strings: Dict[str, Set[str]] = {}
+        self._short_strings: Set[str] = set()
+        self._built_at: Optional[float] = None
+
+    # -- maintenance -------------------------------------------------
+    def build(self, rows: List[Dict[str, Any]]) -> None:
+        """Replace the index contents with `rows`, preserving their order."""
+        with self._lock:
+            self._recipes.clear()
+            self._order.clear()
+            self._next_position = 0
+            self._string_recipes.clear()
+            self._trigram_strings.clear()
+            self._short_strings.clear()
+            for row in rows:
+                self._add(row)
+            self._built_at = _time.monotonic()
+
+    def is_stale(self) -> bool:
+        return self._built_at is None or (_time.monotonic() - self._built_at) > _INDEX_TTL_SECONDS
+
+    def upsert(self, row: Dict[str, Any]) -> None:
+        """Insert or refresh a single recipe row (called after recipe writes)."""
+        recipe_id = row.get('recipe_id')
+        if recipe_id is None:
+            return
+        with self._lock:
+            if self._built_at is None:
+                # Nothing indexed yet; the first query will load everything.
+                return
+            position = self._order.get(recipe_id)
+            existing = self._recipes.get(recipe_id)
+            if existing is not None:
+                row = {**existing.row, **row}
+            self._remove(recipe_id)
+            self._add(row, position)
+
+    def remove(self, recipe_id: Any) -> None:
+        with self._lock:
+            self._remove(recipe_id)
+            self._order.pop(recipe_id, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._built_at = None
+
+    def _add(self, row: Dict[str, Any], position: Optional[int] = None) -> None:
+        recipe_id = row.get('recipe_id')
+        if position is None:
+            position = self._next_position
+            self._next_position += 1
+        self._order[recipe_id] = position
+        recipe_ingredients = row.get('recipe_ingredients', [])
+        if not isinstance(recipe_ingredients, list):
+            # Matches the heuristic, which skips recipes without an ingredient list
+            return
+        normalized = [_normalize(ing) for ing in recipe_ingredients]
+        self._recipes[recipe_id] = _IndexedRecipe(row, normalized)
+        for ing in normalized:
+            owners = self._string_recipes.setdefault(ing, {})
+            owners[recipe_id] = owners.get(recipe_id, 0) + 1
+            if owners[recipe_id] > 1:
+                continue
+            if len(owners) == 1:
+                self._index_string(ing)
+
+    def _remove(self, recipe_id: Any) -> None:
+        entry = self._recipes.pop(recipe_id, None)
+        if entry is None:
+            return
+        for ing in set(entry.ingredients):
+            owners = self._string_recipes.get(ing)
+            if not owners:
+                continue
+            owners.pop(recipe_id, None)
+            if not owners:
+                del self._string_recipes[ing]
+                self._unindex_string(ing)
+
+    def _index_string(self, ing: str) -> None:
+        if len(ing) < _NGRAM:
+            self._short_strings.add(ing)
+            return
+        for gram in _trigrams(ing):
+            self._trigram_strings.setdefault(gram, set()).add(ing)
+
+    def _unindex_string(self, ing: str) -> None:
+        if len(ing) < _NGRAM:
+            self._short_strings.discard(ing)
+            return
+        for gram in _trigrams(ing):
+            strings = self._trigram_strings.get(gram)
+            if strings is not None:
+                strings.discard(ing)
+                if not strings:
+                    del self._trigram_strings[gram]
+
+    # -- lookup ------------------------------------------------------
+    def _matching_strings(self, query: str) -> Set[str]:
+        """Return indexed strings `ing` where `query in ing or ing in query`."""
+        if len(query) < _NGRAM:
+            # Too short to use trigrams; fall back to a scan of distinct strings.
+            return {ing for ing in self._string_recipes if query in ing or ing in query}
+
+        query_grams = _trigrams(query)
+        matches: Set[str] = set()
+
+        # query in ing: ing must contain every trigram of query.
+        postings = sorted((self._trigram_strings.get(g, set()) for g in query_grams), key=len)
+        if postings and postings[0]:
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                candidates &= posting
+                if not candidates:
+                    break
+            matches.update(ing for ing in candidates if query in ing)
+
+        # ing in query: every trigram of ing appears in query.
+        hits: Dict[str, int] = {}
+        for gram in query_grams:
+            for ing in self._trigram_strings.get(gram, ()):
+                hits[ing] = hits.get(ing, 0) + 1
+        for ing, count in hits.items():
+            if ing not in matches and count >= len(_trigrams(ing)) and ing in query:
+                matches.add(ing)
+
+        matches.update(ing for ing in self._short_strings if ing in query)
+        return matches
+
+    def top_matches(self, ingredients: List[str], desired_time_minutes: float, limit: int = 10) -> List[Dict[str, Any]]:
+        normalized_input = {ing.lower().strip() for ing in ingredients}
+        with self._lock:
+            matched: Set[str] = set()
+            for query in normalized_input:
+                matched |= self._matching_strings(query)
+
+            candidate_ids: Set[Any] = set()
+            for ing in matched:
+                candidate_ids.update(self._string_recipes.get(ing, ()))
+
+            def scored():
+                for recipe_id, entry in self._recipes.items():
+                    if recipe_id in candidate_ids:
+                        present = sum(1 for ing in entry.ingredients if ing in matched)
+                    else:
+                        present = 0
+                    missing = len(entry.ingredients) - present
+                    time_penalty = max(entry.total_time - desired_time_minutes, 0) * 2
+                    score = (present * 5) - (missing * 3) - time_penalty
+                    yield (score, -self._order[recipe_id], entry)
+
+            best = heapq.nlargest(limit, scored(), key=lambda item: (item[0], item[1]))
+            return [{**entry.row, 'score': score} for score, _, entry in best]
+
+
+recipe_index = RecipeIngredientIndex()
+
+
+def _ensure_index() -> None:
+    if recipe_index.is_stale():
+        resp = supabase.table("recipe").select("*").execute()
+        recipe_index.build(resp.data if resp.data else [])
+
+
 def generate_cooking_instructions(ingredients: List[str], time: Optional[str] = None) -> List[Dict[str, Any]]:
     """Generate cooking instructions by finding the best matching recipes.
-    
+
     Uses a heuristic to score recipes based on:
     - Number of matching ingredients (worth +5 points each)
     - Number of missing ingredients (worth -3 points each)
     - Time constraint penalty (worth -2 points per minute over desired time)
-    
+
     Args:
         ingredients: List of available ingredient names (e.g., ['Potatoes', 'Carrots', 'Onions'])
         time: Optional time constraint in format 'mm:ss' (e.g., '45:00' for 45 minutes)
-        
+
     Returns:
         List of top 10 recipes with their scores, sorted by score (highest first).
         Each item contains the full recipe data plus a 'score' field.
@@ -47,56 +257,13 @@ def generate_cooking_instructions(ingredients: List[str], time: Optional[str] =
     try:
         # Parse desired time in minutes (input format: 'mm:ss')
         desired_time_minutes = _parse_time(time) if time else float('inf')
-        
-        # Fetch all recipes from database
-        resp = supabase.table("recipe").select("*").execute()
-        
-        recipes = resp.data if resp.data else []
-        
-        if not recipes:
-            return []
-        
-        # Normalize input ingredients to lowercase for case-insensitive matching
-        normalized_input = [ing.lower().strip() for ing in ingredients]
-        
-        scored_recipes = []
-        
-        # Evaluate each recipe using the heuristic
-        for recipe in recipes:
-            # Get recipe ingredients and normalize
-            recipe_ingredients = recipe.get('recipe_ingredients', [])
-            if not isinstance(recipe_ingredients, list):
-                continue
-                
-            normalized_recipe_ingredients = [ing.lower().strip() for ing in recipe_ingredients]
-            
-            # Count matching and missing ingredients
-            ingredients_present = sum(
-                1 for ing in normalized_recipe_ingredients 
-                if any(input_ing in ing or ing in input_ing for input_ing in normalized_input)
-            )
-            ingredients_missing = len(normalized_recipe_ingredients) - ingredients_present
-            
-            # Calculate total recipe time (both are already in minutes as integers)
-            prep_time = recipe.get('recipe_prep_time', 0) or 0
-            cook_time = recipe.get('recipe_cook_time', 0) or 0
-            total_recipe_time = prep_time + cook_time
-            
-            # Calculate time penalty (only if recipe exceeds desired time)
-            time_penalty = max(total_recipe_time - desired_time_minutes, 0) * 2
-            
-            # Calculate final score using the heuristic
-            score = (ingredients_present * 5) - (ingredients_missing * 3) - time_penalty
-            
-            # Add recipe with its score to the list
-            recipe_with_score = {**recipe, 'score': score}
-            scored_recipes.append(recipe_with_score)
-        
-        # Sort by score (descending) and return top 10
-        scored_recipes.sort(key=lambda x: x['score'], reverse=True)
-        return scored_recipes[:10]
-        
+
+        # Load the index on first use (and periodically after that)
+        _ensure_index()
+
+        # Score candidate recipes via the index and return top 10
+        return recipe_index.top_matches(ingredients, desired_time_minutes, limit=10)
+
     except Exception as e:
         print(f"Error in generate_cooking_instructions: {e}")
         return []
-
@@ -0,0 +1,100 @@
+"""Production gunicorn profile for the Flask API.
+
+    cd backend && gunicorn app:app
+
+gunicorn loads ./gunicorn.conf.py automatically. The default worker class is
+gevent: each worker serves up to `worker_connections` requests at once on
+greenlets, so a handler waiting on Supabase, Auth or Cloudinary no longer
+holds a whole worker. Set GUNICORN_WORKER_CLASS=sync to get the old
+one-request-per-worker behaviour (benchmarks/bench_workers.py compares the
+two).
+
+Every setting can be overridden with the environment variables below or on
+the gunicorn command line.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+
+if worker_class == "gevent":
+    # Many greenlets share one process now; let each upstream host keep more
+    # pooled keep-alive connections (see http_client.py).
+    os.environ.setdefault("HTTP_POOL_MAXSIZE", "100")
+
+# Each worker writes its metrics snapshot here and /metrics merges them all
+# (see metrics.py). Set by the master before forking so workers inherit it.
+# The marker survives config reloads (HUP), so on_exit only removes a
+# directory that was created here.
+if "METRICS_DIR" not in os.environ:
+    os.environ["METRICS_DIR"] = os.path.join(tempfile.gettempdir(), f"chefkit-metrics-{os.getpid()}")
+    os.environ["CHEFKIT_METRICS_DIR_OWNED"] = "1"
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# I/O-bound greenlet workers need roughly one process per core; sync
+# workers need many more to overlap upstream waits.
+_cpus = multiprocessing.cpu_count()
+workers = int(os.getenv("WEB_CONCURRENCY", str(_cpus if worker_class == "gevent" else 2 * _cpus + 1)))
+
+# Max simultaneous clients per gevent worker.
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+# Keep client connections open between requests. This is longer than the
+# usual 60s idle timeout of load balancers, so the proxy closes first and
+# never reuses a socket we have already dropped. Sync workers ignore it.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "75"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Recycle workers now and then to bound slow memory growth.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+# -----------------------------
+# Server hooks
+# -----------------------------
+def post_fork(server, worker):
+    # Patch sockets, ssl and threading in each gevent worker before it
+    # imports the app, so supabase_client (httpx), requests/urllib3,
+    # firebase-admin and the outbox/scheduler threads all yield to the
+    # gevent hub. Not in the arbiter: it has imported ssl by now, and
+    # patching there only affects gunicorn itself. Do not turn on
+    # preload_app with gevent, which imports the app unpatched.
+    if server.cfg.worker_class_str == "gevent":
+        from gevent import monkey
+
+        monkey.patch_all()
+
+
+# Metrics aggregation across workers
+def on_starting(server):
+    import metrics
+
+    metrics.clear_dir()
+
+
+def worker_exit(server, worker):
+    # Last snapshot of a worker that is shutting down or being recycled
+    import metrics
+
+    metrics.flush()
+
+
+def child_exit(server, worker):
+    import metrics
+
+    metrics.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if os.environ.get("CHEFKIT_METRICS_DIR_OWNED") == "1":
+        shutil.rmtree(os.environ["METRICS_DIR"], ignore_errors=True)
@@ -0,0 +1,143 @@
+"""Shared outbound HTTP client.
+
+Every call from the backend to Supabase Auth, Cloudinary and other HTTP
+upstreams goes through here instead of module-level `requests.*` calls.
+Each upstream host gets its own `requests.Session` so TCP/TLS connections are
+kept alive and reused, with bounded pools, default timeouts and
+retry-with-backoff for idempotent methods.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+_POOL_BLOCK = os.getenv("HTTP_POOL_BLOCK", "false").lower() in ("1", "true", "yes")
+_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+_RETRY_TOTAL = int(os.getenv("HTTP_RETRY_TOTAL", "3"))
+_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+
+# Only methods that are safe to replay get read/status retries. Connection
+# failures are retried for every method because the request was never sent.
+_RETRY_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+_RETRY_STATUSES = (502, 503, 504)
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (_CONNECT_TIMEOUT, _READ_TIMEOUT)
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=_RETRY_TOTAL,
+        backoff_factor=_RETRY_BACKOFF,
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=_RETRY_METHODS,
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=_POOL_MAXSIZE,
+        pool_block=_POOL_BLOCK,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the pooled session for the host of `url`."""
+    key = _host_key(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _build_session()
+                _sessions[key] = session
+    return session
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """Send a request through the pooled session for the target host."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    started = time.perf_counter()
+    status = "error"
+    try:
+        response = get_session(url).request(method, url, **kwargs)
+        status = response.status_code
+        return response
+    finally:
+        metrics.observe_upstream(
+            metrics.upstream_for_url(url), status, time.perf_counter() - started, metrics.upstream_call(method, url)
+        )
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs: Any) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs: Any) -> requests.Response:
+    return request("PUT", url, **kwargs)
+
+
+def delete(url: str, **kwargs: Any) -> requests.Response:
+    return request("DELETE", url, **kwargs)
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """Connection reuse counters per upstream host.
+
+    `misses` is the number of new connections opened, `hits` the number of
+    requests that were served on an already-open keep-alive connection.
+    """
+    stats: Dict[str, Dict[str, int]] = {}
+    with _sessions_lock:
+        sessions = list(_sessions.items())
+    for host, session in sessions:
+        requests_sent = 0
+        connections = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for pool_key in list(pools.keys()):
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                requests_sent += pool.num_requests
+                connections += pool.num_connections
+        stats[host] = {
+            "requests": requests_sent,
+            "hits": max(requests_sent - connections, 0),
+            "misses": connections,
+        }
+    return stats
+
+
+def _pool_metrics():
+    for host, counts in pool_stats().items():
+        yield "chefkit_http_pool_requests_total", {"host": host}, counts["requests"]
+        yield "chefkit_http_pool_connections_total", {"host": host}, counts["misses"]
+
+
+metrics.register_collector(_pool_metrics)
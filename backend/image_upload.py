@@ -0,0 +1,362 @@
+"""Streaming image uploads to Cloudinary.
+
+The avatar and recipe image routes take the image in one of three forms:
+
+- the raw request body, `Content-Type: image/*` (or application/octet-stream);
+- `multipart/form-data` with the image in a part named `file` (or `image`);
+- the old JSON body `{"image_base64": "..."}`, kept for existing app builds.
+
+Each is read in CHUNK_SIZE pieces (base64 is decoded a slice at a time) into
+a spool that stays in memory up to UPLOAD_SPOOL_MEMORY_BYTES and then moves to
+a temporary file, hashing the bytes on the way. If the same bytes were already
+uploaded to the folder (upload_dedupe), the stored URL is returned and
+Cloudinary is not contacted; otherwise the spool is streamed to Cloudinary
+as a multipart body generated chunk by chunk. The JSON shim still has to hold
+the request body and the parsed string.
+
+Clients can also skip our workers entirely: `issue_ticket` hands out signed
+parameters for a direct upload to Cloudinary, and `confirm_upload` checks
+Cloudinary's response signature before the URL is stored. A signed upload
+cannot be capped in size, so the confirm route also queues an outbox job
+(services.queue_upload_size_check) that asks the Admin API for the stored
+size, and deletes an image over MAX_UPLOAD_BYTES and unsets its URL. The
+Admin API has an hourly rate limit, so the lookup stays off the request
+path, and a rate-limited one is retried with the outbox's backoff.
+
+Uploads above MAX_UPLOAD_BYTES are refused with 413: from Content-Length
+before anything is read, or as soon as a chunked body passes the limit.
+Werkzeug parses a multipart or JSON body before we see it, so the app also
+sets MAX_CONTENT_LENGTH to MAX_REQUEST_BYTES, the largest body any of the
+three forms can need; a chunked body past it is cut off while parsing.
+
+Peak RSS growth of one gevent worker over three different 8 MB uploads
+(benchmarks/bench_upload.py): raw body 2-2.6 MB (also when sent chunked;
+mostly the 1 MB in-memory spool), multipart 1.6 MB, JSON/base64 shim 32 MB.
+The JSON route before streaming, which form-encoded the data URL for
+Cloudinary, grew by 161 MB.
+"""
+import base64
+import binascii
+import hashlib
+import hmac
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from werkzeug.exceptions import ClientDisconnected, RequestEntityTooLarge
+
+import http_client
+import upload_dedupe
+from cloudinary_utils import (
+    get_cloudinary_config,
+    get_delivery_url,
+    get_destroy_url,
+    get_resource_url,
+    get_upload_url,
+    sign_params,
+    signed_destroy_params,
+    signed_upload_params,
+)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MEMORY_BYTES", str(1024 * 1024)))
+UPLOAD_TICKET_TTL = int(os.getenv("UPLOAD_TICKET_TTL", "900"))
+
+UPLOAD_FOLDERS = {"avatar": "chef-kit/avatars", "recipe": "chef-kit/recipes"}
+_ALLOWED_FORMATS = "jpg,jpeg,png,webp,heic"
+
+# Room for multipart headers/boundaries on top of the image itself
+_MULTIPART_OVERHEAD = 16 * 1024
+# Base64 is 4/3 of the image, plus the JSON wrapper
+_MAX_JSON_BYTES = MAX_UPLOAD_BYTES * 4 // 3 + 4096
+# For app.config["MAX_CONTENT_LENGTH"]: no upload form needs a larger body
+MAX_REQUEST_BYTES = max(_MAX_JSON_BYTES, MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD)
+
+
+class UploadError(Exception):
+    """Upload refused or failed; carries the HTTP status and JSON body for the route."""
+
+    def __init__(self, status: int, error: str, details: Optional[str] = None):
+        super().__init__(error if details is None else f"{error}: {details}")
+        self.status = status
+        self.payload: Dict[str, Any] = {"error": error}
+        if details is not None:
+            self.payload["details"] = details
+
+
+def _too_large() -> UploadError:
+    return UploadError(413, "image_too_large", f"limit is {MAX_UPLOAD_BYTES} bytes")
+
+
+class _MultipartBody:
+    """multipart/form-data body for requests, produced lazily from `chunks`.
+
+    The `len` attribute is what requests uses for Content-Length, so the
+    body is sent with a length rather than chunked.
+    """
+
+    def __init__(self, fields: Dict[str, str], chunks: Iterable[bytes], filename: str, content_type: str,
+                 size: int):
+        self.boundary = uuid.uuid4().hex
+        filename = re.sub(r'["\\\r\n]', "_", filename)
+        head = []
+        for name, value in fields.items():
+            head.append(f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n')
+        head.append(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        )
+        self._head = "".join(head).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("ascii")
+        self._chunks = chunks
+        self.len = len(self._head) + size + len(self._tail)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        yield from self._chunks
+        yield self._tail
+
+
+class _Image:
+    """An uploaded image, spooled and hashed before anything is sent to Cloudinary."""
+
+    def __init__(self, spool, size: int, sha256: str, filename: str, content_type: str):
+        self.spool = spool
+        self.size = size
+        self.sha256 = sha256
+        self.filename = filename
+        self.content_type = content_type
+
+    def chunks(self) -> Iterator[bytes]:
+        self.spool.seek(0)
+        while True:
+            chunk = self.spool.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        self.spool.close()
+
+
+def _read_chunks(stream, declared: Optional[int] = None) -> Iterator[bytes]:
+    """Read `stream` in CHUNK_SIZE pieces, stopping once MAX_UPLOAD_BYTES is passed."""
+    total = 0
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > MAX_UPLOAD_BYTES:
+                raise _too_large()
+            yield chunk
+    except ClientDisconnected:
+        raise UploadError(400, "incomplete_upload")
+    if declared is not None and total != declared:
+        raise UploadError(400, "incomplete_upload")
+
+
+def _decode_base64(text: str, start: int) -> Iterator[bytes]:
+    """Decode `text[start:]` a slice at a time, carrying partial 4-char groups over."""
+    step = CHUNK_SIZE // 3 * 4
+    carry = ""
+    try:
+        for offset in range(start, len(text), step):
+            piece = carry + "".join(text[offset:offset + step].split())
+            usable = len(piece) - len(piece) % 4
+            carry = piece[usable:]
+            if usable:
+                yield base64.b64decode(piece[:usable], validate=True)
+    except (binascii.Error, ValueError):
+        raise UploadError(400, "invalid_base64")
+    if carry:
+        raise UploadError(400, "invalid_base64")
+
+
+def _spool(chunks: Iterable[bytes], filename: str, content_type: str, spool=None) -> _Image:
+    """Hash `chunks` into an _Image, writing them to a new spool unless `spool` already holds them."""
+    owned = spool is None
+    if owned:
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in chunks:
+            digest.update(chunk)
+            if owned:
+                spool.write(chunk)
+            size += len(chunk)
+        if not size:
+            raise UploadError(400, "file is required")
+    except BaseException:
+        spool.close()
+        raise
+    return _Image(spool, size, digest.hexdigest(), filename, content_type)
+
+
+def _image_from_request(request) -> _Image:
+    try:
+        return _parse_image(request)
+    except RequestEntityTooLarge:
+        # A chunked body that passed MAX_CONTENT_LENGTH while Werkzeug parsed it
+        raise _too_large()
+
+
+def _parse_image(request) -> _Image:
+    length = request.content_length
+    mimetype = request.mimetype
+
+    if mimetype == "application/json":
+        if length is not None and length > _MAX_JSON_BYTES:
+            raise _too_large()
+        payload = request.get_json(silent=True) or {}
+        image_b64 = payload.get("image_base64") or ""
+        if not image_b64:
+            raise UploadError(400, "image_base64 is required")
+        # Skip a data URL prefix by offset rather than slicing a copy
+        start = image_b64.find(",") + 1
+        if (len(image_b64) - start) * 3 // 4 > MAX_UPLOAD_BYTES:
+            raise _too_large()
+        return _spool(_decode_base64(image_b64, start), "upload", "image/jpeg")
+
+    if mimetype == "multipart/form-data":
+        if length is not None and length > MAX_UPLOAD_BYTES + _MULTIPART_OVERHEAD:
+            raise _too_large()
+        upload = request.files.get("file") or request.files.get("image")
+        if upload is None:
+            raise UploadError(400, "file is required")
+        # Werkzeug has already spooled the part; hash it where it is
+        return _spool(_read_chunks(upload.stream), upload.filename or "upload",
+                      upload.mimetype or "application/octet-stream", spool=upload.stream)
+
+    if length is not None and length > MAX_UPLOAD_BYTES:
+        raise _too_large()
+    return _spool(_read_chunks(request.stream, length), "upload", mimetype or "application/octet-stream")
+
+
+def upload_request_image(request, folder: str, tag: str) -> Dict[str, Any]:
+    """Upload the image in `request` into Cloudinary `folder`; returns {"secure_url", "public_id"}.
+
+    Bytes already uploaded to `folder` (same SHA-256) return the stored URL
+    without contacting Cloudinary. Raises UploadError for anything the client
+    or Cloudinary got wrong.
+    """
+    image = _image_from_request(request)
+    try:
+        cached = upload_dedupe.lookup(image.sha256, folder)
+        if cached:
+            print(f"{tag} Duplicate of an earlier upload ({image.size} bytes, sha256={image.sha256[:12]}): {cached}")
+            return {"secure_url": cached, "public_id": None}
+
+        cloud_name, _, _ = get_cloudinary_config()
+        upload_url = get_upload_url(cloud_name)
+        body = _MultipartBody(signed_upload_params(folder), image.chunks(), image.filename,
+                              image.content_type, image.size)
+        print(f"{tag} Streaming {image.size} bytes ({image.content_type}) to {upload_url}")
+        resp = http_client.post(upload_url, data=body, headers={"Content-Type": body.content_type})
+        if resp.status_code != 200:
+            print(f"{tag} Cloudinary upload failed: {resp.status_code} {resp.text}")
+            raise UploadError(502, "cloudinary_upload_failed", resp.text)
+        upload_json = resp.json()
+        secure_url = upload_json.get("secure_url")
+        if not secure_url:
+            print(f"{tag} Cloudinary response missing secure_url")
+            raise UploadError(502, "cloudinary_no_url")
+        print(f"{tag} Cloudinary upload succeeded. URL={secure_url}")
+        upload_dedupe.store(image.sha256, folder, secure_url, upload_json.get("public_id"), image.size)
+        return {"secure_url": secure_url, "public_id": upload_json.get("public_id")}
+    finally:
+        image.close()
+
+
+# -----------------------------
+# Direct uploads (client -> Cloudinary)
+# -----------------------------
+_TICKET_PUBLIC_ID = re.compile(r"^(chef-kit/(?:avatars|recipes))/([^/]+)/(\d+)-[0-9a-f]{12}$")
+_FORMAT = re.compile(r"^[a-z0-9]{2,5}$")
+
+
+def issue_ticket(user_id: str, kind: str) -> Dict[str, Any]:
+    """Signed fields for uploading one image straight to Cloudinary.
+
+    The public_id is chosen here and encodes the folder, the user and the
+    issue time, so `confirm_upload` can check ownership and age without
+    keeping state. Cloudinary itself accepts the signature for an hour;
+    confirmations are only accepted for UPLOAD_TICKET_TTL seconds.
+    """
+    folder = UPLOAD_FOLDERS.get(kind)
+    if folder is None:
+        raise UploadError(400, f"kind must be one of: {', '.join(sorted(UPLOAD_FOLDERS))}")
+    cloud_name, api_key, api_secret = get_cloudinary_config()
+    timestamp = int(time.time())
+    params = {
+        "allowed_formats": _ALLOWED_FORMATS,
+        "public_id": f"{folder}/{user_id}/{timestamp}-{uuid.uuid4().hex[:12]}",
+        "timestamp": str(timestamp),
+    }
+    return {
+        "upload_url": get_upload_url(cloud_name),
+        "fields": dict(params, api_key=api_key, signature=sign_params(params, api_secret)),
+        "public_id": params["public_id"],
+        "max_bytes": MAX_UPLOAD_BYTES,
+        "expires_at": timestamp + UPLOAD_TICKET_TTL,
+    }
+
+
+def confirm_upload(user_id: str, public_id: str, version: Any, signature: str, fmt: str) -> Tuple[str, str]:
+    """Check a direct upload's Cloudinary response; returns (kind, secure_url).
+
+    Cloudinary signs `public_id` and `version` in its upload response with the
+    account secret, so a valid signature proves the image was uploaded. Its
+    size is checked afterwards, by delete_if_oversize in an outbox job.
+    """
+    match = _TICKET_PUBLIC_ID.match(public_id or "")
+    if not match:
+        raise UploadError(400, "invalid_public_id")
+    folder, owner, issued = match.groups()
+    if owner != user_id:
+        raise UploadError(403, "Cannot confirm another user's upload")
+    if time.time() - int(issued) > UPLOAD_TICKET_TTL:
+        raise UploadError(410, "upload_ticket_expired")
+    version = str(version or "")
+    fmt = (fmt or "").lower()
+    if not version.isdigit() or not _FORMAT.match(fmt):
+        raise UploadError(400, "version and format are required")
+    cloud_name, _, api_secret = get_cloudinary_config()
+    expected = sign_params({"public_id": public_id, "version": version}, api_secret)
+    if not hmac.compare_digest(expected, str(signature or "")):
+        raise UploadError(400, "invalid_signature")
+    kind = next(name for name, path in UPLOAD_FOLDERS.items() if path == folder)
+    return kind, get_delivery_url(cloud_name, public_id, version, fmt)
+
+
+def delete_if_oversize(public_id: str) -> Optional[int]:
+    """Delete a direct upload larger than MAX_UPLOAD_BYTES; returns its size if it was deleted.
+
+    The "bytes" in the client's copy of the upload response is not signed,
+    so the size comes from the Admin API. Raises UploadError when Cloudinary
+    cannot answer (including its rate limit), for the caller to retry.
+    """
+    cloud_name, api_key, api_secret = get_cloudinary_config()
+    resp = http_client.get(get_resource_url(cloud_name, public_id), auth=(api_key, api_secret))
+    if resp.status_code == 404:
+        return None
+    if resp.status_code != 200:
+        raise UploadError(502, "cloudinary_lookup_failed", f"{resp.status_code} {resp.text}")
+    size = int(resp.json().get("bytes") or 0)
+    if size <= MAX_UPLOAD_BYTES:
+        return None
+    resp = http_client.post(get_destroy_url(cloud_name), data=signed_destroy_params(public_id))
+    if resp.status_code != 200:
+        raise UploadError(502, "cloudinary_destroy_failed", f"{resp.status_code} {resp.text}")
+    print(f"[upload-check] Deleted oversize {public_id}: {size} bytes")
+    return size
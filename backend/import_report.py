@@ -0,0 +1,102 @@
+"""Cold-start report: per-module import cost and time to first byte.
+
+    python import_report.py                # import cost of `app`, top 25 modules
+    python import_report.py --top 40 --module asgi
+    python import_report.py --ttfb         # also boot the server and time GET /health
+
+Each measurement runs in a fresh interpreter (`python -X importtime`), so the
+numbers match a cold boot rather than the already-warm current process.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _import_times(module: str) -> List[Tuple[str, int, int, int]]:
+    """(name, self_us, cumulative_us, depth) for every module imported by `module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:   self_us |   cumulative_us | <indent>package.module"
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = head.split(":", 1)[1]
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def _ttfb(module: str, path: str) -> float:
+    """Seconds from spawning the dev server to the first response on `path`."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", f"from {module} import app; app.run(host='127.0.0.1', port={port})"],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + 60
+        while time.perf_counter() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=5) as resp:
+                    resp.read(1)
+                return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not answer within 60s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="app", help="module to import (default: app)")
+    parser.add_argument("--top", type=int, default=25, help="how many modules to list")
+    parser.add_argument("--ttfb", action="store_true", help="also measure boot-to-first-byte of the dev server")
+    parser.add_argument("--path", default="/health", help="route requested for --ttfb")
+    args = parser.parse_args()
+
+    rows = _import_times(args.module)
+    total = next((cum for name, _, cum, depth in rows if name == args.module and depth == 0), 0)
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {total / 1000:.1f} ms total, {len(rows)} modules\n")
+    print(f"{'cumulative ms':>13}  {'self ms':>8}  module")
+    for name, self_us, cum, depth in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cum / 1000:>13.1f}  {self_us / 1000:>8.1f}  {'  ' * depth}{name}")
+
+    print(f"\n{'self ms':>8}  top-level package")
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:>8.1f}  {package}")
+
+    if args.ttfb:
+        print(f"\nboot to first byte (GET {args.path}): {_ttfb(args.module, args.path) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""Expiring key-value store for short-lived auth state.
+
+Holds the /auth/resend throttle and the pending email/password changes
+between their request and verify calls. Every key has a TTL; an expired key
+reads as missing and is removed by a background sweeper thread (start()).
+
+Backends (KV_STORE_BACKEND):
+  sqlite  default. A local SQLite file (KV_STORE_PATH) shared by every
+          worker process on the host, so a verify call may land on any
+          gunicorn worker. Expired rows are deleted in batches through an
+          index on expires_at. Waits for another worker's write lock are
+          cooperative (sqlite_busy), so they do not stall gevent workers.
+  memory  per-process dicts, for a single worker or tests. Keys are
+          bucketed by the second they expire in, so the sweeper drops each
+          expired key in O(1) without scanning live ones.
+
+Other backends (e.g. Redis for several hosts) plug in with
+register_backend(name, factory); a factory returns an object with the
+get/set/add/pop/incr/ttl/sweep/size methods of the two above. add, pop and
+incr must be atomic across workers. Values must be
+JSON-serialisable and are copied in and out, so mutating a value returned
+by get() does not change the stored one until it is put() again.
+"""
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+import sqlite_busy
+
+_BACKEND = os.getenv("KV_STORE_BACKEND", "sqlite")
+_DB_PATH = os.getenv(
+    "KV_STORE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "kv_store.db"),
+)
+_SWEEP_SECONDS = float(os.getenv("KV_STORE_SWEEP_SECONDS", "30"))
+_SWEEP_BATCH = 1000
+_BUSY_TIMEOUT_SECONDS = 5.0
+
+_counters = {"hits": 0, "misses": 0, "writes": 0, "expired": 0}
+_counters_lock = threading.Lock()
+
+
+def _bump(name: str, amount: int = 1) -> None:
+    with _counters_lock:
+        _counters[name] += amount
+
+
+# -----------------------------
+# Backends
+# -----------------------------
+class MemoryBackend:
+    """Per-process store; expiry is tracked in one-second buckets."""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[float, str, int]] = {}
+        self._buckets: Dict[int, Set[str]] = {}
+        self._swept_until = int(time.time())
+        self._lock = threading.Lock()
+
+    def _unlink(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            bucket = self._buckets.get(entry[2])
+            if bucket is not None:
+                bucket.discard(key)
+
+    def _live(self, key: str, now: float) -> Optional[Tuple[float, str, int]]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= now:
+            self._unlink(key)
+            return None
+        return entry
+
+    def _put(self, key: str, raw: str, expires_at: float) -> None:
+        self._unlink(key)
+        # A bucket the sweeper has already passed would never be visited again
+        second = max(math.ceil(expires_at), self._swept_until)
+        self._entries[key] = (expires_at, raw, second)
+        self._buckets.setdefault(second, set()).add(key)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._live(key, time.time())
+        return entry[1] if entry is not None else None
+
+    def set(self, key: str, raw: str, ttl: float) -> None:
+        with self._lock:
+            self._put(key, raw, time.time() + ttl)
+
+    def add(self, key: str, raw: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._put(key, raw, now + ttl)
+            return True
+
+    def pop(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._live(key, time.time())
+            self._unlink(key)
+        return entry[1] if entry is not None else None
+
+    def incr(self, key: str, amount: int, ttl: float) -> int:
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is None:
+                self._put(key, str(amount), now + ttl)
+                return amount
+            value = int(entry[1]) + amount
+            self._entries[key] = (entry[0], str(value), entry[2])
+            return value
+
+    def ttl(self, key: str) -> Optional[float]:
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+        return entry[0] - now if entry is not None else None
+
+    def sweep(self) -> int:
+        now = int(time.time())
+        removed = 0
+        with self._lock:
+            for second in range(self._swept_until, now + 1):
+                for key in self._buckets.pop(second, ()):
+                    self._entries.pop(key, None)
+                    removed += 1
+            self._swept_until = now + 1
+        return removed
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteBackend:
+    """Store in a SQLite file shared by the worker processes on this host."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS kv_entries (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_kv_entries_expiry ON kv_entries (expires_at);
+    """
+
+    def __init__(self, path: str = _DB_PATH):
+        self._path = path
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite_busy.connect(self._path)
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    sqlite_busy.retry(lambda: conn.executescript(self._SCHEMA), _BUSY_TIMEOUT_SECONDS)
+                    self._schema_ready = True
+        return conn
+
+    def _write(self, sql: str, params: tuple) -> sqlite3.Cursor:
+        conn = self._connect()
+        return sqlite_busy.retry(lambda: conn.execute(sql, params), _BUSY_TIMEOUT_SECONDS)
+
+    def _transaction(self, body: Callable[[sqlite3.Connection], Any]) -> Any:
+        return sqlite_busy.transaction(self._connect(), body, _BUSY_TIMEOUT_SECONDS)
+
+    def get(self, key: str) -> Optional[str]:
+        row = self._connect().execute(
+            "SELECT value FROM kv_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set(self, key: str, raw: str, ttl: float) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO kv_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, raw, time.time() + ttl),
+        )
+
+    def add(self, key: str, raw: str, ttl: float) -> bool:
+        now = time.time()
+        # One statement, so two workers racing for the same key cannot both win
+        cur = self._write(
+            "INSERT INTO kv_entries (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE kv_entries.expires_at <= ?",
+            (key, raw, now + ttl, now),
+        )
+        return cur.rowcount > 0
+
+    def pop(self, key: str) -> Optional[str]:
+        # SELECT then DELETE under one write lock (DELETE ... RETURNING needs
+        # SQLite 3.35), so two workers cannot both take the value
+        def take(conn: sqlite3.Connection) -> Optional[str]:
+            row = conn.execute("SELECT value, expires_at FROM kv_entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM kv_entries WHERE key = ?", (key,))
+            return row[0] if row[1] > time.time() else None
+
+        return self._transaction(take)
+
+    def incr(self, key: str, amount: int, ttl: float) -> int:
+        def bump(conn: sqlite3.Connection) -> int:
+            now = time.time()
+            row = conn.execute(
+                "SELECT value FROM kv_entries WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kv_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, str(amount), now + ttl),
+                )
+                return amount
+            value = int(row[0]) + amount
+            conn.execute("UPDATE kv_entries SET value = ? WHERE key = ?", (str(value), key))
+            return value
+
+        return self._transaction(bump)
+
+    def ttl(self, key: str) -> Optional[float]:
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT expires_at FROM kv_entries WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] - now if row is not None else None
+
+    def sweep(self) -> int:
+        removed = 0
+        while True:
+            cur = self._write(
+                "DELETE FROM kv_entries WHERE rowid IN ("
+                "  SELECT rowid FROM kv_entries WHERE expires_at <= ? LIMIT ?)",
+                (time.time(), _SWEEP_BATCH),
+            )
+            removed += cur.rowcount
+            if cur.rowcount < _SWEEP_BATCH:
+                return removed
+
+    def size(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM kv_entries WHERE expires_at > ?", (time.time(),)
+        ).fetchone()[0]
+
+
+_backends: Dict[str, Callable[[], Any]] = {
+    "sqlite": SQLiteBackend,
+    "memory": MemoryBackend,
+}
+_store = None
+_store_lock = threading.Lock()
+
+
+def register_backend(name: str, factory: Callable[[], Any]) -> None:
+    """Make a backend selectable with KV_STORE_BACKEND=<name>."""
+    _backends[name] = factory
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if _BACKEND not in _backends:
+                    raise ValueError(f"Unknown KV_STORE_BACKEND {_BACKEND!r}; expected one of {sorted(_backends)}")
+                _store = _backends[_BACKEND]()
+    return _store
+
+
+# -----------------------------
+# Public API
+# -----------------------------
+def get(key: str, default: Any = None) -> Any:
+    raw = _get_store().get(key)
+    _bump("hits" if raw is not None else "misses")
+    return json.loads(raw) if raw is not None else default
+
+
+def put(key: str, value: Any, ttl: float) -> None:
+    """Store `value` under `key` for `ttl` seconds, replacing any current value."""
+    _get_store().set(key, json.dumps(value), ttl)
+    _bump("writes")
+
+
+def add(key: str, value: Any, ttl: float) -> bool:
+    """Store `value` only if `key` is missing or expired; False if it is already set."""
+    added = _get_store().add(key, json.dumps(value), ttl)
+    if added:
+        _bump("writes")
+    return added
+
+
+def pop(key: str, default: Any = None) -> Any:
+    """Remove `key` and return its value (default if it was missing or expired)."""
+    raw = _get_store().pop(key)
+    return json.loads(raw) if raw is not None else default
+
+
+def incr(key: str, ttl: float, amount: int = 1) -> int:
+    """Add `amount` to the integer at `key` and return the result, atomically.
+
+    A missing or expired key starts from 0 and lives `ttl` seconds; an
+    existing key keeps its expiry.
+    """
+    value = _get_store().incr(key, amount, ttl)
+    _bump("writes")
+    return value
+
+
+def ttl(key: str) -> Optional[float]:
+    """Seconds until `key` expires, or None if it is not set."""
+    return _get_store().ttl(key)
+
+
+def sweep() -> int:
+    """Delete expired keys now; returns how many were removed."""
+    removed = _get_store().sweep()
+    if removed:
+        _bump("expired", removed)
+    return removed
+
+
+# -----------------------------
+# Sweeper
+# -----------------------------
+_sweeper: Optional[threading.Thread] = None
+_sweeper_lock = threading.Lock()
+
+
+def _sweep_loop() -> None:
+    while True:
+        time.sleep(_SWEEP_SECONDS)
+        try:
+            sweep()
+        except Exception as e:
+            print(f"[kv-store] sweep failed: {e}")
+
+
+def start() -> None:
+    """Start the sweeper thread for this process (idempotent)."""
+    global _sweeper
+    if _sweeper is not None:
+        return
+    with _sweeper_lock:
+        if _sweeper is not None:
+            return
+        _sweeper = threading.Thread(target=_sweep_loop, name="kv-store-sweeper", daemon=True)
+        _sweeper.start()
+
+
+def stats() -> Dict[str, Any]:
+    """Backend name, live key count and this process's counters."""
+    with _counters_lock:
+        snapshot: Dict[str, Any] = dict(_counters)
+    snapshot["backend"] = _BACKEND
+    try:
+        snapshot["keys"] = _get_store().size()
+    except sqlite3.Error as e:
+        snapshot["keys"] = -1
+        snapshot["error"] = str(e)
+    return snapshot
@@ -0,0 +1,459 @@
+"""Prometheus metrics for the API, served at /metrics.
+
+Recorded per process:
+
+- chefkit_http_requests_total{method,route,status}
+- chefkit_http_request_duration_seconds{method,route} (histogram)
+- chefkit_http_requests_in_flight{method,route}
+- chefkit_upstream_requests_total{upstream,status} for PostgREST, Auth,
+  Cloudinary and FCM (plus anything else as "other")
+- chefkit_upstream_request_duration_seconds{upstream} (histogram)
+- counters from registered collectors (cache hit/miss, HTTP pool reuse)
+
+`route` is the Flask URL rule (`/api/recipes/<recipe_id>`), never the raw
+path, so label cardinality stays bounded. Recording is a dict update under
+one lock.
+
+Several worker processes: when METRICS_DIR is set (gunicorn.conf.py sets it
+for you), every process writes a snapshot of its own metrics to
+METRICS_DIR/<pid>.json every METRICS_FLUSH_SECONDS, and /metrics merges all
+snapshots, so whichever worker answers the scrape reports totals for the
+whole server. Counters and histograms of exited workers are kept (folded
+into archive.json by `mark_process_dead`); their in-flight gauges are
+dropped. Other workers' numbers can lag by up to one flush interval.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server only
+    fcntl = None
+
+METRICS_DIR = os.getenv("METRICS_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR")
+_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+# Seconds. Upstream calls are usually 20-300 ms, cold paths run to seconds.
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTER, GAUGE, HISTOGRAM = "counter", "gauge", "histogram"
+
+_METRICS: Dict[str, Tuple[str, str]] = {
+    "chefkit_http_requests_total": (COUNTER, "HTTP requests served, by route and status."),
+    "chefkit_http_request_duration_seconds": (HISTOGRAM, "Time to produce the response, by route."),
+    "chefkit_http_requests_in_flight": (GAUGE, "Requests currently being handled, by route."),
+    "chefkit_upstream_requests_total": (COUNTER, "Calls to upstream services, by upstream and status."),
+    "chefkit_upstream_request_duration_seconds": (HISTOGRAM, "Upstream call latency, by upstream."),
+    "chefkit_cache_requests_total": (COUNTER, "In-process cache lookups, by cache and result."),
+    "chefkit_http_pool_requests_total": (COUNTER, "Requests sent through the outbound HTTP pool, by host."),
+    "chefkit_http_pool_connections_total": (COUNTER, "Connections opened by the outbound HTTP pool, by host."),
+    "chefkit_rate_limited_total": (COUNTER, "Requests turned away with 429, by route group and rate/bulkhead."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+_lock = threading.Lock()
+_counters: Dict[Key, float] = {}
+_gauges: Dict[Key, float] = {}
+# Per-bucket (non-cumulative) counts, the +Inf bucket, then the sum.
+_histograms: Dict[Key, List[float]] = {}
+_collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]] = []
+_upstream_listeners: List[Callable[[str, str, Any, float], None]] = []
+
+_flusher_pid: Optional[int] = None
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+def _observe_locked(key: Key, value: float) -> None:
+    buckets = _histograms.get(key)
+    if buckets is None:
+        buckets = _histograms[key] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+    buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+    buckets[-1] += value
+
+
+def inc(name: str, labels: Labels, amount: float = 1.0) -> None:
+    _ensure_flusher()
+    key = (name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + amount
+
+
+def observe(name: str, labels: Labels, value: float) -> None:
+    _ensure_flusher()
+    with _lock:
+        _observe_locked((name, labels), value)
+
+
+def gauge_add(name: str, labels: Labels, delta: float) -> None:
+    _ensure_flusher()
+    key = (name, labels)
+    with _lock:
+        _gauges[key] = _gauges.get(key, 0.0) + delta
+
+
+def register_collector(collector: Callable[[], Iterable[Tuple[str, Dict[str, Any], float]]]) -> None:
+    """Add a callable returning (counter_name, labels, value) rows, read at snapshot time."""
+    _collectors.append(collector)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    _ensure_flusher()
+    route_labels = (("method", method), ("route", route))
+    count_key = ("chefkit_http_requests_total", route_labels + (("status", str(status)),))
+    with _lock:
+        _counters[count_key] = _counters.get(count_key, 0.0) + 1
+        _observe_locked(("chefkit_http_request_duration_seconds", route_labels), seconds)
+
+
+def add_upstream_listener(listener: Callable[[str, str, Any, float], None]) -> None:
+    """Also pass every upstream call to `listener(upstream, call, status, seconds)`."""
+    _upstream_listeners.append(listener)
+
+
+def observe_upstream(upstream: str, status: Any, seconds: float, call: Optional[str] = None) -> None:
+    """Record one call to an upstream service.
+
+    `status` is the HTTP code or "ok"/"error"; `call` names the operation
+    for listeners (e.g. "GET /rest/v1/follows").
+    """
+    _ensure_flusher()
+    count_key = ("chefkit_upstream_requests_total", (("upstream", upstream), ("status", str(status))))
+    with _lock:
+        _counters[count_key] = _counters.get(count_key, 0.0) + 1
+        _observe_locked(("chefkit_upstream_request_duration_seconds", (("upstream", upstream),)), seconds)
+    for listener in _upstream_listeners:
+        listener(upstream, call or upstream, status, seconds)
+
+
+@contextmanager
+def upstream_timer(upstream: str, call: Optional[str] = None) -> Iterator[None]:
+    """Time a non-HTTP upstream call (e.g. an SDK call): status is ok/error."""
+    started = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        observe_upstream(upstream, status, time.perf_counter() - started, call)
+
+
+def upstream_call(method: str, url: str) -> str:
+    """Operation name of an HTTP call: method and path, without the query."""
+    return f"{method} {urlsplit(str(url)).path}"
+
+
+def upstream_for_url(url: str) -> str:
+    """Map an outbound URL to its upstream label."""
+    parts = urlsplit(str(url))
+    host = parts.hostname or ""
+    if parts.path.startswith("/rest/"):
+        return "postgrest"
+    if parts.path.startswith("/auth/"):
+        return "auth"
+    if "cloudinary" in host:
+        return "cloudinary"
+    if host == "fcm.googleapis.com":
+        return "fcm"
+    return "other"
+
+
+# -----------------------------
+# httpx instrumentation (supabase-py and the async pool)
+# -----------------------------
+def _on_request(request) -> None:
+    request.extensions["metrics_started"] = time.perf_counter()
+
+
+def _on_response(response) -> None:
+    request = response.request
+    started = request.extensions.get("metrics_started")
+    if started is not None:
+        observe_upstream(
+            upstream_for_url(request.url),
+            response.status_code,
+            time.perf_counter() - started,
+            upstream_call(request.method, request.url),
+        )
+
+
+async def _on_request_async(request) -> None:
+    _on_request(request)
+
+
+async def _on_response_async(response) -> None:
+    _on_response(response)
+
+
+def httpx_event_hooks(is_async: bool = False) -> Dict[str, List[Callable]]:
+    if is_async:
+        return {"request": [_on_request_async], "response": [_on_response_async]}
+    return {"request": [_on_request], "response": [_on_response]}
+
+
+def instrument_httpx(client) -> None:
+    """Add the timing hooks to an existing httpx client (idempotent)."""
+    hooks = client.event_hooks
+    if _on_request in hooks["request"] or _on_request_async in hooks["request"]:
+        return
+    import httpx
+
+    for event, fns in httpx_event_hooks(isinstance(client, httpx.AsyncClient)).items():
+        hooks[event] = hooks[event] + fns
+    client.event_hooks = hooks
+
+
+# -----------------------------
+# Flask integration
+# -----------------------------
+def init_app(app, exclude: Iterable[str] = ("/metrics",)) -> None:
+    """Record count, latency and in-flight requests for every route of `app`.
+
+    Routes in `exclude` (the scrape endpoint itself) are not recorded.
+    """
+    from flask import g, request
+
+    excluded = frozenset(exclude)
+
+    @app.before_request
+    def _metrics_start():
+        rule = request.url_rule
+        route = rule.rule if rule is not None else "<unmatched>"
+        if route in excluded:
+            return
+        g.metrics_route = route
+        g.metrics_started = time.perf_counter()
+        gauge_add("chefkit_http_requests_in_flight", (("method", request.method), ("route", g.metrics_route)), 1)
+
+    @app.after_request
+    def _metrics_record(response):
+        started = g.pop("metrics_started", None)
+        if started is not None:
+            observe_request(request.method, g.metrics_route, response.status_code, time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def _metrics_done(exc):
+        route = g.pop("metrics_route", None)
+        if route is not None:
+            gauge_add("chefkit_http_requests_in_flight", (("method", request.method), ("route", route)), -1)
+
+
+# -----------------------------
+# Snapshots and cross-process aggregation
+# -----------------------------
+def _snapshot() -> Dict[str, list]:
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {key: list(values) for key, values in _histograms.items()}
+    for collector in _collectors:
+        try:
+            for name, labels, value in collector():
+                key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+                counters[key] = counters.get(key, 0.0) + value
+        except Exception as e:
+            print(f"[metrics] Collector failed: {e}")
+    return {
+        "counters": [[name, list(labels), value] for (name, labels), value in counters.items()],
+        "gauges": [[name, list(labels), value] for (name, labels), value in gauges.items()],
+        "histograms": [[name, list(labels), values] for (name, labels), values in histograms.items()],
+    }
+
+
+def _merge(into: Dict[str, Dict[Key, Any]], snapshot: Dict[str, list], with_gauges: bool = True) -> None:
+    for section in ("counters", "gauges"):
+        if section == "gauges" and not with_gauges:
+            continue
+        target = into[section]
+        for name, labels, value in snapshot.get(section, []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            target[key] = target.get(key, 0.0) + value
+    target = into["histograms"]
+    for name, labels, values in snapshot.get("histograms", []):
+        key = (name, tuple(tuple(pair) for pair in labels))
+        current = target.get(key)
+        target[key] = list(values) if current is None else [a + b for a, b in zip(current, values)]
+
+
+def _to_snapshot(merged: Dict[str, Dict[Key, Any]]) -> Dict[str, list]:
+    return {
+        section: [[name, list(labels), value] for (name, labels), value in merged[section].items()]
+        for section in ("counters", "gauges", "histograms")
+    }
+
+
+@contextmanager
+def _dir_lock(exclusive: bool) -> Iterator[None]:
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(METRICS_DIR, ".lock"), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _read(path: str) -> Optional[Dict[str, list]]:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path: str, snapshot: Dict[str, list]) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(snapshot, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def flush() -> None:
+    """Write this process's snapshot to METRICS_DIR (no-op without it)."""
+    if not METRICS_DIR:
+        return
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _write(os.path.join(METRICS_DIR, f"{os.getpid()}.json"), _snapshot())
+    except OSError as e:
+        print(f"[metrics] Flush failed: {e}")
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(_FLUSH_SECONDS)
+        flush()
+
+
+def _ensure_flusher() -> None:
+    # Started lazily in each worker (after gunicorn forks), never in the master.
+    global _flusher_pid
+    if METRICS_DIR is None or _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True).start()
+
+
+def mark_process_dead(pid: int) -> None:
+    """Fold an exited worker's counters into archive.json and drop its file.
+
+    Called from gunicorn's child_exit hook in the master process.
+    """
+    if not METRICS_DIR:
+        return
+    path = os.path.join(METRICS_DIR, f"{pid}.json")
+    if not os.path.exists(path):
+        return
+    archive_path = os.path.join(METRICS_DIR, "archive.json")
+    with _dir_lock(exclusive=True):
+        merged = {"counters": {}, "gauges": {}, "histograms": {}}
+        for snapshot_path in (archive_path, path):
+            snapshot = _read(snapshot_path)
+            if snapshot:
+                _merge(merged, snapshot, with_gauges=False)
+        _write(archive_path, _to_snapshot(merged))
+        os.unlink(path)
+
+
+def clear_dir() -> None:
+    """Remove stale snapshots (gunicorn on_starting)."""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    for name in os.listdir(METRICS_DIR):
+        if name.endswith(".json") or name.endswith(".tmp"):
+            os.unlink(os.path.join(METRICS_DIR, name))
+
+
+def collect() -> Dict[str, Dict[Key, Any]]:
+    """Metrics of the whole server (all workers) or of this process."""
+    merged: Dict[str, Dict[Key, Any]] = {"counters": {}, "gauges": {}, "histograms": {}}
+    if not METRICS_DIR:
+        _merge(merged, _snapshot())
+        return merged
+    flush()
+    own = f"{os.getpid()}.json"
+    with _dir_lock(exclusive=False):
+        for name in os.listdir(METRICS_DIR):
+            if not name.endswith(".json"):
+                continue
+            snapshot = _read(os.path.join(METRICS_DIR, name))
+            if not snapshot:
+                continue
+            pid = name[:-len(".json")]
+            live = name == own or (pid.isdigit() and _pid_alive(int(pid)))
+            _merge(merged, snapshot, with_gauges=live)
+    return merged
+
+
+# -----------------------------
+# Exposition
+# -----------------------------
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    merged = collect()
+    by_name: Dict[str, List[Tuple[Labels, Any]]] = {}
+    for section in ("counters", "gauges", "histograms"):
+        for (name, labels), value in merged[section].items():
+            by_name.setdefault(name, []).append((labels, value))
+
+    lines: List[str] = []
+    for name in sorted(by_name):
+        kind, help_text = _METRICS.get(name, (COUNTER if name.endswith("_total") else GAUGE, name))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(by_name[name]):
+            if kind != HISTOGRAM:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), value[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
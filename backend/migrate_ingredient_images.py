@@ -3,22 +3,36 @@ Upload local ingredient assets to Cloudinary and update Supabase URLs.
 
 Usage:
     cd backend
-    python migrate_ingredient_images.py [--dry-run]
+    python migrate_ingredient_images.py [--dry-run] [--concurrency 8] [--batch-size 100] [--force]
+
+Uploads run on a thread pool. Each finished upload is recorded in a manifest
+(file SHA-256 -> Cloudinary URL, ingredient_images_manifest.json by default),
+so a rerun skips files whose bytes were already uploaded and an interrupted
+run picks up where it stopped. Rows whose URL actually changes are written
+back in bulk upserts of --batch-size rows that carry only the id and image
+columns. Progress lines report files/s, MB/s and the ETA. Ctrl-C cancels the queued uploads, lets the running ones
+finish, then writes their rows and the manifest before exiting.
 
 Requirements:
 - Environment variables: CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET
 - Supabase service role key set (SUPABASE_SERVICE_ROLE_KEY) so updates bypass RLS.
 """
+import argparse
+import hashlib
+import json
+import os
 import re
-import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import cloudinary
 import cloudinary.uploader
 from dotenv import load_dotenv
 
-from cloudinary_utils import get_cloudinary_config
+from cloudinary_utils import CLOUDINARY_API_URL, get_cloudinary_config
 from supabase_client import supabase, supabase_admin
 
 load_dotenv()
@@ -26,6 +40,8 @@ load_dotenv()
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 ASSETS_DIR = PROJECT_ROOT / "assets" / "images" / "ingredients"
 VALID_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".avif"}
+DEFAULT_MANIFEST = Path(__file__).resolve().parent / "ingredient_images_manifest.json"
+PROGRESS_SECONDS = 2.0
 
 
 def slugify(value: str) -> str:
@@ -41,6 +57,7 @@ def ensure_clients() -> None:
         api_key=api_key,
         api_secret=api_secret,
         secure=True,
+        upload_prefix=CLOUDINARY_API_URL,
     )
 
     if not supabase_admin:
@@ -111,7 +128,137 @@ def upload_to_cloudinary(path: Path) -> str:
     return secure_url
 
 
-def main(dry_run: bool = False) -> None:
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """File hash -> uploaded URL, saved as JSON so reruns can skip finished uploads.
+
+    Writes are atomic (temp file + rename) and throttled to one per second;
+    `save()` at the end (or on Ctrl-C) writes whatever is left.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            try:
+                with open(path) as fh:
+                    uploads = json.load(fh).get("uploads", {})
+                if not isinstance(uploads, dict):
+                    raise ValueError("'uploads' is not an object")
+                self.uploads = uploads
+            except (OSError, ValueError, AttributeError) as exc:
+                # Only costs re-uploads: the next save replaces the file
+                print(f"⚠️  Could not read manifest {path} ({exc}); starting with an empty one")
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+
+    def url_for(self, sha256: str) -> Optional[str]:
+        with self._lock:
+            entry = self.uploads.get(sha256)
+        return entry["url"] if entry else None
+
+    def record(self, sha256: str, path: Path, url: str) -> None:
+        with self._lock:
+            self.uploads[sha256] = {"url": url, "file": path.name, "uploaded_at": int(time.time())}
+            self._dirty = True
+            if time.monotonic() - self._saved_at >= 1.0:
+                self._save_locked()
+
+    def save(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+    def _save_locked(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as fh:
+            json.dump({"version": 1, "uploads": self.uploads}, fh, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+
+class Progress:
+    """Throughput and ETA, printed at most every PROGRESS_SECONDS."""
+
+    def __init__(self, total_files: int, total_bytes: int):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.files = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._printed_at = self.started
+
+    def advance(self, size: int) -> None:
+        self.files += 1
+        self.bytes += size
+        now = time.monotonic()
+        if now - self._printed_at >= PROGRESS_SECONDS or self.files == self.total_files:
+            self._printed_at = now
+            print(self.line(now))
+
+    def line(self, now: Optional[float] = None) -> str:
+        elapsed = max((now or time.monotonic()) - self.started, 1e-6)
+        rate = self.files / elapsed
+        remaining = (self.total_files - self.files) / rate if rate else 0.0
+        return (
+            f"[{self.files}/{self.total_files}] {rate:.1f} files/s, "
+            f"{self.bytes / elapsed / 1e6:.2f} MB/s, elapsed {elapsed:.0f}s, ETA {remaining:.0f}s"
+        )
+
+
+def process_asset(asset: Path, manifest: Manifest, force: bool) -> Tuple[str, bool]:
+    """Upload one asset unless the manifest already has its bytes. Returns (url, uploaded)."""
+    sha256 = file_sha256(asset)
+    url = None if force else manifest.url_for(sha256)
+    if url:
+        return url, False
+    url = upload_to_cloudinary(asset)
+    manifest.record(sha256, asset, url)
+    return url, True
+
+
+def flush_updates(client, id_column: str, image_field: str, rows: List[Dict], dry_run: bool) -> int:
+    """Write the image column of changed rows in one bulk upsert; returns how many were sent.
+
+    Rows carry only the id and image columns, so nothing else from the
+    `select *` snapshot is written back over edits made since. If the table
+    has NOT NULL columns without defaults, Postgres rejects the upsert's
+    insert half (23502) before it sees the conflict; the rows are then
+    updated one by one, still touching only the image column.
+    """
+    if not rows:
+        return 0
+    if dry_run:
+        print(f"DRY-RUN: would set {image_field} on {len(rows)} ingredient rows")
+        return len(rows)
+    try:
+        resp = client.table("ingredients").upsert(rows, on_conflict=id_column).execute()
+    except Exception as exc:
+        if getattr(exc, "code", None) != "23502":
+            raise
+        print(f"ℹ️  Bulk upsert needs columns beyond {image_field}; updating {len(rows)} rows individually")
+        for row in rows:
+            client.table("ingredients").update({image_field: row[image_field]}).eq(id_column, row[id_column]).execute()
+        print(f"✅ Updated {len(rows)} ingredient rows")
+        return len(rows)
+    if getattr(resp, "data", None) is None:
+        print(f"⚠️  Supabase upsert of {len(rows)} rows returned no data")
+    else:
+        print(f"✅ Upserted {len(rows)} ingredient rows")
+    return len(rows)
+
+
+def main(dry_run: bool = False, concurrency: int = 8, batch_size: int = 100,
+         manifest_path: Path = DEFAULT_MANIFEST, force: bool = False) -> None:
     ensure_clients()
     if not ASSETS_DIR.exists():
         raise FileNotFoundError(f"Ingredient assets directory not found: {ASSETS_DIR}")
@@ -123,8 +270,8 @@ def main(dry_run: bool = False) -> None:
     asset_files = [p for p in ASSETS_DIR.iterdir() if p.suffix.lower() in VALID_EXTENSIONS]
     print(f"Discovered {len(asset_files)} local ingredient images.")
 
-    updated = 0
     skipped = 0
+    jobs: List[Tuple[Path, Dict, str, str]] = []
     for asset in sorted(asset_files, key=lambda p: p.name.lower()):
         key = asset.stem.lower()
         row = index.get(key)
@@ -139,38 +286,81 @@ def main(dry_run: bool = False) -> None:
             skipped += 1
             continue
 
-        id_column, row_id, image_field = resolved
-        print(f"→ Uploading {asset.name} for ingredient {row_id} (field {image_field})")
+        id_column, _, image_field = resolved
+        jobs.append((asset, row, id_column, image_field))
+
+    manifest = Manifest(manifest_path)
+    client = supabase_admin or supabase
+    progress = Progress(len(jobs), sum(asset.stat().st_size for asset, _, _, _ in jobs))
+    print(f"Processing {len(jobs)} images with {concurrency} threads (manifest: {manifest_path}).")
 
+    uploaded = reused = unchanged = failed = written = 0
+    pending: Dict[Tuple[str, str], List[Dict]] = {}
+    futures: Dict[Future, Tuple[Path, Dict, str, str]] = {}
+    interrupted = False
+
+    def collect(future: Future) -> None:
+        nonlocal uploaded, reused, unchanged, failed, written
+        asset, row, id_column, image_field = futures.pop(future)
+        progress.advance(asset.stat().st_size)
         try:
-            secure_url = upload_to_cloudinary(asset)
+            secure_url, was_uploaded = future.result()
         except Exception as exc:
             print(f"❌ Upload failed for {asset.name}: {exc}")
-            skipped += 1
-            continue
-
-        if dry_run:
-            print(f"DRY-RUN: would update {image_field} to {secure_url}")
-            updated += 1
-            continue
-
-        client = supabase_admin or supabase
-        resp = (
-            client.table("ingredients")
-            .update({image_field: secure_url})
-            .eq(id_column, row_id)
-            .execute()
-        )
-        if getattr(resp, "data", None) is None:
-            print(f"⚠️  Supabase update returned no data for {row_id}")
+            failed += 1
+            return
+        if was_uploaded:
+            uploaded += 1
         else:
-            print(f"✅ Updated {row_id} ({asset.name})")
-        updated += 1
-
-    print(f"\nDone. Updated {updated} images; skipped {skipped} images.")
-
+            reused += 1
+
+        if row.get(image_field) == secure_url:
+            unchanged += 1
+            return
+        batch = pending.setdefault((id_column, image_field), [])
+        batch.append({id_column: row[id_column], image_field: secure_url})
+        if len(batch) >= batch_size:
+            written += flush_updates(client, id_column, image_field, batch, dry_run)
+            pending[(id_column, image_field)] = []
+
+    # Not a `with` block: its exit waits for every queued upload, so Ctrl-C
+    # would not stop the run
+    pool = ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="migrate")
+    try:
+        try:
+            futures.update({pool.submit(process_asset, job[0], manifest, force): job for job in jobs})
+            for future in as_completed(list(futures)):
+                collect(future)
+        except KeyboardInterrupt:
+            interrupted = True
+            print("\nInterrupted: cancelling queued uploads and waiting for the ones in flight...")
+            pool.shutdown(wait=True, cancel_futures=True)
+            # Uploads that finished meanwhile are in the manifest; write their rows too
+            for future in [f for f in futures if f.done() and not f.cancelled()]:
+                collect(future)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+        for (id_column, image_field), batch in pending.items():
+            written += flush_updates(client, id_column, image_field, batch, dry_run)
+    finally:
+        manifest.save()
+
+    print(
+        f"\n{'Interrupted' if interrupted else 'Done'}. Uploaded {uploaded} images, reused {reused} from the manifest, "
+        f"updated {written} rows ({unchanged} already current); skipped {skipped}, failed {failed}."
+    )
+    if interrupted:
+        print(f"{len(futures)} images were not processed; rerun to continue.")
+        raise SystemExit(130)
 
 if __name__ == "__main__":
-    dry_run_flag = "--dry-run" in sys.argv
-    main(dry_run=dry_run_flag)
-
+    parser = argparse.ArgumentParser(description="Upload ingredient images to Cloudinary and update Supabase URLs.")
+    parser.add_argument("--dry-run", action="store_true", help="upload, but do not write Supabase rows")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("MIGRATE_CONCURRENCY", "8")),
+                        help="parallel uploads")
+    parser.add_argument("--batch-size", type=int, default=100, help="rows per bulk upsert")
+    parser.add_argument("--manifest", type=Path, default=DEFAULT_MANIFEST, help="hash -> URL manifest file")
+    parser.add_argument("--force", action="store_true", help="re-upload files already in the manifest")
+    args = parser.parse_args()
+    main(dry_run=args.dry_run, concurrency=args.concurrency, batch_size=args.batch_size,
+         manifest_path=args.manifest, force=args.force)
@@ -0,0 +1,270 @@
+"""Persistent outbox for notification fan-out jobs.
+
+Request handlers enqueue a small job (e.g. "recipe_created") and return
+immediately; a pool of worker threads claims jobs from a local SQLite file,
+runs the registered handler, retries failures with exponential backoff and
+moves jobs that keep failing to a dead-letter state.
+
+The SQLite file is shared by every worker process on the host, and jobs are
+claimed atomically, so several gunicorn workers can drain the same queue.
+Waits for another process's write lock are cooperative (sqlite_busy), so a
+busy file never stalls the other greenlets of a gevent worker.
+
+A failed job runs again from the start, so handlers must be idempotent.
+Each claim stores a fresh claim_token, and a worker only completes or fails
+the job while its token is still the current one: a job re-claimed after
+the visibility timeout belongs to its new worker.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import sqlite_busy
+
+_DB_PATH = os.getenv(
+    "NOTIFICATION_OUTBOX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "notification_outbox.db"),
+)
+_WORKERS = int(os.getenv("NOTIFICATION_OUTBOX_WORKERS", "2"))
+_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", "5"))
+_RETRY_BASE_SECONDS = float(os.getenv("NOTIFICATION_OUTBOX_RETRY_BASE", "5"))
+_RETRY_MAX_SECONDS = 600.0
+_POLL_SECONDS = 1.0
+# A job left 'running' longer than this (worker crashed) is claimed again.
+_VISIBILITY_TIMEOUT_SECONDS = 300.0
+# How long a write waits for another process to release the database
+_BUSY_TIMEOUT_SECONDS = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    locked_at REAL,
+    claim_token TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_jobs_claim ON outbox_jobs (status, available_at);
+"""
+
+Handler = Callable[[Dict[str, Any]], None]
+
+_handlers: Dict[str, Handler] = {}
+_local = threading.local()
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+_wakeup = threading.Event()
+_workers: list = []
+_workers_lock = threading.Lock()
+
+_counters = {"enqueued": 0, "processed": 0, "retried": 0, "dead_lettered": 0, "inline_fallbacks": 0}
+_counters_lock = threading.Lock()
+
+
+def _bump(name: str) -> None:
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def _connect() -> sqlite3.Connection:
+    """Per-thread connection in autocommit mode (transactions are explicit)."""
+    global _schema_ready
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite_busy.connect(_DB_PATH)
+        _local.conn = conn
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                sqlite_busy.retry(lambda: conn.executescript(_SCHEMA), _BUSY_TIMEOUT_SECONDS)
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(outbox_jobs)")}
+                if "claim_token" not in columns:
+                    # Outbox files created before claim tokens
+                    sqlite_busy.retry(lambda: conn.execute("ALTER TABLE outbox_jobs ADD COLUMN claim_token TEXT"),
+                                      _BUSY_TIMEOUT_SECONDS)
+                _schema_ready = True
+    return conn
+
+
+def register_handler(kind: str, handler: Handler) -> None:
+    """Register the function that processes jobs of the given kind."""
+    _handlers[kind] = handler
+
+
+def enqueue(kind: str, payload: Dict[str, Any]) -> Optional[int]:
+    """Persist a job and wake a worker. Returns the job id.
+
+    If the outbox cannot be written, the handler runs inline so the
+    notification is not lost.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"No outbox handler registered for '{kind}'")
+    now = time.time()
+    try:
+        conn = _connect()
+        cur = sqlite_busy.retry(lambda: conn.execute(
+            "INSERT INTO outbox_jobs (kind, payload, available_at, created_at) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(payload), now, now),
+        ), _BUSY_TIMEOUT_SECONDS)
+        job_id = cur.lastrowid
+    except sqlite3.Error as e:
+        print(f"[outbox] enqueue failed, running {kind} inline: {e}")
+        _bump("inline_fallbacks")
+        _handlers[kind](payload)
+        return None
+    _bump("enqueued")
+    start()
+    _wakeup.set()
+    return job_id
+
+
+def _claim() -> Optional[Tuple[sqlite3.Row, str]]:
+    """Claim the next ready job; returns (row, claim_token)."""
+    now = time.time()
+    token = uuid.uuid4().hex
+
+    def claim(conn: sqlite3.Connection) -> Optional[Tuple[sqlite3.Row, str]]:
+        row = conn.execute(
+            "SELECT id, kind, payload, attempts FROM outbox_jobs "
+            "WHERE (status = 'pending' AND available_at <= ?) "
+            "   OR (status = 'running' AND locked_at < ?) "
+            "ORDER BY available_at, id LIMIT 1",
+            (now, now - _VISIBILITY_TIMEOUT_SECONDS),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE outbox_jobs SET status = 'running', locked_at = ?, claim_token = ?, attempts = attempts + 1 "
+            "WHERE id = ?",
+            (now, token, row[0]),
+        )
+        return row, token
+
+    return sqlite_busy.transaction(_connect(), claim, _BUSY_TIMEOUT_SECONDS)
+
+
+def _write(sql: str, params: tuple) -> sqlite3.Cursor:
+    conn = _connect()
+    return sqlite_busy.retry(lambda: conn.execute(sql, params), _BUSY_TIMEOUT_SECONDS)
+
+
+def _lost_claim(job_id: int) -> None:
+    print(f"[outbox] job {job_id} was claimed again after the visibility timeout; leaving it to that worker")
+
+
+def _complete(job_id: int, token: str) -> None:
+    if not _write("DELETE FROM outbox_jobs WHERE id = ? AND claim_token = ?", (job_id, token)).rowcount:
+        _lost_claim(job_id)
+        return
+    _bump("processed")
+
+
+def _fail(job_id: int, token: str, attempts: int, error: str) -> None:
+    if attempts >= _MAX_ATTEMPTS:
+        cur = _write(
+            "UPDATE outbox_jobs SET status = 'dead', locked_at = NULL, claim_token = NULL, last_error = ? "
+            "WHERE id = ? AND claim_token = ?",
+            (error, job_id, token),
+        )
+        if not cur.rowcount:
+            _lost_claim(job_id)
+            return
+        _bump("dead_lettered")
+        print(f"[outbox] job {job_id} dead-lettered after {attempts} attempts: {error}")
+        return
+    delay = min(_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), _RETRY_MAX_SECONDS)
+    cur = _write(
+        "UPDATE outbox_jobs SET status = 'pending', locked_at = NULL, claim_token = NULL, available_at = ?, "
+        "last_error = ? WHERE id = ? AND claim_token = ?",
+        (time.time() + delay, error, job_id, token),
+    )
+    if not cur.rowcount:
+        _lost_claim(job_id)
+        return
+    _bump("retried")
+
+
+def run_pending_once() -> bool:
+    """Claim and run a single job. Returns False when nothing was ready."""
+    claimed = _claim()
+    if claimed is None:
+        return False
+    row, token = claimed
+    job_id, kind, payload, attempts = row[0], row[1], row[2], row[3] + 1
+    handler = _handlers.get(kind)
+    try:
+        if handler is None:
+            raise RuntimeError(f"No handler registered for '{kind}'")
+        handler(json.loads(payload))
+    except Exception as e:
+        _fail(job_id, token, attempts, str(e))
+    else:
+        _complete(job_id, token)
+    return True
+
+
+def _worker_loop() -> None:
+    while True:
+        try:
+            if run_pending_once():
+                continue
+        except Exception as e:
+            print(f"[outbox] worker error: {e}")
+        _wakeup.wait(_POLL_SECONDS)
+        _wakeup.clear()
+
+
+def start() -> None:
+    """Start the worker threads for this process (idempotent)."""
+    if _workers:
+        return
+    with _workers_lock:
+        if _workers:
+            return
+        for i in range(max(_WORKERS, 1)):
+            thread = threading.Thread(target=_worker_loop, name=f"outbox-worker-{i}", daemon=True)
+            thread.start()
+            _workers.append(thread)
+
+
+def requeue_dead(limit: int = 100) -> int:
+    """Move dead-lettered jobs back to pending with a fresh attempt budget."""
+    cur = _write(
+        "UPDATE outbox_jobs SET status = 'pending', attempts = 0, available_at = ?, locked_at = NULL "
+        "WHERE id IN (SELECT id FROM outbox_jobs WHERE status = 'dead' ORDER BY id LIMIT ?)",
+        (time.time(), limit),
+    )
+    _wakeup.set()
+    return cur.rowcount
+
+
+def stats() -> Dict[str, Any]:
+    """Queue depth by status plus this process's worker counters."""
+    depth = {"pending": 0, "running": 0, "dead": 0}
+    oldest_pending_age = None
+    try:
+        conn = _connect()
+        for status, count in conn.execute("SELECT status, COUNT(*) FROM outbox_jobs GROUP BY status"):
+            depth[status] = count
+        oldest = conn.execute("SELECT MIN(created_at) FROM outbox_jobs WHERE status = 'pending'").fetchone()[0]
+        if oldest is not None:
+            oldest_pending_age = round(time.time() - oldest, 3)
+    except sqlite3.Error as e:
+        depth["error"] = str(e)
+    with _counters_lock:
+        counters = dict(_counters)
+    return {
+        "depth": depth,
+        "oldest_pending_age_seconds": oldest_pending_age,
+        "workers": len(_workers),
+        "counters": counters,
+    }
@@ -0,0 +1,305 @@
+"""Token-bucket rate limits and per-route-group concurrency caps (bulkheads).
+
+On unless RATE_LIMIT_ENABLED=false. Every request outside _EXEMPT_PATHS
+takes one token from each bucket that applies to it:
+
+- the client IP's bucket (RATE_LIMIT_IP);
+- the user's bucket, when it carries a valid access token (RATE_LIMIT_USER);
+- its route group's bucket for that client, keyed by user if signed in,
+  else by IP (RATE_LIMIT_<GROUP>, e.g. RATE_LIMIT_COOK).
+
+Limits are written "<requests>/<seconds>" (e.g. "20/60": bursts of 20,
+refilled at 20 per minute); "0" or "" switches one off. Requests in a group
+with a BULKHEAD_<GROUP> cap also hold a slot while they run, and one over
+the cap is turned away at once, so e.g. a burst on /api/cook cannot hold
+every worker while /auth/login waits.
+
+Either way the response is 429 with a Retry-After header (whole seconds)
+and {"error": "rate_limited" | "too_busy", "retry_after": n}.
+
+Buckets and slots live in a local SQLite file (RATE_LIMIT_PATH) shared by
+every worker process on the host, and each check is one BEGIN IMMEDIATE
+transaction, so the limits and caps are exact per host however requests
+land on workers. Waits for another worker's write lock are cooperative
+(sqlite_busy). A slot is a row with a lease of BULKHEAD_LEASE_SECONDS, so
+the slots of a worker killed mid-request free themselves. If the file
+cannot be used the error is logged and the request let through: the limiter
+never takes the API down with it.
+
+Client IPs come from the socket address, or with RATE_LIMIT_TRUSTED_PROXIES
+set to the number of proxies that append to X-Forwarded-For, the address
+the outermost of them saw. Behind a proxy it must be set, or every
+anonymous client shares the proxy's address and bucket. Rejections are
+counted in chefkit_rate_limited_total{group,scope}.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import metrics
+import sqlite_busy
+
+ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+_DB_PATH = os.getenv(
+    "RATE_LIMIT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "rate_limit.db"),
+)
+# Number of reverse proxies in front of the app that append to
+# X-Forwarded-For; None (unset) uses the socket address
+_trusted_proxies = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").strip()
+TRUSTED_PROXIES: Optional[int] = int(_trusted_proxies) if _trusted_proxies else None
+# Longer than any request may run (gunicorn's timeout), so only the slots
+# of a killed worker expire
+_SLOT_LEASE_SECONDS = float(os.getenv("BULKHEAD_LEASE_SECONDS", "120"))
+_PRUNE_SECONDS = 300.0
+_BUSY_TIMEOUT_SECONDS = 1.0
+
+# Route groups by Flask endpoint; every /auth/ route is in "auth" and
+# anything else is in "default"
+ROUTE_GROUPS: Dict[str, str] = {
+    "cook_recipe": "cook",
+    "generate_recipes_route": "cook",
+    "upload_avatar": "upload",
+    "upload_recipe_image": "upload",
+    "upload_ticket_route": "upload",
+    "upload_confirm_route": "upload",
+}
+
+_EXEMPT_PATHS = ("/health", "/metrics", "/wake-up")
+
+_DEFAULT_LIMITS = {"ip": "600/60", "user": "300/60", "auth": "30/60", "cook": "20/60", "upload": "30/60"}
+_DEFAULT_BULKHEADS = {"cook": "4", "upload": "8"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rate_buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_rate_buckets_updated ON rate_buckets (updated_at);
+CREATE TABLE IF NOT EXISTS bulkhead_slots (
+    id INTEGER PRIMARY KEY,
+    route_group TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bulkhead_slots_group ON bulkhead_slots (route_group, expires_at);
+"""
+
+_local = threading.local()
+_schema_ready = False
+_schema_lock = threading.Lock()
+_last_prune = 0.0
+_warned_no_proxy_count = False
+
+
+def _connect() -> sqlite3.Connection:
+    global _schema_ready
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite_busy.connect(_DB_PATH)
+        _local.conn = conn
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                sqlite_busy.retry(lambda: conn.executescript(_SCHEMA), _BUSY_TIMEOUT_SECONDS)
+                _schema_ready = True
+    return conn
+
+
+def _transaction(body):
+    return sqlite_busy.transaction(_connect(), body, _BUSY_TIMEOUT_SECONDS)
+
+
+def _parse_limit(value: str) -> Optional[Tuple[float, float]]:
+    """"20/60" -> (capacity 20, period 60 s); None when switched off."""
+    value = (value or "").strip()
+    if value in ("", "0"):
+        return None
+    count, _, seconds = value.partition("/")
+    capacity, period = float(count), float(seconds or "1")
+    if capacity <= 0 or period <= 0:
+        return None
+    return capacity, period
+
+
+def limit_for(scope: str) -> Optional[Tuple[float, float]]:
+    """Bucket (capacity, period) for "ip", "user" or a route group on this host."""
+    return _parse_limit(os.getenv(f"RATE_LIMIT_{scope.upper()}", _DEFAULT_LIMITS.get(scope, "")))
+
+
+def bulkhead_for(group: str) -> int:
+    """Concurrent requests allowed in a route group on this host; 0 is unlimited."""
+    return int(os.getenv(f"BULKHEAD_{group.upper()}", _DEFAULT_BULKHEADS.get(group, "0")) or 0)
+
+
+# -----------------------------
+# Token buckets
+# -----------------------------
+def take(buckets: List[Tuple[str, float, float]]) -> float:
+    """Take one token from each (key, capacity, period) bucket, all or none.
+
+    Returns 0 when the request may go ahead, else the seconds until every
+    bucket has a token again.
+    """
+    def spend(conn: sqlite3.Connection) -> float:
+        # Read under the write lock, so every worker refills from the same clock order
+        now = time.time()
+        wait = 0.0
+        updates = []
+        for key, capacity, period in buckets:
+            rate = capacity / period
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + max(now - row[1], 0.0) * rate)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / rate)
+            updates.append((key, tokens - 1, now))
+        if wait:
+            return wait
+        conn.executemany("INSERT OR REPLACE INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)", updates)
+        return 0.0
+
+    wait = _transaction(spend)
+    _maybe_prune()
+    return wait
+
+
+def _maybe_prune() -> None:
+    """Drop buckets idle long enough to be full again (same as absent), every _PRUNE_SECONDS per worker."""
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < _PRUNE_SECONDS:
+        return
+    _last_prune = now
+    scopes = ["ip", "user", "auth", "default", *ROUTE_GROUPS.values()]
+    cutoff = now - max((limit[1] for limit in map(limit_for, scopes) if limit), default=0)
+    sqlite_busy.retry(lambda: _connect().execute("DELETE FROM rate_buckets WHERE updated_at < ?", (cutoff,)),
+                      _BUSY_TIMEOUT_SECONDS)
+
+
+# -----------------------------
+# Bulkheads
+# -----------------------------
+def acquire(group: str, cap: int) -> Optional[int]:
+    """Take one of the host's `cap` running slots of `group`; its id, or None if all are taken."""
+    def claim(conn: sqlite3.Connection) -> Optional[int]:
+        now = time.time()
+        conn.execute("DELETE FROM bulkhead_slots WHERE route_group = ? AND expires_at <= ?", (group, now))
+        taken = conn.execute("SELECT COUNT(*) FROM bulkhead_slots WHERE route_group = ?", (group,)).fetchone()[0]
+        if taken >= cap:
+            return None
+        return conn.execute(
+            "INSERT INTO bulkhead_slots (route_group, pid, expires_at) VALUES (?, ?, ?)",
+            (group, os.getpid(), now + _SLOT_LEASE_SECONDS),
+        ).lastrowid
+
+    return _transaction(claim)
+
+
+def release(slot: int) -> None:
+    sqlite_busy.retry(lambda: _connect().execute("DELETE FROM bulkhead_slots WHERE id = ?", (slot,)),
+                      _BUSY_TIMEOUT_SECONDS)
+
+
+def running() -> Dict[str, int]:
+    """Requests currently holding a bulkhead slot on this host, by group."""
+    rows = _connect().execute(
+        "SELECT route_group, COUNT(*) FROM bulkhead_slots WHERE expires_at > ? GROUP BY route_group",
+        (time.time(),),
+    ).fetchall()
+    return dict(rows)
+
+
+# -----------------------------
+# Flask integration
+# -----------------------------
+def route_group(request) -> str:
+    if request.path.startswith("/auth/"):
+        return "auth"
+    return ROUTE_GROUPS.get(request.endpoint or "", "default")
+
+
+def client_ip(request) -> str:
+    """Remote address, or the address the outermost trusted proxy saw."""
+    global _warned_no_proxy_count
+    if TRUSTED_PROXIES is None and not _warned_no_proxy_count:
+        _warned_no_proxy_count = True
+        print("[rate-limit] RATE_LIMIT_TRUSTED_PROXIES is unset; keying clients by socket address "
+              "(behind a proxy they would all share its bucket)")
+    if TRUSTED_PROXIES:
+        forwarded = [part.strip() for part in request.headers.get("X-Forwarded-For", "").split(",") if part.strip()]
+        if len(forwarded) >= TRUSTED_PROXIES:
+            return forwarded[-TRUSTED_PROXIES]
+    return request.remote_addr or "unknown"
+
+
+def _user_id(request) -> Optional[str]:
+    parts = (request.headers.get("Authorization") or "").split()
+    if len(parts) != 2 or parts[0].lower() != "bearer":
+        return None
+    from auth import verify_token
+
+    try:
+        # Cached, so the route's own token check does not verify it again
+        return verify_token(parts[1]).get("sub")
+    except Exception:
+        return None
+
+
+def _too_many(error: str, retry_after: float, group: str, scope: str):
+    from flask import jsonify
+
+    seconds = max(int(math.ceil(retry_after)), 1)
+    metrics.inc("chefkit_rate_limited_total", (("group", group), ("scope", scope)))
+    response = jsonify({"error": error, "retry_after": seconds})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(seconds)
+    return response
+
+
+def init_app(app) -> None:
+    """Apply the rate limits and bulkheads to every route of `app`."""
+    from flask import g, request
+
+    @app.before_request
+    def _rate_limit():
+        if not ENABLED or request.method == "OPTIONS" or request.path.startswith(_EXEMPT_PATHS):
+            return None
+        group = route_group(request)
+        ip = client_ip(request)
+        user = _user_id(request)
+        client = f"user:{user}" if user else f"ip:{ip}"
+        buckets = []
+        for scope, key in (("ip", f"ip:{ip}"), ("user", f"user:{user}" if user else None),
+                           (group, f"{group}:{client}")):
+            limit = limit_for(scope) if key else None
+            if limit:
+                buckets.append((key, *limit))
+        try:
+            # Slot first, so a request turned away as too busy keeps its tokens
+            cap = bulkhead_for(group)
+            if cap > 0:
+                slot = acquire(group, cap)
+                if slot is None:
+                    return _too_many("too_busy", 1, group, "bulkhead")
+                g.bulkhead_slot = slot
+            wait = take(buckets) if buckets else 0.0
+        except sqlite3.Error as e:
+            print(f"[rate-limit] check failed, letting the request through: {e}")
+            return None
+        if wait:
+            return _too_many("rate_limited", wait, group, "rate")
+        return None
+
+    @app.teardown_request
+    def _release_bulkhead(exc):
+        slot = g.pop("bulkhead_slot", None)
+        if slot is not None:
+            try:
+                release(slot)
+            except sqlite3.Error as e:
+                # Its lease frees it later
+                print(f"[rate-limit] slot release failed: {e}")
@@ -0,0 +1,162 @@
+"""Per-request upstream call accounting.
+
+Every upstream call a request makes (PostgREST `.execute()`, Auth,
+Cloudinary, FCM and any other outbound HTTP) is reported by `metrics`, and
+this module also adds it to the current request's tally. When the response
+goes out:
+
+- the tally is returned in a `Server-Timing` header, e.g.
+  `upstream;desc="7 calls";dur=143.2, postgrest;desc="6 calls";dur=120.9, ...`
+- a `[upstream]` line is logged if the request made more than
+  UPSTREAM_CALL_BUDGET calls or spent more than UPSTREAM_TIME_BUDGET_MS
+  waiting on upstreams;
+- a possible N+1 is logged when one call (same upstream, method and path,
+  e.g. `GET /rest/v1/follows`) repeats N_PLUS_ONE_THRESHOLD times or more.
+
+The tally lives in a ContextVar, so it follows the request across greenlets,
+asyncio tasks and asgiref's thread hops; work handed to a plain thread pool
+is not attributed to the request.
+
+`assert_max_upstream_calls` lets tests pin how many calls a route may make.
+"""
+import os
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+import metrics
+
+UPSTREAM_CALL_BUDGET = int(os.getenv("UPSTREAM_CALL_BUDGET", "10"))
+UPSTREAM_TIME_BUDGET_MS = float(os.getenv("UPSTREAM_TIME_BUDGET_MS", "1000"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+
+class UpstreamCalls:
+    """Upstream calls made while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.by_upstream: Dict[str, Tuple[int, float]] = {}
+        self.by_call: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, upstream: str, call: str, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            count, total = self.by_upstream.get(upstream, (0, 0.0))
+            self.by_upstream[upstream] = (count + 1, total + seconds)
+            self.by_call[call] = self.by_call.get(call, 0) + 1
+
+    def repeated_calls(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Calls made `threshold` times or more (likely N+1 loops)."""
+        return {call: n for call, n in self.by_call.items() if n >= threshold}
+
+    def server_timing(self) -> str:
+        entries = [f'upstream;desc="{self.count} calls";dur={self.seconds * 1000:.1f}']
+        for upstream, (count, seconds) in sorted(self.by_upstream.items()):
+            entries.append(f'{upstream};desc="{count} calls";dur={seconds * 1000:.1f}')
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[UpstreamCalls]] = ContextVar("upstream_calls", default=None)
+
+
+def current() -> Optional[UpstreamCalls]:
+    return _current.get()
+
+
+def _record(upstream: str, call: str, status, seconds: float) -> None:
+    calls = _current.get()
+    if calls is not None:
+        calls.add(upstream, f"{upstream} {call}", seconds)
+
+
+metrics.add_upstream_listener(_record)
+
+
+@contextmanager
+def track() -> Iterator[UpstreamCalls]:
+    """Tally the upstream calls made inside the block."""
+    calls = UpstreamCalls()
+    token = _current.set(calls)
+    try:
+        yield calls
+    finally:
+        _current.reset(token)
+
+
+# -----------------------------
+# Flask integration
+# -----------------------------
+def init_app(app) -> None:
+    """Tally upstream calls per request, add Server-Timing and log over-budget requests."""
+    from flask import g, request
+
+    @app.before_request
+    def _accounting_start():
+        g.upstream_calls = UpstreamCalls()
+        g.upstream_calls_token = _current.set(g.upstream_calls)
+
+    @app.after_request
+    def _accounting_report(response):
+        calls = g.get("upstream_calls")
+        if calls is None:
+            return response
+        response.headers.add("Server-Timing", calls.server_timing())
+        rule = request.url_rule
+        route = f"{request.method} {rule.rule if rule is not None else request.path}"
+        if calls.count > UPSTREAM_CALL_BUDGET or calls.seconds * 1000 > UPSTREAM_TIME_BUDGET_MS:
+            print(
+                f"[upstream] {route} made {calls.count} upstream calls in {calls.seconds * 1000:.0f}ms "
+                f"(budget {UPSTREAM_CALL_BUDGET} calls / {UPSTREAM_TIME_BUDGET_MS:.0f}ms): "
+                + ", ".join(f"{call} x{n}" for call, n in sorted(calls.by_call.items(), key=lambda item: -item[1]))
+            )
+        for call, n in calls.repeated_calls().items():
+            print(f"[upstream] Possible N+1 in {route}: {call} x{n}")
+        return response
+
+    @app.teardown_request
+    def _accounting_done(exc):
+        token = g.pop("upstream_calls_token", None)
+        if token is not None:
+            try:
+                _current.reset(token)
+            except ValueError:
+                # Token from another context (e.g. hooks split across threads)
+                _current.set(None)
+
+
+# -----------------------------
+# Test helper
+# -----------------------------
+_SERVER_TIMING_TOTAL = re.compile(r'(?:^|,)\s*upstream;desc="(\d+) calls"')
+
+
+def upstream_calls_in(response) -> int:
+    """Total upstream calls reported in a response's Server-Timing header."""
+    for value in response.headers.getlist("Server-Timing"):
+        match = _SERVER_TIMING_TOTAL.search(value)
+        if match:
+            return int(match.group(1))
+    raise AssertionError("response has no upstream Server-Timing entry")
+
+
+def assert_max_upstream_calls(client, path: str, max_calls: int, method: str = "GET", **kwargs):
+    """Request `path` with a Flask test client and fail if it makes too many upstream calls.
+
+        assert_max_upstream_calls(app.test_client(), "/api/users", 3, headers=auth)
+
+    Returns the response so callers can make further assertions.
+    """
+    response = client.open(path, method=method, **kwargs)
+    made = upstream_calls_in(response)
+    if made > max_calls:
+        raise AssertionError(
+            f"{method} {path} made {made} upstream calls, expected at most {max_calls} "
+            f"(Server-Timing: {', '.join(response.headers.getlist('Server-Timing'))})"
+        )
+    return response
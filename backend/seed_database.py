@@ -4,19 +4,40 @@ Seeds the Supabase database with sample chefs and recipes.
 
 Usage:
     cd backend
-    python seed_database.py
+    python seed_database.py                 # the sample chefs and recipes
+    python seed_database.py --scale 1000    # synthetic load-test dataset
+
+--scale N uses SAMPLE_CHEFS / SAMPLE_RECIPES as templates for N copies of
+each chef and recipe, plus 20*N regular users who each follow --follows
+chefs and favourite --favourites recipes. IDs are deterministic, so a rerun
+updates the same rows. Rows are written with bulk upserts of --batch-size;
+auth users are created --auth-concurrency at a time (GoTrue has no bulk
+endpoint), or skipped with --skip-auth when public.users does not reference
+auth.users.
 """
 
+import argparse
 import os
+import random
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
 from dotenv import load_dotenv
+from postgrest.types import ReturnMethod
 
 load_dotenv()
 
 from supabase_client import supabase_admin
 
-if not supabase_admin:
-    raise ValueError("supabase_admin not initialized. Check SUPABASE_SERVICE_ROLE_KEY in .env")
+BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "500"))
+AUTH_CONCURRENCY = int(os.getenv("SEED_AUTH_CONCURRENCY", "16"))
+DEFAULT_PASSWORD = "ChefKit123!"
+
+# Namespace for the deterministic IDs of synthetic rows
+_NAMESPACE = uuid.UUID("6d1f7c8e-0b8a-4f57-9a3c-2f1e0c5b7a10")
 
 
 # Sample chef users to create/update
@@ -158,113 +179,283 @@ SAMPLE_RECIPES = [
 ]
 
 
-def seed_chefs():
-    """Create new chef users using Supabase Auth REST API."""
-    print("\n🧑‍🍳 Creating new chefs...")
-    chef_ids = []
-    
-    # Get Supabase URL and service role key for REST API
-    import requests
+# -----------------------------
+# Bulk writes
+# -----------------------------
+def bulk_upsert(table: str, rows: List[Dict[str, Any]], on_conflict: str, batch_size: int = BATCH_SIZE) -> None:
+    """INSERT ... ON CONFLICT DO UPDATE `rows` in batches of `batch_size`."""
+    started = time.perf_counter()
+    for start in range(0, len(rows), batch_size):
+        supabase_admin.table(table).upsert(
+            rows[start:start + batch_size], on_conflict=on_conflict, returning=ReturnMethod.minimal
+        ).execute()
+    _report(table, len(rows), batch_size, started)
+
+
+def _report(table: str, count: int, batch_size: int, started: float) -> None:
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    batches = (count + batch_size - 1) // batch_size
+    print(f"  ↳ {table}: {count} rows in {batches} batches, {elapsed:.1f}s ({count / elapsed:.0f} rows/s)")
+
+
+def create_auth_users(accounts: List[Dict[str, str]], concurrency: int = AUTH_CONCURRENCY) -> Dict[str, str]:
+    """Create auth users through the Auth admin API, `concurrency` requests at a time.
+
+    Each account is {"email", "full_name"} plus an optional fixed "id".
+    Returns email -> user id for the accounts that exist afterwards.
+    """
+    import http_client
     from supabase_client import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
-    
+
     auth_url = f"{SUPABASE_URL}/auth/v1/admin/users"
     headers = {
         "apikey": SUPABASE_SERVICE_ROLE_KEY,
         "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
         "Content-Type": "application/json"
     }
-    
+
+    def create(account: Dict[str, str]):
+        payload = {
+            "email": account["email"],
+            "password": DEFAULT_PASSWORD,
+            "email_confirm": True,
+            "user_metadata": {"full_name": account["full_name"]}
+        }
+        if account.get("id"):
+            payload["id"] = account["id"]
+        resp = http_client.post(auth_url, headers=headers, json=payload)
+        if resp.status_code == 200 or resp.status_code == 201:
+            return account["email"], resp.json()["id"]
+        if account.get("id") and resp.status_code == 422:
+            # Already registered by an earlier run with the same fixed id
+            return account["email"], account["id"]
+        print(f"  ❌ Failed to create {account['email']}: {resp.status_code} - {resp.text}")
+        return account["email"], None
+
+    if not accounts:
+        return {}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="seed-auth") as pool:
+        created = {email: uid for email, uid in pool.map(create, accounts) if uid}
+    elapsed = max(time.perf_counter() - started, 1e-6)
+    print(f"  ↳ auth.users: {len(created)} of {len(accounts)} accounts, {elapsed:.1f}s ({len(created) / elapsed:.0f} users/s)")
+    return created
+
+
+# -----------------------------
+# Sample data
+# -----------------------------
+def seed_chefs(auth_concurrency: int = AUTH_CONCURRENCY):
+    """Create or update the sample chefs: missing auth users in parallel, profiles in one upsert."""
+    print("\n🧑‍🍳 Creating new chefs...")
+    emails = [chef["user_email"] for chef in SAMPLE_CHEFS]
+    existing = supabase_admin.table("users").select("user_id, user_email").in_("user_email", emails).execute()
+    ids = {row["user_email"]: row["user_id"] for row in existing.data or []}
+    known = set(ids)
+
+    missing = []
     for chef_data in SAMPLE_CHEFS:
-        email = chef_data["user_email"]
-        
-        # Check if user already exists in public.users
-        existing = supabase_admin.table("users").select("user_id").eq("user_email", email).execute()
-        
-        if existing.data:
-            user_id = existing.data[0]["user_id"]
+        if chef_data["user_email"] in known:
             print(f"  ⚠️ {chef_data['user_full_name']} already exists, updating...")
-            # Update existing user
-            update_data = {
-                "user_is_chef": True,
-                "user_is_on_fire": chef_data["user_is_on_fire"],
-                "user_bio": chef_data["user_bio"],
-                "user_story": chef_data["user_story"],
-                "user_specialties": chef_data["user_specialties"],
-                "user_avatar": chef_data["user_avatar"],
-            }
-            supabase_admin.table("users").update(update_data).eq("user_id", user_id).execute()
         else:
-            # Create auth user via REST API
-            create_payload = {
-                "email": email,
-                "password": "ChefKit123!",
-                "email_confirm": True,
-                "user_metadata": {"full_name": chef_data["user_full_name"]}
-            }
-            
-            resp = requests.post(auth_url, headers=headers, json=create_payload)
-            
-            if resp.status_code == 200 or resp.status_code == 201:
-                user_id = resp.json()["id"]
-                
-                # Insert into public.users
-                user_record = {
-                    "user_id": user_id,
-                    "user_email": email,
-                    "user_full_name": chef_data["user_full_name"],
-                    "user_is_chef": True,
-                    "user_is_on_fire": chef_data["user_is_on_fire"],
-                    "user_bio": chef_data["user_bio"],
-                    "user_story": chef_data["user_story"],
-                    "user_specialties": chef_data["user_specialties"],
-                    "user_avatar": chef_data["user_avatar"],
-                }
-                supabase_admin.table("users").insert(user_record).execute()
-                status = "🔥" if chef_data["user_is_on_fire"] else "👨‍🍳"
-                print(f"  {status} Created: {chef_data['user_full_name']} ({email})")
-            else:
-                print(f"  ❌ Failed to create {email}: {resp.status_code} - {resp.text}")
-                continue
-        
-        chef_ids.append(user_id)
-    
-    return chef_ids
+            missing.append({"email": chef_data["user_email"], "full_name": chef_data["user_full_name"]})
+    ids.update(create_auth_users(missing, auth_concurrency))
+
+    rows = []
+    for chef_data in SAMPLE_CHEFS:
+        user_id = ids.get(chef_data["user_email"])
+        if not user_id:
+            continue
+        rows.append({**chef_data, "user_id": user_id, "user_is_chef": True})
+        if chef_data["user_email"] not in known:
+            status = "🔥" if chef_data["user_is_on_fire"] else "👨‍🍳"
+            print(f"  {status} Created: {chef_data['user_full_name']} ({chef_data['user_email']})")
+    bulk_upsert("users", rows, "user_id")
+    return [row["user_id"] for row in rows]
 
 
 def seed_recipes(chef_ids):
-    """Create sample recipes owned by chefs."""
+    """Create or update the sample recipes (matched by name), owned by the chefs, in one upsert."""
     print("\n🍳 Seeding recipes...")
-    
+    names = [recipe["recipe_name"] for recipe in SAMPLE_RECIPES]
+    existing = supabase_admin.table("recipe").select("recipe_id, recipe_name").in_("recipe_name", names).execute()
+    ids = {row["recipe_name"]: row["recipe_id"] for row in existing.data or []}
+
+    rows = []
     for i, recipe_data in enumerate(SAMPLE_RECIPES):
-        # Assign recipe to a chef (cycle through available chefs)
-        recipe_owner = chef_ids[i % len(chef_ids)]
-        recipe_data["recipe_owner"] = recipe_owner
-        
-        # Check if recipe already exists
-        existing = supabase_admin.table("recipe").select("recipe_id").eq("recipe_name", recipe_data["recipe_name"]).execute()
-        
-        if existing.data:
-            # Update existing recipe
-            recipe_id = existing.data[0]["recipe_id"]
-            supabase_admin.table("recipe").update(recipe_data).eq("recipe_id", recipe_id).execute()
-            print(f"  ✓ Updated: {recipe_data['recipe_name']}")
-        else:
-            # Insert new recipe
-            supabase_admin.table("recipe").insert(recipe_data).execute()
-            print(f"  ✓ Created: {recipe_data['recipe_name']}")
+        name = recipe_data["recipe_name"]
+        rows.append({
+            **recipe_data,
+            "recipe_id": ids.get(name) or str(uuid.uuid4()),
+            # Assign recipe to a chef (cycle through available chefs)
+            "recipe_owner": chef_ids[i % len(chef_ids)],
+        })
+        print(f"  ✓ {'Updated' if name in ids else 'Created'}: {name}")
+    bulk_upsert("recipe", rows, "recipe_id")
+
+
+# -----------------------------
+# Synthetic dataset (--scale)
+# -----------------------------
+def user_id(index: int) -> str:
+    return str(uuid.uuid5(_NAMESPACE, f"user-{index}"))
+
 
+def chef_id(index: int) -> str:
+    return str(uuid.uuid5(_NAMESPACE, f"chef-{index}"))
+
+
+def recipe_id(index: int) -> str:
+    return str(uuid.uuid5(_NAMESPACE, f"recipe-{index}"))
+
+
+def dataset_sizes(scale: int) -> Dict[str, int]:
+    return {
+        "chefs": len(SAMPLE_CHEFS) * scale,
+        "recipes": len(SAMPLE_RECIPES) * scale,
+        "users": 20 * scale,
+    }
+
+
+def generate_dataset(scale: int, favourites: int = 20, follows: int = 10,
+                     seed: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+    """Every sample chef/recipe repeated `scale` times with fresh IDs, plus regular users.
+
+    Returns {"users", "recipe", "follows"}; favourites live in each user's
+    user_favourite_recipees. The same arguments always give the same rows.
+    """
+    rng = random.Random(seed)
+    sizes = dataset_sizes(scale)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    users = []
+    for i in range(sizes["chefs"]):
+        sample = SAMPLE_CHEFS[i % len(SAMPLE_CHEFS)]
+        users.append({
+            **sample,
+            "user_id": chef_id(i),
+            "user_email": f"chef{i}@bench.local",
+            "user_full_name": f"{sample['user_full_name']} {i}",
+            "user_favourite_recipees": [],
+        })
+    chef_ids = [u["user_id"] for u in users]
+
+    recipes = []
+    for i in range(sizes["recipes"]):
+        sample = SAMPLE_RECIPES[i % len(SAMPLE_RECIPES)]
+        recipes.append({
+            **sample,
+            "recipe_id": recipe_id(i),
+            "recipe_name": f"{sample['recipe_name']} #{i}",
+            "recipe_owner": chef_ids[i % len(chef_ids)],
+            "recipe_created_at": (now - timedelta(minutes=i)).isoformat(),
+        })
+    recipe_ids = [r["recipe_id"] for r in recipes]
+
+    follow_rows = []
+    for i in range(sizes["users"]):
+        uid = user_id(i)
+        users.append({
+            "user_id": uid,
+            "user_email": f"user{i}@bench.local",
+            "user_full_name": f"Bench User {i}",
+            "user_is_chef": False,
+            "user_is_on_fire": False,
+            "user_favourite_recipees": rng.sample(recipe_ids, min(favourites, len(recipe_ids))),
+        })
+        for followed in rng.sample(chef_ids, min(follows, len(chef_ids))):
+            follow_rows.append({"follower_id": uid, "following_id": followed})
+
+    return {"users": users, "recipe": recipes, "follows": follow_rows}
+
+
+def _existing_ids(table: str, column: str, values: List[str], batch_size: int) -> set:
+    found = set()
+    for start in range(0, len(values), batch_size):
+        resp = supabase_admin.table(table).select(column).in_(column, values[start:start + batch_size]).execute()
+        found.update(row[column] for row in resp.data or [])
+    return found
+
+
+def seed_synthetic(scale: int, favourites: int = 20, follows: int = 10, seed: int = 1,
+                   batch_size: int = BATCH_SIZE, auth_concurrency: int = AUTH_CONCURRENCY,
+                   skip_auth: bool = False) -> Dict[str, int]:
+    """Write generate_dataset(scale) with bulk upserts; returns row counts per table."""
+    started = time.perf_counter()
+    tables = generate_dataset(scale, favourites, follows, seed)
+    users = tables["users"]
+    print(f"\n🧪 Generated {len(users)} users, {len(tables['recipe'])} recipes and "
+          f"{len(tables['follows'])} follows in {time.perf_counter() - started:.1f}s")
+
+    if not skip_auth:
+        print("\n🔐 Creating auth users...")
+        # Lookups are batched too: an `in` filter with every id would not fit in a URL
+        known = _existing_ids("users", "user_id", [u["user_id"] for u in users], min(batch_size, 200))
+        missing = [
+            {"id": u["user_id"], "email": u["user_email"], "full_name": u["user_full_name"]}
+            for u in users if u["user_id"] not in known
+        ]
+        created = create_auth_users(missing, auth_concurrency)
+        failed = len(missing) - len(created)
+        if failed:
+            raise RuntimeError(f"{failed} auth users could not be created; rerun to retry")
+
+    print("\n📦 Writing rows...")
+    bulk_upsert("users", users, "user_id", batch_size)
+    bulk_upsert("recipe", tables["recipe"], "recipe_id", batch_size)
+
+    # follows has no unique (follower, following) constraint to upsert on, so
+    # replace the generated followers' rows instead (the triggers keep counts right)
+    follow_started = time.perf_counter()
+    follower_ids = sorted({row["follower_id"] for row in tables["follows"]})
+    for start in range(0, len(follower_ids), 200):
+        supabase_admin.table("follows").delete().in_("follower_id", follower_ids[start:start + 200]).execute()
+    rows = tables["follows"]
+    for start in range(0, len(rows), batch_size):
+        supabase_admin.table("follows").insert(rows[start:start + batch_size], returning=ReturnMethod.minimal).execute()
+    _report("follows", len(rows), batch_size, follow_started)
+
+    return {"users": len(users), "recipe": len(tables["recipe"]), "follows": len(rows)}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Seed Supabase with sample or synthetic chefs and recipes.")
+    parser.add_argument("--scale", type=int, default=0,
+                        help="generate N copies of every sample chef/recipe plus 20*N users (default: samples only)")
+    parser.add_argument("--favourites", type=int, default=20, help="favourite recipes per synthetic user")
+    parser.add_argument("--follows", type=int, default=10, help="chefs followed per synthetic user")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic dataset")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per bulk upsert")
+    parser.add_argument("--auth-concurrency", type=int, default=AUTH_CONCURRENCY,
+                        help="parallel Auth admin requests when creating users")
+    parser.add_argument("--skip-auth", action="store_true",
+                        help="do not create auth users for synthetic rows")
+    args = parser.parse_args(argv)
+
+    if not supabase_admin:
+        raise ValueError("supabase_admin not initialized. Check SUPABASE_SERVICE_ROLE_KEY in .env")
 
-def main():
     print("=" * 50)
     print("Chef-Kit Database Seeder")
     print("=" * 50)
-    
+
     try:
-        chef_ids = seed_chefs()
+        started = time.perf_counter()
+        if args.scale > 0:
+            counts = seed_synthetic(args.scale, args.favourites, args.follows, args.seed,
+                                    args.batch_size, args.auth_concurrency, args.skip_auth)
+            print("\n" + "=" * 50)
+            print(f"✅ Seeding complete in {time.perf_counter() - started:.1f}s!")
+            for table, count in counts.items():
+                print(f"   - {count} {table} rows")
+            print("=" * 50)
+            return
+
+        chef_ids = seed_chefs(args.auth_concurrency)
         seed_recipes(chef_ids)
-        
+
         print("\n" + "=" * 50)
-        print("✅ Seeding complete!")
+        print(f"✅ Seeding complete in {time.perf_counter() - started:.1f}s!")
         print(f"   - {len(SAMPLE_CHEFS)} chefs")
         print(f"   - {len(SAMPLE_RECIPES)} recipes")
         print("=" * 50)
@@ -3,44 +3,89 @@
 Contains functions that wrap Supabase client operations.
 Keeping database logic here makes `app.py` simple and easy to test.
 """
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set
 import os
 import json
-import firebase_admin
-from firebase_admin import credentials, messaging
+import base64
+import hashlib
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from supabase_client import supabase, supabase_admin
-from supabase_client import set_postgrest_token
+from supabase_client import set_postgrest_token, warm_up as warm_up_supabase
+from cooking import recipe_index
+import image_upload
+import kv_store
+import metrics
+import notification_outbox
+from ttl_cache import TTLCache, SharedTTLCache
+
+# Firebase Admin is initialised on first push, not at import: importing
+# firebase_admin.messaging and loading credentials is a large share of a
+# cold start.
+_firebase_lock = threading.Lock()
+_firebase_messaging = None
+_firebase_checked = False
+
+
+def _get_messaging():
+    """Return firebase_admin.messaging once Firebase is initialised, else None.
+
+    Credentials are tried in order: env JSON -> env path -> local file.
+    """
+    global _firebase_messaging, _firebase_checked
+    if _firebase_checked:
+        return _firebase_messaging
+    with _firebase_lock:
+        if _firebase_checked:
+            return _firebase_messaging
+        try:
+            import firebase_admin
+            from firebase_admin import credentials, messaging
+
+            cred = None
+            firebase_json = os.getenv('FIREBASE_CREDENTIALS_JSON')
+            if firebase_json:
+                cred = credentials.Certificate(json.loads(firebase_json))
+
+            if cred is None:
+                cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+                if cred_path and os.path.exists(cred_path):
+                    cred = credentials.Certificate(cred_path)
+
+            if cred is None:
+                local_key = os.path.join(os.path.dirname(__file__), 'serviceAccountKey.json')
+                if os.path.exists(local_key):
+                    cred = credentials.Certificate(local_key)
+
+            if cred is None:
+                print("Warning: No Firebase credentials found. Push notifications disabled.")
+            else:
+                try:
+                    firebase_admin.get_app()
+                except ValueError:
+                    firebase_admin.initialize_app(cred)
+                _firebase_messaging = messaging
+        except Exception as e:
+            print(f"Firebase init error: {e}")
+        _firebase_checked = True
+        return _firebase_messaging
+
+
+def warm_up() -> None:
+    """Build the Supabase clients and initialise Firebase ahead of first use."""
+    warm_up_supabase()
+    _get_messaging()
 
-# Firebase Admin initialization (tries: env JSON -> env path -> local file)
-try:
-    firebase_initialized = False
-    
-    firebase_json = os.getenv('FIREBASE_CREDENTIALS_JSON')
-    if firebase_json:
-        import json as _json
-        cred_dict = _json.loads(firebase_json)
-        cred = credentials.Certificate(cred_dict)
-        firebase_admin.initialize_app(cred)
-        firebase_initialized = True
-    
-    if not firebase_initialized:
-        cred_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-        if cred_path and os.path.exists(cred_path):
-            cred = credentials.Certificate(cred_path)
-            firebase_admin.initialize_app(cred)
-            firebase_initialized = True
-    
-    if not firebase_initialized:
-        local_key = os.path.join(os.path.dirname(__file__), 'serviceAccountKey.json')
-        if os.path.exists(local_key):
-            cred = credentials.Certificate(local_key)
-            firebase_admin.initialize_app(cred)
-            firebase_initialized = True
-    
-    if not firebase_initialized:
-        print("Warning: No Firebase credentials found. Push notifications disabled.")
-except Exception as e:
-    print(f"Firebase init error: {e}")
+
+# Max ids per in_ filter so request URLs stay within PostgREST/proxy limits
+_IN_FILTER_CHUNK = 200
+
+
+# Keyset pagination defaults shared by the paged list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 def _extract_response_data(resp):
@@ -52,6 +97,93 @@ def _extract_response_data(resp):
 
     data = getattr(resp, "data", None)
     return data
+
+
+class InvalidQueryParam(ValueError):
+    """Malformed ?cursor=, ?limit=, ?view= or ?fields= on a list route (a 400, not a 500)."""
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque next-page token holding the sort key of the last row served."""
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, key_count: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise InvalidQueryParam("invalid_cursor")
+    if not isinstance(values, list) or len(values) != key_count:
+        raise InvalidQueryParam("invalid_cursor")
+    return values
+
+
+def _quote_filter_value(value: Any) -> str:
+    """Quote a value for use inside a PostgREST or=() expression."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+
+def _keyset_query(query, order: List[tuple], cursor: Optional[str], limit: Optional[int]):
+    """Apply the cursor filter, ordering and limit (+1 lookahead row) to a query.
+
+    limit=None reads every row past the cursor.
+    """
+    if cursor:
+        after = decode_cursor(cursor, len(order))
+        if len(order) == 1:
+            column, desc = order[0]
+            query = query.lt(column, after[0]) if desc else query.gt(column, after[0])
+        else:
+            # (a, b) after (A, B): a past A, or a = A and b past B
+            (first, first_desc), (second, second_desc) = order
+            first_op = "lt" if first_desc else "gt"
+            second_op = "lt" if second_desc else "gt"
+            first_value = _quote_filter_value(after[0])
+            second_value = _quote_filter_value(after[1])
+            query = query.or_(
+                f"{first}.{first_op}.{first_value},"
+                f"and({first}.eq.{first_value},{second}.{second_op}.{second_value})"
+            )
+    for column, desc in order:
+        query = query.order(column, desc=desc)
+    if limit is None:
+        return query
+    # Read one extra row to learn whether another page exists
+    return query.limit(limit + 1)
+
+
+def _keyset_result(rows: List[Dict[str, Any]], order: List[tuple], limit: Optional[int]) -> Dict[str, Any]:
+    if limit is None:
+        return {"items": rows, "next_cursor": None}
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and items:
+        next_cursor = encode_cursor([items[-1].get(column) for column, _ in order])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _page_limit(limit: Optional[int]) -> Optional[int]:
+    if limit is None:
+        return None
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def _keyset_page(query, order: List[tuple], cursor: Optional[str], limit: Optional[int]) -> Dict[str, Any]:
+    """Fetch one page ordered by `order` [(column, desc), ...] after `cursor`.
+
+    The last column must be unique so the ordering is stable. Returns
+    {"items": [...], "next_cursor": str | None}; with limit=None the page
+    is everything past the cursor and next_cursor is None.
+    """
+    limit = _page_limit(limit)
+    resp = _keyset_query(query, order, cursor, limit).execute()
+    rows = _extract_response_data(resp) or []
+    return _keyset_result(rows, order, limit)
+
+
 # -----------------------------
 # Auth
 # -----------------------------
@@ -340,21 +472,91 @@ _RECIPE_COLUMNS = (
     "recipe_ingredients, recipe_instructions, recipe_tags, recipe_is_trending, recipe_is_seasonal, title_ar, title_fr, tags_ar, tags_fr, steps_ar, steps_fr, basic_ingredients"
 )
 
-def get_all_recipes(tag: Optional[str] = None) -> List[Dict[str, Any]]:
-    query = supabase.table("recipe").select(_RECIPE_COLUMNS)
+# Just what a recipe card/tile renders (title, subtitle, image, times, tags):
+# no ingredients or steps. The default on list routes; ?view=detail opts out.
+_RECIPE_CARD_COLUMNS = (
+    "recipe_id, recipe_name, recipe_description, recipe_image_url, recipe_owner, "
+    "recipe_servings_count, recipe_prep_time, recipe_cook_time, recipe_calories, "
+    "recipe_tags, recipe_is_trending, recipe_is_seasonal, title_ar, title_fr, tags_ar, tags_fr"
+)
+
+RECIPE_VIEWS = {
+    "card": _RECIPE_CARD_COLUMNS,
+    "list": _RECIPE_COLUMNS,
+    "detail": "*",
+}
+
+_RECIPE_FIELD_NAMES = {c.strip() for c in _RECIPE_COLUMNS.split(",")} | {"recipe_external_source"}
+
+
+def recipe_projection(view: Optional[str] = None, fields: Optional[str] = None, default: str = "list") -> str:
+    """Resolve a ?view= / ?fields= pair into a select() column list.
+
+    `fields` (comma-separated known columns) wins over `view`; recipe_id is
+    always included because pagination and favourites key on it.
+    """
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in requested if f not in _RECIPE_FIELD_NAMES]
+        if unknown:
+            raise InvalidQueryParam(f"invalid_fields: {', '.join(unknown)}")
+        columns = ["recipe_id"] + [f for f in dict.fromkeys(requested) if f != "recipe_id"]
+        return ", ".join(columns)
+    view = view or default
+    if view not in RECIPE_VIEWS:
+        raise InvalidQueryParam(f"invalid_view: expected one of {', '.join(RECIPE_VIEWS)}")
+    return RECIPE_VIEWS[view]
+
+
+def project_recipe_rows(rows: List[Dict[str, Any]], columns: str) -> List[Dict[str, Any]]:
+    """Apply a projection to rows that were loaded in full (e.g. /api/cook results)."""
+    if columns == "*":
+        return rows
+    keep = {c.strip() for c in columns.split(",")} | {"score", "isFavorite"}
+    return [{k: v for k, v in row.items() if k in keep} for row in rows]
+
+
+# Read-through cache for the public recipe lists. Recipe writes in this process
+# clear it; other workers see changes after at most RECIPE_CACHE_TTL_SECONDS.
+_recipe_list_cache = TTLCache(
+    max_size=int(os.getenv("RECIPE_CACHE_MAX_ENTRIES", "256")),
+    ttl=float(os.getenv("RECIPE_CACHE_TTL_SECONDS", "60")),
+)
+
+
+def invalidate_recipe_caches() -> None:
+    """Drop cached recipe lists after a recipe write."""
+    _recipe_list_cache.clear()
+
+
+_RECIPE_PAGE_ORDER = [("recipe_id", False)]
+RECIPE_PAGE_SIZE = 100
+
+
+def get_recipes_page(tag: Optional[str] = None, cursor: Optional[str] = None, limit: int = RECIPE_PAGE_SIZE,
+                     columns: str = _RECIPE_COLUMNS) -> Dict[str, Any]:
+    """One page of recipes ordered by recipe_id, optionally filtered by tag."""
+    return _recipe_list_cache.get_or_load(
+        ("all", tag, cursor, limit, columns), lambda: _fetch_recipes_page(tag, cursor, limit, columns)
+    )
+
+
+def _fetch_recipes_page(tag: Optional[str], cursor: Optional[str], limit: int, columns: str) -> Dict[str, Any]:
+    query = supabase.table("recipe").select(columns)
     if tag:
         query = query.contains("recipe_tags", [tag])
-    # Limit to 100 to show more recipes
-    resp = query.limit(100).execute()
-    data = _extract_response_data(resp)
-    return data or []
+    return _keyset_page(query, _RECIPE_PAGE_ORDER, cursor, limit)
 
 
-def get_seasonal_recipes() -> List[Dict[str, Any]]:
+def get_seasonal_recipes(columns: str = _RECIPE_COLUMNS) -> List[Dict[str, Any]]:
     """
     Get all recipes marked as seasonal.
     """
-    query = supabase.table("recipe").select(_RECIPE_COLUMNS).eq("recipe_is_seasonal", True)
+    return _recipe_list_cache.get_or_load(("seasonal", columns), lambda: _fetch_seasonal_recipes(columns))
+
+
+def _fetch_seasonal_recipes(columns: str) -> List[Dict[str, Any]]:
+    query = supabase.table("recipe").select(columns).eq("recipe_is_seasonal", True)
     # Limit to 20 for now
     resp = query.limit(20).execute()
     data = _extract_response_data(resp)
@@ -371,8 +573,8 @@ def get_recipes_result(ingredients: List[str] = None) -> List[Dict[str, Any]]:
     return data or []
 
 
-def get_recipe(recipe_id: str) -> Dict[str, Any]:
-    resp = supabase.table("recipe").select("*").eq("recipe_id", recipe_id).single().execute()
+def get_recipe(recipe_id: str, columns: str = "*") -> Dict[str, Any]:
+    resp = supabase.table("recipe").select(columns).eq("recipe_id", recipe_id).single().execute()
     data = _extract_response_data(resp)
     return data or {}
 
@@ -381,47 +583,86 @@ def create_recipe(data: Dict[str, Any]) -> Dict[str, Any]:
     resp = supabase.table("recipe").insert(data).execute()
     result = _extract_response_data(resp)
     
-    # Notify followers
-    try:
-        if isinstance(result, list) and result:
-            recipe_data = result[0]
-        elif isinstance(result, dict):
-            recipe_data = result
-        else:
-            recipe_data = {}
-
-        if recipe_data:
-            owner_id = recipe_data.get('recipe_owner')
-            recipe_id = recipe_data.get('recipe_id')
-            recipe_name = recipe_data.get('recipe_name')
-            
-            if owner_id:
-                # Get followers
-                followers_resp = supabase.table("follows").select("follower_id").eq("following_id", owner_id).execute()
-                followers = _extract_response_data(followers_resp)
-                
-                if followers:
-                    notifications = []
-                    for f in followers:
-                        notifications.append({
-                            "user_id": f['follower_id'],
-                            "notification_title": "New Recipe",
-                            "notification_type": "new_recipe",
-                            "notification_message": f"Chef you follow posted: {recipe_name}",
-                            "notification_data": {"recipe_id": recipe_id, "chef_id": owner_id}
-                        })
-                    
-                        supabase.table("notifications").insert(notifications).execute()
-                        
-                        # Send Push Notifications
-                        for n in notifications:
-                            _send_push_notification(n)
-    except Exception as e:
-        print(f"Error creating new recipe notifications: {e}")
+    if isinstance(result, list) and result:
+        recipe_data = result[0]
+    elif isinstance(result, dict):
+        recipe_data = result
+    else:
+        recipe_data = {}
+
+    # Keep the /api/cook ingredient index and list caches in sync
+    if recipe_data:
+        recipe_index.upsert(recipe_data)
+    invalidate_recipe_caches()
+
+    # Notify followers off the request path
+    owner_id = recipe_data.get('recipe_owner') if recipe_data else None
+    if owner_id:
+        try:
+            notification_outbox.enqueue("recipe_created", {
+                "owner_id": owner_id,
+                "recipe_id": recipe_data.get('recipe_id'),
+                "recipe_name": recipe_data.get('recipe_name'),
+            })
+        except Exception as e:
+            print(f"Error creating new recipe notifications: {e}")
         
     return result
 
 
+_NOTIFICATION_INSERT_CHUNK = 500
+
+# Namespace for notification ids derived from an outbox event and recipient
+_NOTIFICATION_ID_NAMESPACE = uuid.UUID("3b0c62f5-2a41-4d0e-9c55-8f6e1d7a4b29")
+
+
+def _insert_notifications_once(client, rows: List[Dict[str, Any]], event_key: str) -> List[Dict[str, Any]]:
+    """Insert notification rows at most once per (event, recipient).
+
+    Each row's notification_id is derived from `event_key` and its user_id,
+    and rows whose id already exists are skipped, so a retried outbox job
+    does not notify anyone twice. Returns only the rows inserted now.
+    """
+    for row in rows:
+        row["notification_id"] = str(uuid.uuid5(_NOTIFICATION_ID_NAMESPACE, f"{event_key}:{row['user_id']}"))
+    resp = client.table("notifications").upsert(
+        rows, on_conflict="notification_id", ignore_duplicates=True
+    ).execute()
+    return _extract_response_data(resp) or []
+
+
+def _notify_followers_of_recipe(payload: Dict[str, Any]) -> None:
+    """Outbox handler: notify every follower of a chef about a new recipe.
+
+    Safe to retry: followers already notified by an earlier attempt are
+    skipped, and pushes only go to the rows this attempt inserted.
+    """
+    owner_id = payload.get("owner_id")
+    recipe_id = payload.get("recipe_id")
+    recipe_name = payload.get("recipe_name")
+    client = supabase_admin if supabase_admin else supabase
+
+    followers_resp = client.table("follows").select("follower_id").eq("following_id", owner_id).execute()
+    followers = _extract_response_data(followers_resp) or []
+
+    notifications = [{
+        "user_id": f['follower_id'],
+        "notification_title": "New Recipe",
+        "notification_type": "new_recipe",
+        "notification_message": f"Chef you follow posted: {recipe_name}",
+        "notification_data": {"recipe_id": recipe_id, "chef_id": owner_id}
+    } for f in followers]
+
+    for start in range(0, len(notifications), _NOTIFICATION_INSERT_CHUNK):
+        chunk = notifications[start:start + _NOTIFICATION_INSERT_CHUNK]
+        inserted = _insert_notifications_once(client, chunk, f"new_recipe:{recipe_id}")
+        # Send Push Notifications in batched multicasts
+        _send_push_notifications(inserted)
+
+
+notification_outbox.register_handler("recipe_created", _notify_followers_of_recipe)
+
+
 def update_recipe(recipe_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
     # Execute update
     resp = supabase.table("recipe").update(data).eq("recipe_id", recipe_id).execute()
@@ -432,17 +673,68 @@ def update_recipe(recipe_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         fetch_resp = supabase.table("recipe").select("*").eq("recipe_id", recipe_id).single().execute()
         result = _extract_response_data(fetch_resp)
     
+    invalidate_recipe_caches()
     if isinstance(result, list) and result:
+        recipe_index.upsert(result[0])
         return result[0]
     elif isinstance(result, dict):
+        recipe_index.upsert(result)
         return result
     
     return {}
 
 
+def set_recipe_image(recipe_id: str, image_url: str) -> Optional[Dict[str, Any]]:
+    """Set a recipe's image; None when no row was updated (missing, or not the caller's under RLS)."""
+    rows = _extract_response_data(
+        supabase.table("recipe").update({"recipe_image_url": image_url}).eq("recipe_id", recipe_id).execute()
+    ) or []
+    if not rows:
+        return None
+    invalidate_recipe_caches()
+    recipe_index.upsert(rows[0])
+    return rows[0]
+
+
+def queue_upload_size_check(public_id: str, secure_url: str, user_id: str, kind: str,
+                            recipe_id: Optional[str] = None) -> None:
+    """Check a confirmed direct upload's size off the request path (see _check_upload_size)."""
+    notification_outbox.enqueue("upload_size_check", {
+        "public_id": public_id,
+        "secure_url": secure_url,
+        "user_id": user_id,
+        "kind": kind,
+        "recipe_id": recipe_id,
+    })
+
+
+def _check_upload_size(payload: Dict[str, Any]) -> None:
+    """Outbox handler: delete a direct upload over MAX_UPLOAD_BYTES and unset the URL stored for it."""
+    if image_upload.delete_if_oversize(payload["public_id"]) is None:
+        return
+    client = supabase_admin if supabase_admin else supabase
+    url = payload["secure_url"]
+    # Only where the URL is still the one confirmed, so a newer image is kept
+    if payload.get("kind") == "avatar":
+        client.table("users").update({"user_avatar": None}).eq("user_id", payload["user_id"]).eq("user_avatar", url).execute()
+    elif payload.get("recipe_id"):
+        rows = _extract_response_data(
+            client.table("recipe").update({"recipe_image_url": None})
+            .eq("recipe_id", payload["recipe_id"]).eq("recipe_image_url", url).execute()
+        ) or []
+        if rows:
+            invalidate_recipe_caches()
+            recipe_index.upsert(rows[0])
+
+
+notification_outbox.register_handler("upload_size_check", _check_upload_size)
+
+
 def delete_recipe(recipe_id: str) -> None:
     resp = supabase.table("recipe").delete().eq("recipe_id", recipe_id).execute()
     _extract_response_data(resp)
+    recipe_index.remove(recipe_id)
+    invalidate_recipe_caches()
     return None
 
 
@@ -475,12 +767,15 @@ def create_ingredient(data: Dict[str, Any]) -> Dict[str, Any]:
 # -----------------------------
 # Notifications
 # -----------------------------
-def get_notifications_for_user(user_id: str) -> List[Dict[str, Any]]:
-    # Use admin client to bypass RLS if needed, or ensure RLS allows users to read their own notifications
+_NOTIFICATION_PAGE_ORDER = [("notification_created_at", True), ("notification_id", True)]
+
+
+def get_notifications_page(user_id: str, cursor: Optional[str] = None,
+                           limit: Optional[int] = DEFAULT_PAGE_SIZE) -> Dict[str, Any]:
+    """One page of a user's notifications, newest first."""
     client = supabase_admin if supabase_admin else supabase
-    resp = client.table("notifications").select("*").eq("user_id", user_id).order("notification_created_at", desc=True).execute()
-    data = _extract_response_data(resp)
-    return data or []
+    query = client.table("notifications").select("*").eq("user_id", user_id)
+    return _keyset_page(query, _NOTIFICATION_PAGE_ORDER, cursor, limit)
 
 
 def update_fcm_token(user_id: str, token: str) -> Dict[str, Any]:
@@ -518,63 +813,140 @@ def update_fcm_token(user_id: str, token: str) -> Dict[str, Any]:
         return {"error": str(e)}
 
 
-def _send_push_notification(data: Dict[str, Any]) -> None:
-    """Send FCM push notification to user's devices."""
+_FCM_BATCH_SIZE = 500  # FCM multicast limit per request
+
+
+def _parse_device_tokens(devices_raw: Any) -> List[str]:
+    """Decode a user_devices value (JSON string or list) into a token list."""
+    devices = devices_raw
+    if isinstance(devices_raw, str):
+        try:
+            devices = json.loads(devices_raw)
+        except ValueError:
+            return []
+    if not isinstance(devices, list):
+        return []
+    return [token for token in devices if isinstance(token, str) and token]
+
+
+def _fetch_device_tokens(user_ids: List[str]) -> Dict[str, List[str]]:
+    """Load device tokens for many users with chunked in_ queries."""
+    client = supabase_admin if supabase_admin else supabase
+    unique_ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+    tokens_by_user: Dict[str, List[str]] = {}
+    for start in range(0, len(unique_ids), _IN_FILTER_CHUNK):
+        chunk = unique_ids[start:start + _IN_FILTER_CHUNK]
+        resp = client.table("users").select("user_id, user_devices").in_("user_id", chunk).execute()
+        for row in _extract_response_data(resp) or []:
+            tokens = _parse_device_tokens(row.get("user_devices"))
+            if tokens:
+                tokens_by_user[row["user_id"]] = tokens
+    return tokens_by_user
+
+
+def _prune_device_tokens(stale_by_user: Dict[str, set]) -> None:
+    """Remove tokens FCM reported as unregistered from users.user_devices."""
+    client = supabase_admin if supabase_admin else supabase
+    current = _fetch_device_tokens(list(stale_by_user.keys()))
+    for user_id, stale in stale_by_user.items():
+        tokens = current.get(user_id, [])
+        remaining = [token for token in tokens if token not in stale]
+        if len(remaining) == len(tokens):
+            continue
+        try:
+            client.table("users").update({
+                "user_devices": json.dumps(remaining)
+            }).eq("user_id", user_id).execute()
+        except Exception as e:
+            print(f"Error pruning device tokens for {user_id}: {e}")
+
+
+def _build_multicast_message(messaging, tokens: List[str], title: str, body: str,
+                             fcm_data: Dict[str, str]) -> Any:
+    return messaging.MulticastMessage(
+        tokens=tokens,
+        notification=messaging.Notification(title=title, body=body),
+        data=fcm_data,
+        android=messaging.AndroidConfig(
+            priority="high",
+            notification=messaging.AndroidNotification(
+                channel_id="chef_kit_notifications",
+                priority="high",
+            ),
+        ),
+        apns=messaging.APNSConfig(
+            headers={"apns-priority": "10"},
+            payload=messaging.APNSPayload(
+                aps=messaging.Aps(content_available=True),
+            ),
+        ),
+    )
+
+
+def _send_push_notifications(notifications: List[Dict[str, Any]], tokens_by_user: Optional[Dict[str, List[str]]] = None) -> None:
+    """Send FCM pushes for many notification rows.
+
+    Device tokens for all recipients are read in one in_ query, recipients
+    that share the same title/body/data are sent together with
+    send_each_for_multicast (500 tokens per batch), and tokens FCM reports as
+    unregistered are pruned from user_devices. Callers that already hold the
+    recipients' tokens can pass them as tokens_by_user to skip the lookup.
+    """
     try:
-        user_id = data.get("user_id")
-        title = data.get("notification_title")
-        body = data.get("notification_message")
-        
-        if not (user_id and title and body):
+        messaging = _get_messaging()
+        if messaging is None:
             return
-            
-        client = supabase_admin if supabase_admin else supabase
-        user_resp = client.table("users").select("user_devices").eq("user_id", user_id).single().execute()
-        user_data = _extract_response_data(user_resp)
-        devices_json = user_data.get("user_devices")
-        
-        if not devices_json:
+
+        valid = [
+            n for n in notifications
+            if n.get("user_id") and n.get("notification_title") and n.get("notification_message")
+        ]
+        if not valid:
             return
-            
-        tokens = []
-        try:
-            tokens = json.loads(devices_json)
-        except:
-            pass
-            
-        if not tokens or not isinstance(tokens, list):
+
+        if tokens_by_user is None:
+            tokens_by_user = _fetch_device_tokens([n["user_id"] for n in valid])
+        if not tokens_by_user:
             return
-        
-        # Build FCM data payload
-        fcm_data = {k: str(v) for k, v in data.get("notification_data", {}).items()}
-        if data.get("notification_type"):
-            fcm_data["notification_type"] = str(data.get("notification_type"))
-        
-        for token in tokens:
-            try:
-                message = messaging.Message(
-                    notification=messaging.Notification(title=title, body=body),
-                    data=fcm_data,
-                    token=token,
-                    android=messaging.AndroidConfig(
-                        priority="high",
-                        notification=messaging.AndroidNotification(
-                            channel_id="chef_kit_notifications",
-                            priority="high",
-                        ),
-                    ),
-                    apns=messaging.APNSConfig(
-                        headers={"apns-priority": "10"},
-                        payload=messaging.APNSPayload(
-                            aps=messaging.Aps(content_available=True),
-                        ),
-                    ),
-                )
-                messaging.send(message)
-            except Exception:
-                pass
-    except Exception:
-        pass
+
+        # Group recipients by identical message content
+        groups: Dict[tuple, List[tuple]] = {}
+        for n in valid:
+            tokens = tokens_by_user.get(n["user_id"])
+            if not tokens:
+                continue
+            # Build FCM data payload
+            fcm_data = {k: str(v) for k, v in (n.get("notification_data") or {}).items()}
+            if n.get("notification_type"):
+                fcm_data["notification_type"] = str(n.get("notification_type"))
+            key = (n["notification_title"], n["notification_message"], tuple(sorted(fcm_data.items())))
+            recipients = groups.setdefault(key, [])
+            recipients.extend((token, n["user_id"]) for token in tokens)
+
+        stale_by_user: Dict[str, set] = {}
+        for (title, body, data_items), recipients in groups.items():
+            for start in range(0, len(recipients), _FCM_BATCH_SIZE):
+                batch = recipients[start:start + _FCM_BATCH_SIZE]
+                message = _build_multicast_message(messaging, [token for token, _ in batch], title, body, dict(data_items))
+                try:
+                    with metrics.upstream_timer("fcm", "send_each_for_multicast"):
+                        response = messaging.send_each_for_multicast(message)
+                except Exception as e:
+                    print(f"FCM multicast failed: {e}")
+                    continue
+                for (token, user_id), result in zip(batch, response.responses):
+                    if not result.success and isinstance(result.exception, messaging.UnregisteredError):
+                        stale_by_user.setdefault(user_id, set()).add(token)
+
+        if stale_by_user:
+            _prune_device_tokens(stale_by_user)
+    except Exception as e:
+        print(f"Error sending push notifications: {e}")
+
+
+def _send_push_notification(data: Dict[str, Any]) -> None:
+    """Send FCM push notification to user's devices."""
+    _send_push_notifications([data])
 
 
 def create_notification(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -629,16 +1001,20 @@ def get_chef_by_id(chef_id: str) -> Dict[str, Any]:
     return data or {}
 
 
-def get_recipes_by_chef(chef_id: str) -> List[Dict[str, Any]]:
-    """Get all recipes created by a specific chef."""
-    resp = supabase.table("recipe").select("*").eq("recipe_owner", chef_id).execute()
-    data = _extract_response_data(resp)
-    return data or []
+def get_recipes_by_chef_page(chef_id: str, cursor: Optional[str] = None, limit: Optional[int] = RECIPE_PAGE_SIZE,
+                             columns: str = "*") -> Dict[str, Any]:
+    """One page of a chef's recipes ordered by recipe_id."""
+    query = supabase.table("recipe").select(columns).eq("recipe_owner", chef_id)
+    return _keyset_page(query, _RECIPE_PAGE_ORDER, cursor, limit)
 
 
-def get_trending_recipes() -> List[Dict[str, Any]]:
+def get_trending_recipes(columns: str = _RECIPE_COLUMNS) -> List[Dict[str, Any]]:
     """Get all recipes marked as trending."""
-    resp = supabase.table("recipe").select(_RECIPE_COLUMNS).eq("recipe_is_trending", True).limit(10).execute()
+    return _recipe_list_cache.get_or_load(("trending", columns), lambda: _fetch_trending_recipes(columns))
+
+
+def _fetch_trending_recipes(columns: str) -> List[Dict[str, Any]]:
+    resp = supabase.table("recipe").select(columns).eq("recipe_is_trending", True).limit(10).execute()
     data = _extract_response_data(resp)
     return data or []
 
@@ -646,67 +1022,213 @@ def get_trending_recipes() -> List[Dict[str, Any]]:
 # -----------------------------
 # Follow/Unfollow functionality
 # -----------------------------
+# Which of a page's user ids the viewer follows, kept in kv_store under a
+# per-viewer version that toggle_follow replaces, so every worker stops
+# using the old answers at once; each process reuses its copy for at most
+# SHARED_CACHE_LOCAL_TTL_SECONDS.
+FOLLOWING_CACHE_MAX_ENTRIES = int(os.getenv("FOLLOWING_CACHE_MAX_ENTRIES", "1024"))
+FOLLOWING_CACHE_TTL_SECONDS = float(os.getenv("FOLLOWING_CACHE_TTL_SECONDS", "60"))
+SHARED_CACHE_LOCAL_TTL_SECONDS = float(os.getenv("SHARED_CACHE_LOCAL_TTL_SECONDS", "2"))
+_following_cache = SharedTTLCache(
+    "following",
+    max_size=FOLLOWING_CACHE_MAX_ENTRIES,
+    ttl=FOLLOWING_CACHE_TTL_SECONDS,
+    local_ttl=SHARED_CACHE_LOCAL_TTL_SECONDS,
+    encode=sorted,
+    decode=frozenset,
+)
+_FOLLOWING_VERSION_KEY = "following-version:"
+
+_FOLLOW_TOGGLE_RPC = "toggle_follow"
+# Flipped off the first time PostgREST reports the RPC is not installed.
+_follow_rpc_available = True
+# Asked of the fallback's delete/insert: the followed chef's follower count.
+# PostgREST runs a write and its embeds as one statement, so the count is
+# read from before the follows trigger updates it.
+_FOLLOW_WRITE_RETURNING = "following_id,chef:users!following_id(user_followers_count)"
+
+
+def _following_cache_key(follower_id: str, candidate_ids: List[str]) -> str:
+    """_following_cache key for one viewer's answer about these candidates."""
+    try:
+        version = kv_store.get(_FOLLOWING_VERSION_KEY + follower_id) or "0"
+    except Exception as e:
+        print(f"[follows] could not read cache version: {e}")
+        version = "0"
+    digest = hashlib.sha1("\n".join(sorted(set(candidate_ids))).encode()).hexdigest()
+    return f"{follower_id}:{version}:{digest}"
+
+
+def _load_following_among(follower_id: str, candidate_ids: List[str]) -> frozenset:
+    client = supabase_admin if supabase_admin else supabase
+    following: Set[str] = set()
+    # Chunk very long lists so the in_ filter stays within URL length limits
+    for start in range(0, len(candidate_ids), _IN_FILTER_CHUNK):
+        chunk = candidate_ids[start:start + _IN_FILTER_CHUNK]
+        resp = client.table("follows").select("following_id").eq("follower_id", follower_id).in_("following_id", chunk).execute()
+        following.update(row["following_id"] for row in _extract_response_data(resp) or [])
+    return frozenset(following)
+
+
+def _following_among(follower_id: str, candidate_ids: List[str]) -> frozenset:
+    key = _following_cache_key(follower_id, candidate_ids)
+    return _following_cache.get_or_load(key, lambda: _load_following_among(follower_id, candidate_ids))
+
+
+def _invalidate_following_cache(follower_id: str) -> None:
+    # A new version rather than patching cached answers: it also orphans an
+    # answer a concurrent read is about to store. Kept past the answers' TTL
+    # so the version cannot fall back to one they were stored under.
+    kv_store.put(_FOLLOWING_VERSION_KEY + follower_id, uuid.uuid4().hex, 2 * FOLLOWING_CACHE_TTL_SECONDS + 60)
+
+
 def check_if_following(follower_id: str, following_id: str) -> bool:
     """Check if follower_id is following following_id."""
     try:
-        client = supabase_admin if supabase_admin else supabase
-        resp = client.table("follows").select("id").eq("follower_id", follower_id).eq("following_id", following_id).execute()
-        data = _extract_response_data(resp)
-        return len(data) > 0 if data else False
+        return following_id in _following_among(follower_id, [following_id])
     except Exception as e:
         print(f"Error checking follow status: {e}")
         return False
 
 
+def get_following_set(follower_id: str, candidate_ids: List[str]) -> Set[str]:
+    """Return the subset of candidate_ids that follower_id follows."""
+    candidate_ids = list(dict.fromkeys(cid for cid in candidate_ids if cid))
+    if not follower_id or not candidate_ids:
+        return set()
+    try:
+        return set(_following_among(follower_id, candidate_ids))
+    except Exception as e:
+        print(f"Error resolving follow status: {e}")
+        return set()
+
+
+def _toggle_follow_rpc(client, follower_id: str, chef_id: str) -> Optional[Dict[str, Any]]:
+    """Single round trip toggle via the toggle_follow function.
+
+    Returns None when the function is not installed so the caller can fall back.
+    """
+    global _follow_rpc_available
+    if not _follow_rpc_available:
+        return None
+    try:
+        resp = client.rpc(_FOLLOW_TOGGLE_RPC, {"p_follower_id": follower_id, "p_following_id": chef_id}).execute()
+    except Exception as e:
+        if getattr(e, "code", None) == "PGRST202":
+            print(f"[follows] {_FOLLOW_TOGGLE_RPC} RPC not installed, using delete-or-insert fallback")
+            _follow_rpc_available = False
+            return None
+        raise
+    result = _extract_response_data(resp)
+    if isinstance(result, list):
+        result = result[0] if result else None
+    return result or {}
+
+
+def _returning(builder, columns: str):
+    """Set the columns a PostgREST write returns, which postgrest-py's insert/delete do not take."""
+    builder.params = builder.params.set("select", columns)
+    return builder
+
+
+def _chef_followers_before(rows: List[Dict[str, Any]]) -> int:
+    chef = (rows[0].get("chef") if rows else None) or {}
+    return int(chef.get("user_followers_count") or 0)
+
+
+def _toggle_follow_fallback(client, follower_id: str, chef_id: str) -> Dict[str, Any]:
+    """Delete the relationship if it exists, otherwise insert it.
+
+    The write that happens returns the follower count from before it, which
+    the trigger moves by one, so no separate count query is needed.
+    """
+    deleted = _extract_response_data(_returning(
+        client.table("follows").delete().eq("follower_id", follower_id).eq("following_id", chef_id),
+        _FOLLOW_WRITE_RETURNING,
+    ).execute())
+    if deleted:
+        return {"is_following": False, "followers_count": max(_chef_followers_before(deleted) - 1, 0)}
+
+    inserted = _extract_response_data(_returning(
+        client.table("follows").insert({
+            "follower_id": follower_id,
+            "following_id": chef_id
+        }),
+        _FOLLOW_WRITE_RETURNING,
+    ).execute())
+    return {"is_following": True, "followers_count": _chef_followers_before(inserted) + 1}
+
+
 def toggle_follow(follower_id: str, chef_id: str) -> Dict[str, Any]:
     """Toggle follow status for a chef.
     
     Uses the follows table to track relationships.
     Counts are automatically updated by database triggers.
     """
-    # Check if already following
-    is_following = check_if_following(follower_id, chef_id)
-    
     # Use admin client to bypass RLS for reliable toggling
     client = supabase_admin if supabase_admin else supabase
 
     try:
-        if is_following:
-            client.table("follows").delete().eq("follower_id", follower_id).eq("following_id", chef_id).execute()
-        else:
-            client.table("follows").insert({
-                "follower_id": follower_id,
-                "following_id": chef_id
-            }).execute()
-            
-            # Create notification for the chef
-            try:
-                follower = get_user(follower_id)
-                follower_name = follower.get('user_full_name', 'Someone') if follower else 'Someone'
-                
-                create_notification({
-                    "user_id": chef_id,
-                    "notification_title": "New Follower",
-                    "notification_type": "follow",
-                    "notification_message": f"{follower_name} started following you.",
-                    "notification_data": {"follower_id": follower_id}
-                })
-            except Exception as e:
-                print(f"Error creating follow notification: {e}")
-        
-        # Get updated follower count for the chef (trigger should have updated it)
-        chef_resp = client.table("users").select("user_followers_count").eq("user_id", chef_id).single().execute()
-        new_count = chef_resp.data.get("user_followers_count", 0) if chef_resp.data else 0
-        
-        return {
-            "is_following": not is_following,
-            "followers_count": new_count
-        }
+        state = _toggle_follow_rpc(client, follower_id, chef_id)
+        if state is None:
+            state = _toggle_follow_fallback(client, follower_id, chef_id)
     except Exception as e:
         raise Exception(f"Failed to toggle follow status: {str(e)}")
 
+    is_following = bool(state.get("is_following"))
+    _invalidate_following_cache(follower_id)
+
+    if is_following:
+        # Notify the chef off the request path
+        try:
+            notification_outbox.enqueue("user_followed", {
+                "follower_id": follower_id,
+                "chef_id": chef_id,
+                "event_id": uuid.uuid4().hex,
+            })
+        except Exception as e:
+            print(f"Error creating follow notification: {e}")
+
+    return {
+        "is_following": is_following,
+        "followers_count": state.get("followers_count") or 0
+    }
+
+
+def _notify_new_follower(payload: Dict[str, Any]) -> None:
+    """Outbox handler: tell a chef they have a new follower."""
+    follower_id = payload.get("follower_id")
+    follower = get_user(follower_id)
+    follower_name = follower.get('user_full_name', 'Someone') if follower else 'Someone'
 
-def get_user_favorites(user_id: str) -> List[Dict[str, Any]]:
+    client = supabase_admin if supabase_admin else supabase
+    inserted = _insert_notifications_once(client, [{
+        "user_id": payload.get("chef_id"),
+        "notification_title": "New Follower",
+        "notification_type": "follow",
+        "notification_message": f"{follower_name} started following you.",
+        "notification_data": {"follower_id": follower_id}
+    }], f"follow:{payload.get('event_id', '')}:{follower_id}")
+    _send_push_notifications(inserted)
+
+
+notification_outbox.register_handler("user_followed", _notify_new_follower)
+
+
+# Per-user favourite ids, written through to kv_store by toggle_user_favorite
+# so other workers pick the change up within SHARED_CACHE_LOCAL_TTL_SECONDS.
+# Only the toggle sets it; reads fill it only when it is empty.
+FAVORITE_CACHE_MAX_ENTRIES = int(os.getenv("FAVORITE_CACHE_MAX_ENTRIES", "1024"))
+FAVORITE_CACHE_TTL_SECONDS = float(os.getenv("FAVORITE_CACHE_TTL_SECONDS", "300"))
+_favorite_ids_cache = SharedTTLCache(
+    "favorite_ids",
+    max_size=FAVORITE_CACHE_MAX_ENTRIES,
+    ttl=FAVORITE_CACHE_TTL_SECONDS,
+    local_ttl=SHARED_CACHE_LOCAL_TTL_SECONDS,
+)
+
+
+def get_user_favorites(user_id: str, columns: str = "*") -> List[Dict[str, Any]]:
     """Get all favorite recipes for a user."""
     try:
         client = supabase_admin if supabase_admin else supabase
@@ -720,7 +1242,7 @@ def get_user_favorites(user_id: str) -> List[Dict[str, Any]]:
             return []
             
         # Then fetch the recipes
-        recipes_resp = client.table("recipe").select("*").in_("recipe_id", fav_ids).execute()
+        recipes_resp = client.table("recipe").select(columns).in_("recipe_id", fav_ids).execute()
         recipes = _extract_response_data(recipes_resp)
         
         # Mark them as favorites
@@ -736,60 +1258,130 @@ def get_user_favorites(user_id: str) -> List[Dict[str, Any]]:
         raise
 
 
-def toggle_user_favorite(user_id: str, recipe_id: str) -> bool:
-    """Toggle a recipe in user's favorites. Returns True if added, False if removed."""
+_FAVORITE_TOGGLE_RPC = "toggle_user_favourite"
+_FAVORITE_CAS_ATTEMPTS = 5
+# Flipped off the first time PostgREST reports the RPC is not installed.
+_favorite_rpc_available = True
+
+
+def _pg_text_array(values: List[Any]) -> str:
+    """Postgres array literal for a PostgREST eq filter on a text[] column."""
+    items = []
+    for value in values:
+        text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        items.append(f'"{text}"')
+    return "{" + ",".join(items) + "}"
+
+
+def _toggle_favorite_rpc(client, user_id: str, recipe_id: str) -> Optional[Dict[str, Any]]:
+    """Single round trip toggle via the toggle_user_favourite function.
+
+    Returns None when the function is not installed so the caller can fall back.
+    """
+    global _favorite_rpc_available
+    if not _favorite_rpc_available:
+        return None
     try:
-        client = supabase_admin if supabase_admin else supabase
-        
+        resp = client.rpc(_FAVORITE_TOGGLE_RPC, {"p_user_id": user_id, "p_recipe_id": recipe_id}).execute()
+    except Exception as e:
+        if getattr(e, "code", None) == "PGRST202":
+            print(f"[favorites] {_FAVORITE_TOGGLE_RPC} RPC not installed, using compare-and-set fallback")
+            _favorite_rpc_available = False
+            return None
+        raise
+    result = _extract_response_data(resp)
+    if isinstance(result, list):
+        result = result[0] if result else None
+    if not result:
+        raise ValueError("user_not_found")
+    return result
+
+
+def _toggle_favorite_cas(client, user_id: str, recipe_id: str) -> Dict[str, Any]:
+    """Fallback toggle: read the array, then update only if it is unchanged."""
+    for _ in range(_FAVORITE_CAS_ATTEMPTS):
         user_resp = client.table("users").select("user_favourite_recipees").eq("user_id", user_id).single().execute()
-        user_data = _extract_response_data(user_resp)
-        
-        fav_ids = user_data.get("user_favourite_recipees")
-        if fav_ids is None:
-            fav_ids = []
-        elif not isinstance(fav_ids, list):
-            fav_ids = []
-            
+        user_data = _extract_response_data(user_resp) or {}
+        current = user_data.get("user_favourite_recipees")
+
+        fav_ids = list(current) if isinstance(current, list) else []
         is_fav = recipe_id in fav_ids
-        
         if is_fav:
-            fav_ids.remove(recipe_id)
+            fav_ids = [fid for fid in fav_ids if fid != recipe_id]
         else:
             fav_ids.append(recipe_id)
-            
-            # Create notification for the recipe owner
-            try:
-                recipe = get_recipe(recipe_id)
-                owner_id = recipe.get('recipe_owner')
-                if owner_id and owner_id != user_id: # Don't notify self
-                    user = get_user(user_id)
-                    user_name = user.get('user_full_name', 'Someone') if user else 'Someone'
-                    recipe_name = recipe.get('recipe_name', 'your recipe')
-                    
-                    create_notification({
-                        "user_id": owner_id,
-                        "notification_title": "Recipe Liked",
-                        "notification_type": "like",
-                        "notification_message": f"{user_name} liked your recipe {recipe_name}.",
-                        "notification_data": {"recipe_id": recipe_id, "user_id": user_id}
-                    })
-            except Exception as e:
-                print(f"Error creating like notification: {e}")
-            
-        update_resp = client.table("users").update({"user_favourite_recipees": fav_ids}).eq("user_id", user_id).execute()
-        _extract_response_data(update_resp)
-        return not is_fav
-    except Exception as e:
-        raise e
+
+        query = client.table("users").update({"user_favourite_recipees": fav_ids}).eq("user_id", user_id)
+        if current is None:
+            query = query.is_("user_favourite_recipees", "null")
+        else:
+            query = query.filter("user_favourite_recipees", "eq", _pg_text_array(current))
+        if _extract_response_data(query.execute()):
+            return {"is_favorite": not is_fav, "favourite_ids": fav_ids}
+    raise RuntimeError("Favourite toggle conflicted with concurrent updates, please retry")
+
+
+def toggle_user_favorite(user_id: str, recipe_id: str) -> bool:
+    """Toggle a recipe in user's favorites. Returns True if added, False if removed."""
+    client = supabase_admin if supabase_admin else supabase
+
+    state = _toggle_favorite_rpc(client, user_id, recipe_id)
+    if state is None:
+        state = _toggle_favorite_cas(client, user_id, recipe_id)
+
+    is_fav = bool(state.get("is_favorite"))
+    _favorite_ids_cache.set(user_id, list(state.get("favourite_ids") or []))
+
+    if is_fav:
+        # Notify the recipe owner off the request path
+        try:
+            notification_outbox.enqueue("recipe_liked", {
+                "user_id": user_id,
+                "recipe_id": recipe_id,
+                "event_id": uuid.uuid4().hex,
+            })
+        except Exception as e:
+            print(f"Error creating like notification: {e}")
+    return is_fav
+
+
+def _notify_recipe_liked(payload: Dict[str, Any]) -> None:
+    """Outbox handler: tell a recipe owner that someone liked their recipe."""
+    user_id = payload.get("user_id")
+    recipe_id = payload.get("recipe_id")
+    recipe = get_recipe(recipe_id, columns="recipe_id, recipe_name, recipe_owner")
+    owner_id = recipe.get('recipe_owner')
+    if not owner_id or owner_id == user_id:  # Don't notify self
+        return
+    user = get_user(user_id)
+    user_name = user.get('user_full_name', 'Someone') if user else 'Someone'
+    recipe_name = recipe.get('recipe_name', 'your recipe')
+
+    client = supabase_admin if supabase_admin else supabase
+    inserted = _insert_notifications_once(client, [{
+        "user_id": owner_id,
+        "notification_title": "Recipe Liked",
+        "notification_type": "like",
+        "notification_message": f"{user_name} liked your recipe {recipe_name}.",
+        "notification_data": {"recipe_id": recipe_id, "user_id": user_id}
+    }], f"like:{payload.get('event_id', '')}:{recipe_id}:{user_id}")
+    _send_push_notifications(inserted)
+
+
+notification_outbox.register_handler("recipe_liked", _notify_recipe_liked)
+
+
+def _load_favorite_ids(user_id: str) -> List[str]:
+    client = supabase_admin if supabase_admin else supabase
+    user_resp = client.table("users").select("user_favourite_recipees").eq("user_id", user_id).single().execute()
+    user_data = _extract_response_data(user_resp)
+    return user_data.get("user_favourite_recipees") or []
 
 
 def get_user_favorite_ids(user_id: str) -> List[str]:
-    """Get just the IDs of favorite recipes."""
+    """Get just the IDs of favorite recipes (cached per user)."""
     try:
-        client = supabase_admin if supabase_admin else supabase
-        user_resp = client.table("users").select("user_favourite_recipees").eq("user_id", user_id).single().execute()
-        user_data = _extract_response_data(user_resp)
-        return user_data.get("user_favourite_recipees") or []
+        return list(_favorite_ids_cache.get_or_load(user_id, lambda: _load_favorite_ids(user_id)))
     except Exception:
         return []
 
@@ -953,51 +1545,195 @@ def generate_recipes(lang: str, max_time: str, ingredients: List[str]) -> Dict[s
 # -----------------------------
 # Scheduled Notifications
 # -----------------------------
+_BROADCAST_PAGE_SIZE = int(os.getenv("BROADCAST_PAGE_SIZE", "500"))
+_BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", "4"))
+
+# The broadcast's state lives in kv_store, shared by every worker on the
+# host: each worker's scheduler fires the 09:00 job, and the first to take
+# the day's key sends it; the others skip. The running key keeps a manual
+# trigger from overlapping it and expires if its worker dies mid-run.
+_BROADCAST_DAY_KEY = "broadcast:day:"
+_BROADCAST_RUNNING_KEY = "broadcast:running"
+_BROADCAST_STATS_KEY = "broadcast:stats"
+_BROADCAST_LEASE_SECONDS = int(os.getenv("BROADCAST_LEASE_SECONDS", "3600"))
+_BROADCAST_STATS_TTL = 7 * 86400
+
+# Progress of the broadcast running in this process, saved to kv_store as it changes
+_broadcast_stats_lock = threading.Lock()
+_broadcast_stats: Dict[str, Any] = {"last_run": None}
+
+
+def _save_broadcast_stats() -> None:
+    with _broadcast_stats_lock:
+        snapshot = {key: (dict(value) if isinstance(value, dict) else value) for key, value in _broadcast_stats.items()}
+    try:
+        kv_store.put(_BROADCAST_STATS_KEY, snapshot, _BROADCAST_STATS_TTL)
+    except Exception as e:
+        print(f"[broadcast] could not save progress: {e}")
+
+
+def _update_broadcast_stats(**changes: Any) -> None:
+    with _broadcast_stats_lock:
+        current = _broadcast_stats.get("current")
+        if current is not None:
+            for key, value in changes.items():
+                if key.endswith("_inc"):
+                    name = key[:-4]
+                    current[name] = current.get(name, 0) + value
+                else:
+                    current[key] = value
+            elapsed = time.time() - current["started_at"]
+            current["elapsed_seconds"] = round(elapsed, 3)
+            current["notifications_per_second"] = round(current["notifications_sent"] / elapsed, 2) if elapsed > 0 else None
+    _save_broadcast_stats()
+
+
+def get_broadcast_stats() -> Dict[str, Any]:
+    """Progress of the running daily broadcast and the result of the last one, from any worker."""
+    stats = kv_store.get(_BROADCAST_STATS_KEY) or {"last_run": None}
+    running = kv_store.get(_BROADCAST_RUNNING_KEY)
+    stats["state"] = "running" if running else "idle"
+    if not running:
+        # Left behind by a worker that died mid-run
+        stats.pop("current", None)
+    else:
+        stats["worker_pid"] = running.get("pid")
+    return stats
+
+
+def _iter_device_user_pages(page_size: int):
+    """Yield pages of users with registered devices, keyset-paginated on user_id."""
+    client = supabase_admin if supabase_admin else supabase
+    last_user_id = None
+    while True:
+        query = client.table("users").select("user_id, user_devices").not_.is_("user_devices", "null")
+        if last_user_id is not None:
+            query = query.gt("user_id", last_user_id)
+        resp = query.order("user_id").limit(page_size).execute()
+        rows = _extract_response_data(resp) or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_user_id = rows[-1]["user_id"]
+
+
+def _broadcast_page(rows: List[Dict[str, Any]], template: Dict[str, Any]) -> int:
+    """Insert one page of notifications in bulk and push them in batched multicasts."""
+    tokens_by_user: Dict[str, List[str]] = {}
+    for row in rows:
+        tokens = _parse_device_tokens(row.get("user_devices"))
+        if tokens:
+            tokens_by_user[row["user_id"]] = tokens
+    if not tokens_by_user:
+        return 0
+
+    notifications = [{**template, "user_id": user_id} for user_id in tokens_by_user]
+    client = supabase_admin if supabase_admin else supabase
+    client.table("notifications").insert(notifications).execute()
+    _send_push_notifications(notifications, tokens_by_user=tokens_by_user)
+    return len(notifications)
+
+
+def send_daily_recipe_notification():
+    """Scheduler job: send today's broadcast unless another worker already has."""
+    day = time.strftime("%Y-%m-%d")
+    if not kv_store.add(_BROADCAST_DAY_KEY + day, {"pid": os.getpid(), "at": time.time()}, 2 * 86400):
+        print(f"[broadcast] {day} broadcast already taken by another worker; skipping")
+        return {"success": False, "reason": "Already sent today"}
+    return send_scheduled_recipe_notification()
+
+
 def send_scheduled_recipe_notification():
-    """Send daily trending recipe notification to all users with devices."""
+    """Send daily trending recipe notification to all users with devices.
+
+    Users are streamed in keyset-paginated pages; each page gets one bulk
+    notification insert and batched multicast pushes, processed by a bounded
+    thread pool. Only one broadcast runs on the host at a time.
+    """
+    if not kv_store.add(_BROADCAST_RUNNING_KEY, {"pid": os.getpid(), "started_at": time.time()},
+                        _BROADCAST_LEASE_SECONDS):
+        return {"success": False, "reason": "Broadcast already running", "progress": get_broadcast_stats().get("current")}
+
     try:
         trending = get_trending_recipes()
         if not trending:
             return {"success": False, "reason": "No trending recipes"}
-        
-        recipe = trending[0]
-        recipe_id = recipe.get("recipe_id")
-        
-        client = supabase_admin if supabase_admin else supabase
-        users_resp = client.table("users").select("user_id, user_devices, user_full_name").not_.is_("user_devices", "null").execute()
-        users = _extract_response_data(users_resp) or []
-        
-        notifications_sent = 0
-        for user in users:
-            user_id = user.get("user_id")
-            devices = user.get("user_devices")
-            
-            if not devices:
-                continue
-                
-            if isinstance(devices, str):
+
+        template = {
+            "notification_title": "Check the Hot Recipes 🔥",
+            "notification_type": "hot_recipes",
+            "notification_message": "Discover today's trending and most popular recipes!",
+            "notification_data": {}
+        }
+
+        previous = kv_store.get(_BROADCAST_STATS_KEY) or {}
+        with _broadcast_stats_lock:
+            _broadcast_stats["last_run"] = previous.get("last_run")
+            _broadcast_stats["current"] = {
+                "started_at": time.time(),
+                "pages": 0,
+                "users_scanned": 0,
+                "notifications_sent": 0,
+                "failed_pages": 0,
+            }
+        _save_broadcast_stats()
+
+        max_in_flight = max(_BROADCAST_WORKERS, 1) * 2
+        in_flight = set()
+
+        def _collect(done):
+            for future in done:
                 try:
-                    devices = json.loads(devices)
-                except:
-                    continue
-            
-            if not devices or not isinstance(devices, list) or len(devices) == 0:
-                continue
-            
-            try:
-                create_notification({
-                    "user_id": user_id,
-                    "notification_title": "Check the Hot Recipes 🔥",
-                    "notification_type": "hot_recipes",
-                    "notification_message": "Discover today's trending and most popular recipes!",
-                    "notification_data": {}
-                })
-                notifications_sent += 1
-            except Exception:
-                pass
-        
-        return {"success": True, "notifications_sent": notifications_sent}
-        
+                    _update_broadcast_stats(notifications_sent_inc=future.result(), pages_inc=1)
+                except Exception as e:
+                    print(f"[broadcast] page failed: {e}")
+                    _update_broadcast_stats(failed_pages_inc=1)
+
+        with ThreadPoolExecutor(max_workers=max(_BROADCAST_WORKERS, 1), thread_name_prefix="broadcast") as pool:
+            for rows in _iter_device_user_pages(_BROADCAST_PAGE_SIZE):
+                _update_broadcast_stats(users_scanned_inc=len(rows))
+                in_flight.add(pool.submit(_broadcast_page, rows, template))
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    _collect(done)
+            done, _ = wait(in_flight)
+            _collect(done)
+
+        with _broadcast_stats_lock:
+            current = _broadcast_stats.pop("current")
+            current["finished_at"] = time.time()
+            _broadcast_stats["last_run"] = current
+        _save_broadcast_stats()
+        return {
+            "success": True,
+            "notifications_sent": current["notifications_sent"],
+            "pages": current["pages"],
+            "failed_pages": current["failed_pages"],
+            "elapsed_seconds": current.get("elapsed_seconds"),
+        }
+
     except Exception as e:
+        with _broadcast_stats_lock:
+            current = _broadcast_stats.pop("current", None)
+            if current is not None:
+                current["error"] = str(e)
+                _broadcast_stats["last_run"] = current
+        _save_broadcast_stats()
         return {"success": False, "error": str(e)}
+    finally:
+        kv_store.pop(_BROADCAST_RUNNING_KEY)
+
+
+def _cache_metrics():
+    for name, cache in (
+        ("recipe_lists", _recipe_list_cache),
+        ("following", _following_cache),
+        ("favorite_ids", _favorite_ids_cache),
+    ):
+        yield "chefkit_cache_requests_total", {"cache": name, "result": "hit"}, cache.hits
+        yield "chefkit_cache_requests_total", {"cache": name, "result": "miss"}, cache.misses
+
 
+metrics.register_collector(_cache_metrics)
@@ -0,0 +1,49 @@
+-- Atomic follow/unfollow used by services.toggle_follow.
+--
+-- Removes the (p_follower_id, p_following_id) row from follows if it
+-- exists, inserts it otherwise, and returns the new state together with
+-- the followed user's follower count (maintained by the follows triggers):
+--   {"is_following": bool, "followers_count": int}
+--
+-- Apply once in the Supabase SQL editor (or `psql -f`). Until it exists the
+-- backend falls back to a delete-or-insert from Python.
+
+create or replace function public.toggle_follow(p_follower_id uuid, p_following_id uuid)
+returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+    v_following boolean;
+    v_count integer;
+begin
+    -- Serialise toggles for the same pair so double taps cannot insert twice.
+    perform pg_advisory_xact_lock(hashtext(p_follower_id::text || ':' || p_following_id::text));
+
+    delete from follows
+     where follower_id = p_follower_id
+       and following_id = p_following_id;
+
+    if found then
+        v_following := false;
+    else
+        insert into follows (follower_id, following_id)
+        values (p_follower_id, p_following_id);
+        v_following := true;
+    end if;
+
+    select coalesce(user_followers_count, 0)
+      into v_count
+      from users
+     where user_id = p_following_id;
+
+    return jsonb_build_object(
+        'is_following', v_following,
+        'followers_count', coalesce(v_count, 0)
+    );
+end;
+$$;
+
+-- Runs with the caller's privileges, so the follows table RLS policies still apply.
+revoke all on function public.toggle_follow(uuid, uuid) from public, anon;
+grant execute on function public.toggle_follow(uuid, uuid) to authenticated, service_role;
@@ -0,0 +1,32 @@
+-- Atomic favourite toggle used by services.toggle_user_favorite.
+--
+-- Flips p_recipe_id in users.user_favourite_recipees with a single UPDATE,
+-- so concurrent toggles by the same user cannot overwrite each other, and
+-- returns the new state:
+--   {"is_favorite": bool, "favourite_ids": [...]}
+-- Returns NULL when the user row does not exist.
+--
+-- Apply once in the Supabase SQL editor (or `psql -f`). Until it exists the
+-- backend falls back to a compare-and-set update from Python.
+
+create or replace function public.toggle_user_favourite(p_user_id uuid, p_recipe_id text)
+returns jsonb
+language sql
+set search_path = public
+as $$
+    update users
+       set user_favourite_recipees = case
+               when p_recipe_id = any(coalesce(user_favourite_recipees, '{}'))
+                   then array_remove(user_favourite_recipees, p_recipe_id)
+               else array_append(coalesce(user_favourite_recipees, '{}'), p_recipe_id)
+           end
+     where user_id = p_user_id
+    returning jsonb_build_object(
+        'is_favorite', p_recipe_id = any(user_favourite_recipees),
+        'favourite_ids', to_jsonb(coalesce(user_favourite_recipees, '{}'))
+    );
+$$;
+
+-- Runs with the caller's privileges, so the users table RLS policies still apply.
+revoke all on function public.toggle_user_favourite(uuid, text) from public, anon;
+grant execute on function public.toggle_user_favourite(uuid, text) to authenticated, service_role;
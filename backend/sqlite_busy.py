@@ -0,0 +1,59 @@
+"""Cooperative waiting for the write lock of the SQLite files under backend/.
+
+The outbox, kv store and upload index files are shared by every worker
+process on the host. With sqlite3's busy timeout, a connection waits for
+another process's write lock inside a single C call, which under gevent
+workers stalls every greenlet in the process. Connections from connect()
+have no busy timeout: a locked database fails at once, and retry() sleeps
+in Python (a gevent-aware sleep once the worker is patched) and tries
+again until `timeout` seconds have passed.
+"""
+import random
+import sqlite3
+import time
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+_FIRST_BACKOFF_SECONDS = 0.001
+_MAX_BACKOFF_SECONDS = 0.05
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Autocommit WAL connection that reports a locked database immediately."""
+    conn = sqlite3.connect(path, timeout=0, isolation_level=None)
+    retry(lambda: conn.execute("PRAGMA journal_mode=WAL"))
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def retry(operation: Callable[[], T], timeout: float = 5.0) -> T:
+    """Run `operation`, retrying while the database is locked by another writer."""
+    deadline = time.monotonic() + timeout
+    backoff = _FIRST_BACKOFF_SECONDS
+    while True:
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e) or time.monotonic() >= deadline:
+                raise
+        time.sleep(backoff * (0.5 + random.random()))
+        backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+
+def transaction(conn: sqlite3.Connection, body: Callable[[sqlite3.Connection], T], timeout: float = 5.0) -> T:
+    """Run `body(conn)` inside BEGIN IMMEDIATE ... COMMIT, waiting cooperatively for the lock."""
+    retry(lambda: conn.execute("BEGIN IMMEDIATE"), timeout)
+    try:
+        result = body(conn)
+        conn.execute("COMMIT")
+        return result
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
@@ -1,7 +1,9 @@
 import os
+import threading
 from dotenv import load_dotenv
-from typing import Optional
-from supabase import create_client, Client, ClientOptions
+from typing import Any, Optional
+
+import metrics
 
 load_dotenv()
 
@@ -15,37 +17,77 @@ if not SUPABASE_URL:
 if not SUPABASE_ANON_KEY and not SUPABASE_SERVICE_ROLE_KEY:
     raise ValueError("At least one of SUPABASE_ANON_KEY or SUPABASE_SERVICE_ROLE_KEY must be set")
 
-# STATELESS CLIENT OPTIONS
-# Disable session persistence to prevent state leakage between requests
-stateless_options = ClientOptions(
-    auto_refresh_token=False,
-    persist_session=False,
-)
+
+_POSTGREST_ATTRS = frozenset({"table", "from_", "rpc", "schema", "postgrest"})
+
+
+class _LazyClient:
+    """Builds the Supabase client on first attribute access.
+
+    Importing the `supabase` package (gotrue, postgrest, realtime, storage)
+    is the largest part of a cold import, so it is deferred until a request
+    actually talks to Supabase.
+    """
+
+    def __init__(self, name: str, key: str):
+        self._name = name
+        self._key = key
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client, ClientOptions
+
+                    # STATELESS CLIENT OPTIONS
+                    # Disable session persistence to prevent state leakage between requests
+                    stateless_options = ClientOptions(
+                        auto_refresh_token=False,
+                        persist_session=False,
+                    )
+                    client = create_client(SUPABASE_URL, self._key, options=stateless_options)
+                    # gotrue keeps one httpx client for the life of the Supabase client
+                    metrics.instrument_httpx(client.auth._http_client)
+                    self._client = client
+                    print(f"[Supabase] {self._name} client initialized")
+        return self._client
+
+    def __getattr__(self, attr: str) -> Any:
+        client = self._get()
+        if attr in _POSTGREST_ATTRS:
+            # supabase-py rebuilds the PostgREST client after auth events, so
+            # make sure whichever session is current is instrumented.
+            metrics.instrument_httpx(client.postgrest.session)
+        return getattr(client, attr)
+
+    def __bool__(self) -> bool:
+        return True
+
 
 # Main client uses ANON KEY for auth operations (login, signup)
 # This is required because auth operations need to work with user credentials
-supabase: Client = create_client(
-    SUPABASE_URL, 
-    SUPABASE_ANON_KEY or SUPABASE_SERVICE_ROLE_KEY,
-    options=stateless_options
-)
+supabase = _LazyClient("anon", SUPABASE_ANON_KEY or SUPABASE_SERVICE_ROLE_KEY)
 
 # Admin client uses SERVICE ROLE KEY for database operations (bypasses RLS)
-supabase_admin: Optional[Client] = None
+supabase_admin: Optional[_LazyClient] = None
 
 if SUPABASE_SERVICE_ROLE_KEY:
-    supabase_admin = create_client(
-        SUPABASE_URL, 
-        SUPABASE_SERVICE_ROLE_KEY,
-        options=stateless_options
-    )
-    print("[Supabase] Admin client initialized with service role key")
+    supabase_admin = _LazyClient("admin", SUPABASE_SERVICE_ROLE_KEY)
 else:
     print("[Supabase] WARNING: No SUPABASE_SERVICE_ROLE_KEY - some operations may fail!")
 
 print(f"[Supabase] supabase_admin available: {supabase_admin is not None}")
 
 
+def warm_up() -> None:
+    """Build the clients now (e.g. from a background thread after boot)."""
+    supabase._get()
+    if supabase_admin is not None:
+        supabase_admin._get()
+
+
 def set_postgrest_token(token: str) -> None:
     """Attach a user's JWT to PostgREST requests.
     
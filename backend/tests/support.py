@@ -0,0 +1,53 @@
+"""Environment shared by the backend tests; import it before any backend module.
+
+Backend modules read their configuration at import time (supabase_client,
+kv_store, ...), and unittest imports every test module before running any,
+so the whole suite uses one configuration: a fake Supabase and Cloudinary on
+PORT (started by serve_fake_supabase in the tests that need it, see
+benchmarks/fake_supabase.py) and SQLite state files in STATE_DIR.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+from harness import free_port  # noqa: E402
+
+JWT_SECRET = "backend-tests"
+PORT = free_port()
+STATE_DIR = tempfile.mkdtemp(prefix="chefkit-tests-")
+atexit.register(shutil.rmtree, STATE_DIR, True)
+
+os.environ.update(
+    SUPABASE_URL=f"http://127.0.0.1:{PORT}",
+    SUPABASE_ANON_KEY="tests.anon.key",
+    SUPABASE_SERVICE_ROLE_KEY="tests.service.key",
+    SUPABASE_JWT_SECRET=JWT_SECRET,
+    KV_STORE_PATH=os.path.join(STATE_DIR, "kv_store.db"),
+    NOTIFICATION_OUTBOX_PATH=os.path.join(STATE_DIR, "notification_outbox.db"),
+    UPLOAD_DEDUPE_PATH=os.path.join(STATE_DIR, "upload_dedupe.db"),
+    RATE_LIMIT_PATH=os.path.join(STATE_DIR, "rate_limit.db"),
+    RATE_LIMIT_ENABLED="false",
+    CLOUDINARY_API_URL=f"http://127.0.0.1:{PORT}",
+    CLOUDINARY_DELIVERY_URL=f"http://127.0.0.1:{PORT}",
+    CLOUDINARY_CLOUD_NAME="tests",
+    CLOUDINARY_API_KEY="tests-key",
+    CLOUDINARY_API_SECRET="backend-tests-cloudinary",
+)
+
+_server = None
+
+
+def serve_fake_supabase():
+    """Start the fake Supabase/Cloudinary on PORT, once for the whole run."""
+    global _server
+    if _server is None:
+        import fake_supabase
+
+        _server = fake_supabase.serve(PORT, scale=2)
+    return _server
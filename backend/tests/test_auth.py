@@ -0,0 +1,162 @@
+"""Local token verification in auth.py: key selection, the token cache and the remote fallback.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import support
+import auth
+
+_RSA_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _claims(sub="user-1", lifetime=3600, **extra):
+    now = int(time.time())
+    return dict({"sub": sub, "aud": "authenticated", "role": "authenticated", "iat": now,
+                 "exp": now + lifetime}, **extra)
+
+
+def _hs256(**claims):
+    return jwt.encode(_claims(**claims), support.JWT_SECRET, algorithm="HS256")
+
+
+def _rs256(**claims):
+    return jwt.encode(_claims(**claims), _RSA_KEY, algorithm="RS256", headers={"kid": "test-key"})
+
+
+class _FakeJwks:
+    """Stands in for PyJWKClient, counting signing-key lookups."""
+
+    def __init__(self, error=None):
+        self.lookups = 0
+        self.error = error
+
+    def get_signing_key_from_jwt(self, token):
+        self.lookups += 1
+        if self.error:
+            raise self.error
+        return SimpleNamespace(key=_RSA_KEY.public_key())
+
+
+class VerifyTokenTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = auth._TokenCache(16)
+        self.remote = mock.Mock(side_effect=lambda token: {"sub": "remote-user", "user": {"id": "remote-user"}})
+        self.jwks = _FakeJwks()
+        for patcher in (
+            mock.patch.object(auth, "_token_cache", self.cache),
+            mock.patch.object(auth, "_verify_remote", self.remote),
+            mock.patch.object(auth, "_get_jwks_client", lambda: self.jwks),
+            mock.patch.object(auth, "_REMOTE_FALLBACK", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_hs256_uses_the_jwt_secret(self):
+        claims = auth.verify_token(_hs256(sub="hs-user", email="a@b.co"))
+        self.assertEqual(claims["sub"], "hs-user")
+        self.assertEqual(claims["user"]["email"], "a@b.co")
+        self.assertEqual(self.jwks.lookups, 0)
+        self.remote.assert_not_called()
+
+    def test_hs256_with_the_wrong_secret_is_rejected(self):
+        token = jwt.encode(_claims(), "not-the-secret", algorithm="HS256")
+        with self.assertRaises(ValueError):
+            auth.verify_token(token)
+
+    def test_rs256_uses_the_jwks_key(self):
+        self.assertEqual(auth.verify_token(_rs256(sub="rs-user"))["sub"], "rs-user")
+        self.assertEqual(self.jwks.lookups, 1)
+        self.remote.assert_not_called()
+
+    def test_wrong_audience_and_expired_tokens_are_rejected(self):
+        for token in (_hs256(aud="anon"), _hs256(lifetime=-60), _rs256(lifetime=-60)):
+            with self.subTest(token=token[-12:]), self.assertRaises(ValueError):
+                auth.verify_token(token)
+
+    def test_unsupported_algorithm_is_rejected(self):
+        token = jwt.encode(_claims(), support.JWT_SECRET, algorithm="HS512")
+        with self.assertRaises(ValueError):
+            auth.verify_token(token)
+        self.remote.assert_not_called()
+
+    def test_verified_tokens_are_cached(self):
+        token = _rs256()
+        auth.verify_token(token)
+        auth.verify_token(token)
+        self.assertEqual(self.jwks.lookups, 1)
+
+    def test_cached_claims_are_copies(self):
+        token = _hs256(user_metadata={"name": "Ana"})
+        first = auth.verify_token(token)
+        first["sub"] = "someone-else"
+        first["user"]["user_metadata"]["name"] = "changed"
+        second = auth.verify_token(token)
+        self.assertEqual(second["sub"], "user-1")
+        self.assertEqual(second["user"]["user_metadata"]["name"], "Ana")
+
+    def test_no_remote_call_without_the_fallback(self):
+        with mock.patch.object(auth, "SUPABASE_JWT_SECRET", None):
+            with self.assertRaisesRegex(ValueError, "unavailable"):
+                auth.verify_token(_hs256())
+        self.jwks.error = jwt.PyJWKClientError("unreachable")
+        with self.assertRaisesRegex(ValueError, "unavailable"):
+            auth.verify_token(_rs256())
+        self.remote.assert_not_called()
+
+    def test_remote_fallback_when_enabled(self):
+        self.jwks.error = jwt.PyJWKClientError("unreachable")
+        with mock.patch.object(auth, "_REMOTE_FALLBACK", True):
+            token = _rs256()
+            self.assertEqual(auth.verify_token(token)["sub"], "remote-user")
+            auth.verify_token(token)
+        # Cached until the token expires, so Auth is asked once
+        self.remote.assert_called_once_with(token)
+
+    def test_fallback_does_not_cover_invalid_tokens(self):
+        with mock.patch.object(auth, "_REMOTE_FALLBACK", True):
+            with self.assertRaises(ValueError):
+                auth.verify_token(_hs256(lifetime=-60))
+        self.remote.assert_not_called()
+
+
+class TokenCacheTest(unittest.TestCase):
+    def test_entries_expire_with_the_token(self):
+        cache = auth._TokenCache(4)
+        cache.put("short", {"sub": "a"}, time.time() + 0.05)
+        cache.put("long", {"sub": "b"}, time.time() + 60)
+        self.assertEqual(cache.get("short"), {"sub": "a"})
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("short"))
+        self.assertEqual(cache.get("long"), {"sub": "b"})
+
+    def test_expired_tokens_are_not_stored(self):
+        cache = auth._TokenCache(4)
+        cache.put("old", {"sub": "a"}, time.time() - 1)
+        self.assertIsNone(cache.get("old"))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = auth._TokenCache(2)
+        expires_at = time.time() + 60
+        cache.put("a", {"sub": "a"}, expires_at)
+        cache.put("b", {"sub": "b"}, expires_at)
+        cache.get("a")
+        cache.put("c", {"sub": "c"}, expires_at)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_size_zero_disables_caching(self):
+        cache = auth._TokenCache(0)
+        cache.put("a", {"sub": "a"}, time.time() + 60)
+        self.assertIsNone(cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""The daily broadcast's host-wide leases and shared stats in services.py.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import time
+import unittest
+from unittest import mock
+
+import support  # noqa: F401  (configures the backend before it is imported)
+import kv_store
+import services
+
+
+class BroadcastLeaseTest(unittest.TestCase):
+    def setUp(self):
+        self.day_key = services._BROADCAST_DAY_KEY + time.strftime("%Y-%m-%d")
+        for key in (self.day_key, services._BROADCAST_RUNNING_KEY, services._BROADCAST_STATS_KEY):
+            kv_store.pop(key)
+            self.addCleanup(kv_store.pop, key)
+        self.pages = mock.Mock(side_effect=lambda rows, template: len(rows))
+        for patcher in (
+            mock.patch.object(services, "get_trending_recipes", lambda: [{"recipe_id": "r1"}]),
+            mock.patch.object(services, "_iter_device_user_pages", lambda size: iter([[{"user_id": "a"}] * 3])),
+            mock.patch.object(services, "_broadcast_page", self.pages),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_one_daily_run_per_host(self):
+        self.assertTrue(services.send_daily_recipe_notification()["success"])
+        self.assertEqual(services.send_daily_recipe_notification(),
+                         {"success": False, "reason": "Already sent today"})
+        self.assertEqual(self.pages.call_count, 1)
+
+    def test_a_running_broadcast_elsewhere_blocks_a_manual_run(self):
+        kv_store.put(services._BROADCAST_RUNNING_KEY, {"pid": -1, "started_at": time.time()}, 60)
+        result = services.send_scheduled_recipe_notification()
+        self.assertEqual(result["reason"], "Broadcast already running")
+        self.pages.assert_not_called()
+        self.assertEqual(services.get_broadcast_stats()["state"], "running")
+
+    def test_stats_are_read_from_the_shared_store(self):
+        services.send_scheduled_recipe_notification()
+        stats = services.get_broadcast_stats()
+        self.assertEqual(stats["state"], "idle")
+        self.assertEqual(stats["last_run"]["notifications_sent"], 3)
+        self.assertEqual(stats["last_run"]["users_scanned"], 3)
+        self.assertEqual(kv_store.get(services._BROADCAST_STATS_KEY)["last_run"]["pages"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
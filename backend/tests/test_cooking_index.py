@@ -0,0 +1,131 @@
+"""RecipeIngredientIndex against the linear scan /api/cook used before it.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import random
+import unittest
+
+import support  # noqa: F401  (configures the backend before it is imported)
+from cooking import RecipeIngredientIndex
+from seed_database import SAMPLE_RECIPES
+
+
+def baseline_scores(recipes, ingredients, desired_time_minutes, limit=10):
+    """The scorer generate_cooking_instructions ran over every row before the index."""
+    normalized_input = [ing.lower().strip() for ing in ingredients]
+    scored_recipes = []
+    for recipe in recipes:
+        recipe_ingredients = recipe.get('recipe_ingredients', [])
+        if not isinstance(recipe_ingredients, list):
+            continue
+        normalized_recipe_ingredients = [ing.lower().strip() for ing in recipe_ingredients]
+        ingredients_present = sum(
+            1 for ing in normalized_recipe_ingredients
+            if any(input_ing in ing or ing in input_ing for input_ing in normalized_input)
+        )
+        ingredients_missing = len(normalized_recipe_ingredients) - ingredients_present
+        prep_time = recipe.get('recipe_prep_time', 0) or 0
+        cook_time = recipe.get('recipe_cook_time', 0) or 0
+        time_penalty = max(prep_time + cook_time - desired_time_minutes, 0) * 2
+        score = (ingredients_present * 5) - (ingredients_missing * 3) - time_penalty
+        scored_recipes.append({**recipe, 'score': score})
+    scored_recipes.sort(key=lambda x: x['score'], reverse=True)
+    return scored_recipes[:limit]
+
+
+_WORDS = ["egg", "eggs", "rice", "tomato", "tomato sauce", "onion", "red onion", "salt", "oil", "olive oil",
+          "garlic", "milk", "flour", "butter", "chicken breast", "chicken", "pepper", "black pepper", "ab", "x"]
+
+
+def fixture_recipes(count=300, seed=7):
+    """Sample recipes plus random ones with shared ingredients and times, so scores tie often."""
+    rng = random.Random(seed)
+    recipes = [dict(recipe, recipe_id=f"sample-{i}") for i, recipe in enumerate(SAMPLE_RECIPES)]
+    for i in range(count):
+        recipes.append({
+            "recipe_id": f"r{i}",
+            "recipe_name": f"Recipe {i}",
+            "recipe_ingredients": rng.sample(_WORDS, rng.randint(1, 6)),
+            "recipe_prep_time": rng.choice([0, 10, 20]),
+            "recipe_cook_time": rng.choice([None, 15, 30]),
+        })
+    recipes.append({"recipe_id": "no-list", "recipe_ingredients": "eggs, rice"})
+    return recipes
+
+
+def _ranked(results):
+    return [(row["recipe_id"], row["score"]) for row in results]
+
+
+class RecipeIngredientIndexTest(unittest.TestCase):
+    QUERIES = [
+        (["Eggs", "Rice"], float("inf")),
+        (["tomato"], 30),
+        (["red onion", "olive oil", "garlic"], 25),
+        (["ab"], float("inf")),
+        (["x", "Salt and pepper"], 40),
+        (["2 carrots", "potatoes", "onion"], 60),
+        (["nothing matches this"], float("inf")),
+        ([], 10),
+    ]
+
+    def setUp(self):
+        self.recipes = fixture_recipes()
+        self.index = RecipeIngredientIndex()
+        self.index.build(self.recipes)
+
+    def assertMatchesBaseline(self, recipes):
+        for ingredients, minutes in self.QUERIES:
+            with self.subTest(ingredients=ingredients, minutes=minutes):
+                self.assertEqual(
+                    _ranked(self.index.top_matches(ingredients, minutes)),
+                    _ranked(baseline_scores(recipes, ingredients, minutes)),
+                )
+
+    def test_ranks_like_the_linear_scan(self):
+        self.assertMatchesBaseline(self.recipes)
+
+    def test_ties_keep_table_order(self):
+        tied = [{"recipe_id": f"t{i}", "recipe_ingredients": ["egg"], "recipe_prep_time": 5} for i in range(15)]
+        self.index.build(tied)
+        self.assertEqual([row["recipe_id"] for row in self.index.top_matches(["egg"], 60)],
+                         [f"t{i}" for i in range(10)])
+
+    def test_upsert_updates_in_place(self):
+        changed = dict(self.recipes[10], recipe_ingredients=["eggs", "rice", "milk"], recipe_cook_time=0)
+        self.index.upsert(changed)
+        self.recipes[10] = changed
+        self.assertMatchesBaseline(self.recipes)
+
+    def test_upsert_merges_partial_rows(self):
+        recipe_id = self.recipes[20]["recipe_id"]
+        self.index.upsert({"recipe_id": recipe_id, "recipe_ingredients": ["tomato sauce"]})
+        self.recipes[20] = dict(self.recipes[20], recipe_ingredients=["tomato sauce"])
+        self.assertMatchesBaseline(self.recipes)
+
+    def test_upsert_appends_new_recipes(self):
+        new = {"recipe_id": "new", "recipe_ingredients": ["eggs", "rice"], "recipe_prep_time": 0}
+        self.index.upsert(new)
+        self.recipes.append(new)
+        self.assertMatchesBaseline(self.recipes)
+        # Whole ranking, so the new recipe's position is checked even outside the top 10
+        everything = len(self.recipes)
+        self.assertEqual(_ranked(self.index.top_matches(["eggs", "rice"], 60, limit=everything)),
+                         _ranked(baseline_scores(self.recipes, ["eggs", "rice"], 60, limit=everything)))
+
+    def test_remove(self):
+        removed = self.recipes.pop(30)
+        self.index.remove(removed["recipe_id"])
+        self.assertMatchesBaseline(self.recipes)
+        ranked = self.index.top_matches([removed["recipe_ingredients"][0]], float("inf"), limit=len(self.recipes))
+        self.assertNotIn(removed["recipe_id"], [row["recipe_id"] for row in ranked])
+
+    def test_upsert_before_build_is_ignored(self):
+        index = RecipeIngredientIndex()
+        index.upsert({"recipe_id": "early", "recipe_ingredients": ["egg"]})
+        self.assertTrue(index.is_stale())
+        self.assertEqual(index.top_matches(["egg"], 10), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Direct uploads: /api/uploads/ticket, Cloudinary, /api/uploads/confirm and the size check.
+
+Runs against benchmarks/fake_supabase.py, which also stands in for Cloudinary.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import time
+import unittest
+from unittest import mock
+
+import jwt
+import requests
+
+import support
+
+_state = {}
+
+
+def setUpModule():
+    import fake_supabase
+    import app as app_module
+    import image_upload
+    import notification_outbox
+    import services
+
+    support.serve_fake_supabase()
+    for name, module in (("fake", fake_supabase), ("app", app_module), ("image_upload", image_upload),
+                         ("outbox", notification_outbox), ("services", services)):
+        _state[name] = module
+
+
+def _auth(user_id):
+    now = int(time.time())
+    claims = {"sub": user_id, "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + 3600}
+    return {"Authorization": f"Bearer {jwt.encode(claims, support.JWT_SECRET, algorithm='HS256')}"}
+
+
+class DirectUploadTest(unittest.TestCase):
+    def setUp(self):
+        self.client = _state["app"].app.test_client()
+        self.cloudinary = requests.Session()
+        self.addCleanup(self.cloudinary.close)
+        # Size checks are run by the test, not by outbox workers
+        for patcher in (mock.patch.object(_state["app"], "_background_started", True),
+                        mock.patch.object(_state["outbox"], "start", lambda: None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def upload(self, user_id, kind, size):
+        """Ticket, then the upload to Cloudinary; returns Cloudinary's response."""
+        ticket = self.client.post("/api/uploads/ticket", json={"kind": kind}, headers=_auth(user_id)).get_json()
+        resp = self.cloudinary.post(ticket["upload_url"], data=ticket["fields"],
+                                    files={"file": ("a.jpg", b"\xff" * size, "image/jpeg")})
+        self.assertEqual(resp.status_code, 200, resp.text)
+        return resp.json()
+
+    def confirm(self, user_id, uploaded, **extra):
+        return self.client.post("/api/uploads/confirm", headers=_auth(user_id), json=dict(uploaded, **extra))
+
+    def exists(self, public_id):
+        url = _state["image_upload"].get_resource_url("tests", public_id)
+        return self.cloudinary.get(url).status_code == 200
+
+    def run_size_checks(self):
+        while _state["outbox"].run_pending_once():
+            pass
+
+    def test_confirm_does_not_ask_the_admin_api(self):
+        user = _state["fake"].user_id(10)
+        uploaded = self.upload(user, "avatar", 2000)
+        with mock.patch.object(_state["image_upload"].http_client, "get") as admin_get:
+            response = self.confirm(user, uploaded)
+        self.assertEqual(response.status_code, 200, response.get_json())
+        admin_get.assert_not_called()
+        self.assertEqual(response.get_json()["user"]["user_avatar"], response.get_json()["avatar_url"])
+
+    def test_oversize_avatar_is_deleted_and_unset(self):
+        user = _state["fake"].user_id(11)
+        uploaded = self.upload(user, "avatar", 2000)
+        with mock.patch.object(_state["image_upload"], "MAX_UPLOAD_BYTES", 1000):
+            self.assertEqual(self.confirm(user, uploaded).status_code, 200)
+            self.run_size_checks()
+        self.assertFalse(self.exists(uploaded["public_id"]))
+        self.assertIsNone(_state["services"].get_user(user).get("user_avatar"))
+
+    def test_size_check_keeps_images_within_the_limit(self):
+        user = _state["fake"].user_id(12)
+        uploaded = self.upload(user, "avatar", 2000)
+        url = self.confirm(user, uploaded).get_json()["avatar_url"]
+        self.run_size_checks()
+        self.assertTrue(self.exists(uploaded["public_id"]))
+        self.assertEqual(_state["services"].get_user(user).get("user_avatar"), url)
+
+    def test_size_check_keeps_a_newer_avatar(self):
+        user = _state["fake"].user_id(13)
+        first = self.upload(user, "avatar", 2000)
+        second = self.upload(user, "avatar", 500)
+        with mock.patch.object(_state["image_upload"], "MAX_UPLOAD_BYTES", 1000):
+            self.confirm(user, first)
+            newer = self.confirm(user, second).get_json()["avatar_url"]
+            self.run_size_checks()
+        self.assertFalse(self.exists(first["public_id"]))
+        self.assertEqual(_state["services"].get_user(user).get("user_avatar"), newer)
+
+    def test_missing_recipe_is_404(self):
+        user = _state["fake"].user_id(14)
+        response = self.confirm(user, self.upload(user, "recipe", 100), recipe_id="no-such-recipe")
+        self.assertEqual(response.status_code, 404)
+
+    def test_recipe_the_update_cannot_reach_is_403(self):
+        user = _state["fake"].user_id(15)
+        uploaded = self.upload(user, "recipe", 100)
+        # RLS filters another user's recipe out of the update but not out of reads
+        with mock.patch.object(_state["app"], "set_recipe_image", return_value=None):
+            response = self.confirm(user, uploaded, recipe_id=_state["fake"].recipe_id(0))
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
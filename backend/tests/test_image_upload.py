@@ -0,0 +1,91 @@
+"""Size limits on image uploads sent without a Content-Length (chunked).
+
+Everything here is refused before Cloudinary would be contacted.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import json
+import time
+import unittest
+from unittest import mock
+
+import jwt
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+import support
+import app as app_module
+import image_upload
+
+_USER = "00000000-0000-4000-8000-000000000001"
+_BOUNDARY = "test-boundary"
+# Every byte value, line breaks included, as in a real image
+_FILLER = bytes(range(256)) * 256
+
+
+def _auth():
+    now = int(time.time())
+    claims = {"sub": _USER, "aud": "authenticated", "role": "authenticated", "iat": now, "exp": now + 3600}
+    return {"Authorization": f"Bearer {jwt.encode(claims, support.JWT_SECRET, algorithm='HS256')}"}
+
+
+class _ChunkedMultipart:
+    """A multipart body of `size` image bytes, read like a chunked request: no length, counted as it goes."""
+
+    def __init__(self, size: int):
+        self._head = (f'--{_BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="a.jpg"\r\n'
+                      f"Content-Type: image/jpeg\r\n\r\n").encode()
+        self._tail = f"\r\n--{_BOUNDARY}--\r\n".encode()
+        self._remaining = size
+        self.consumed = 0
+
+    def read(self, size: int = -1) -> bytes:
+        size = 64 * 1024 if size is None or size < 0 else size
+        if self._head:
+            out, self._head = self._head[:size], self._head[size:]
+        elif self._remaining:
+            out = _FILLER[:min(size, self._remaining, len(_FILLER))]
+            self._remaining -= len(out)
+        else:
+            out, self._tail = self._tail[:size], self._tail[size:]
+        self.consumed += len(out)
+        return out
+
+    readline = read
+
+
+class ChunkedUploadTest(unittest.TestCase):
+    def setUp(self):
+        # No outbox workers or scheduler: nothing here reaches them
+        patcher = mock.patch.object(app_module, "_background_started", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        """(status, JSON body) of an avatar upload of `body`, sent to the app as a server hands it over."""
+        environ = EnvironBuilder(f"/api/users/{_USER}/avatar", method="POST", headers=_auth()).get_environ()
+        environ.pop("CONTENT_LENGTH", None)
+        environ.update({
+            "CONTENT_TYPE": f"multipart/form-data; boundary={_BOUNDARY}",
+            "wsgi.input": body,
+            # Set by servers that de-chunk the body (gunicorn, uvicorn)
+            "wsgi.input_terminated": True,
+        })
+        app_iter, status, _ = run_wsgi_app(app_module.app, environ, buffered=True)
+        return int(status.split()[0]), json.loads(b"".join(app_iter))
+
+    def test_app_caps_request_bodies(self):
+        self.assertEqual(app_module.app.config["MAX_CONTENT_LENGTH"], image_upload.MAX_REQUEST_BYTES)
+
+    def test_parsing_stops_at_the_request_cap(self):
+        body = _ChunkedMultipart(image_upload.MAX_REQUEST_BYTES * 2)
+        status, payload = self.post(body)
+        self.assertEqual((status, payload["error"]), (413, "image_too_large"))
+        self.assertLessEqual(body.consumed, image_upload.MAX_REQUEST_BYTES + 64 * 1024)
+
+    def test_image_over_the_upload_cap_is_refused(self):
+        status, payload = self.post(_ChunkedMultipart(image_upload.MAX_UPLOAD_BYTES + 1))
+        self.assertEqual((status, payload["error"]), (413, "image_too_large"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""Claim ownership in notification_outbox.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import os
+import sqlite3
+import threading
+import unittest
+from unittest import mock
+
+import support
+import notification_outbox as outbox
+
+
+class OutboxClaimTest(unittest.TestCase):
+    def setUp(self):
+        # A file of its own, so workers started by other tests never see these jobs
+        path = os.path.join(support.STATE_DIR, f"outbox-{self.id()}.db")
+        for patcher in (
+            mock.patch.object(outbox, "_DB_PATH", path),
+            mock.patch.object(outbox, "_local", threading.local()),
+            mock.patch.object(outbox, "_schema_ready", False),
+            mock.patch.object(outbox, "start", lambda: None),
+            mock.patch.dict(outbox._handlers, {"test": lambda payload: None}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.path = path
+
+    def _expire_claim(self, job_id):
+        outbox._write("UPDATE outbox_jobs SET locked_at = locked_at - ? WHERE id = ?",
+                      (outbox._VISIBILITY_TIMEOUT_SECONDS + 1, job_id))
+
+    def _job(self, job_id):
+        return outbox._connect().execute(
+            "SELECT status, attempts, claim_token FROM outbox_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+
+    def test_complete_by_a_stale_claim_is_ignored(self):
+        job_id = outbox.enqueue("test", {})
+        _, first = outbox._claim()
+        self._expire_claim(job_id)
+        row, second = outbox._claim()
+        self.assertEqual(row[0], job_id)
+        self.assertNotEqual(first, second)
+
+        outbox._complete(job_id, first)
+        self.assertEqual(self._job(job_id), ("running", 2, second))
+        outbox._complete(job_id, second)
+        self.assertIsNone(self._job(job_id))
+
+    def test_fail_by_a_stale_claim_is_ignored(self):
+        job_id = outbox.enqueue("test", {})
+        _, first = outbox._claim()
+        self._expire_claim(job_id)
+        _, second = outbox._claim()
+
+        outbox._fail(job_id, first, 1, "late failure")
+        self.assertEqual(self._job(job_id), ("running", 2, second))
+        outbox._fail(job_id, second, 2, "boom")
+        self.assertEqual(self._job(job_id), ("pending", 2, None))
+
+    def test_run_pending_once_completes_its_own_claim(self):
+        job_id = outbox.enqueue("test", {})
+        self.assertTrue(outbox.run_pending_once())
+        self.assertIsNone(self._job(job_id))
+        self.assertFalse(outbox.run_pending_once())
+
+    def test_files_without_claim_token_are_migrated(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript(
+            "CREATE TABLE outbox_jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT NOT NULL, "
+            "payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+            "available_at REAL NOT NULL, locked_at REAL, last_error TEXT, created_at REAL NOT NULL);"
+            "INSERT INTO outbox_jobs (kind, payload, available_at, created_at) VALUES ('test', '{}', 0, 0);"
+        )
+        conn.close()
+        self.assertTrue(outbox.run_pending_once())
+        self.assertIsNone(self._job(1))
+
+
+if __name__ == "__main__":
+    unittest.main()
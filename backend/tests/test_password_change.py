@@ -0,0 +1,66 @@
+"""The pending new password kept between /auth/password/change/request and /verify.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import hashlib
+import time
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+import jwt
+
+import support
+import app as app_module
+import kv_store
+
+_NEW_PASSWORD = "correct horse battery"
+
+
+def _auth(user_id):
+    now = int(time.time())
+    claims = {"sub": user_id, "email": "cook@example.com", "aud": "authenticated", "role": "authenticated",
+              "iat": now, "exp": now + 3600}
+    return {"Authorization": f"Bearer {jwt.encode(claims, support.JWT_SECRET, algorithm='HS256')}"}
+
+
+class PendingPasswordTest(unittest.TestCase):
+    def setUp(self):
+        self.user = str(uuid.uuid4())
+        self.key = app_module._PENDING_PASSWORD_KEY + self.user
+        self.addCleanup(kv_store.pop, self.key)
+        self.client = app_module.app.test_client()
+        # Supabase Auth is not called: the current password is accepted and the OTP "sent"
+        for patcher in (mock.patch.object(app_module, "_background_started", True),
+                        mock.patch.object(app_module, "_verify_current_password", return_value=True),
+                        mock.patch.object(app_module.http_client, "post",
+                                          return_value=SimpleNamespace(status_code=200, text=""))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def request_change(self):
+        response = self.client.post("/auth/password/change/request", headers=_auth(self.user),
+                                    json={"current_password": "old password", "new_password": _NEW_PASSWORD})
+        self.assertEqual(response.status_code, 200, response.get_json())
+        return kv_store.get(self.key)
+
+    def test_stored_digest_is_keyed(self):
+        stored = self.request_change()["new_password_hash"]
+        self.assertNotEqual(stored, hashlib.sha256(_NEW_PASSWORD.encode("utf-8")).hexdigest())
+        self.assertNotIn(_NEW_PASSWORD, str(kv_store.get(self.key)))
+
+    def test_same_password_differs_per_user(self):
+        self.assertNotEqual(app_module._pending_password_digest("a", _NEW_PASSWORD),
+                            app_module._pending_password_digest("b", _NEW_PASSWORD))
+
+    def test_verify_rejects_a_different_password(self):
+        self.request_change()
+        response = self.client.post("/auth/password/change/verify", headers=_auth(self.user),
+                                    json={"otp": "123456", "new_password": _NEW_PASSWORD + "!"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("doesn't match", response.get_json()["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Host-wide token buckets and bulkheads in rate_limit.py.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import os
+import subprocess
+import sys
+import time
+import unittest
+import uuid
+from unittest import mock
+
+from flask import Flask
+
+import support
+import rate_limit
+
+# Takes up to 10 tokens from one bucket and prints how many it got
+_OTHER_WORKER = """
+import sys
+sys.path.insert(0, {backend!r})
+import rate_limit
+print(sum(rate_limit.take([({key!r}, 20, 3600)]) == 0 for _ in range(10)))
+"""
+
+
+def _key():
+    return f"test:{uuid.uuid4().hex}"
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_bucket_refills_at_its_rate(self):
+        key = _key()
+        self.assertEqual(rate_limit.take([(key, 2, 0.5)]), 0)
+        self.assertEqual(rate_limit.take([(key, 2, 0.5)]), 0)
+        wait = rate_limit.take([(key, 2, 0.5)])
+        self.assertGreater(wait, 0)
+        self.assertLessEqual(wait, 0.25)
+        time.sleep(wait + 0.05)
+        self.assertEqual(rate_limit.take([(key, 2, 0.5)]), 0)
+
+    def test_all_buckets_or_none(self):
+        full, empty = _key(), _key()
+        rate_limit.take([(empty, 1, 3600)])
+        self.assertGreater(rate_limit.take([(full, 1, 3600), (empty, 1, 3600)]), 0)
+        # The full bucket kept its token
+        self.assertEqual(rate_limit.take([(full, 1, 3600)]), 0)
+
+    def test_limit_is_exact_across_workers(self):
+        key = _key()
+        script = _OTHER_WORKER.format(backend=support.BACKEND_DIR, key=key)
+        workers = [subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True,
+                                    env=os.environ.copy()) for _ in range(4)]
+        granted = sum(int(worker.communicate(timeout=60)[0]) for worker in workers)
+        self.assertEqual(granted, 20)
+
+
+class BulkheadTest(unittest.TestCase):
+    def setUp(self):
+        self.group = _key()
+
+    def test_cap_is_exact(self):
+        slots = [rate_limit.acquire(self.group, 2) for _ in range(3)]
+        self.assertIsNotNone(slots[0])
+        self.assertIsNotNone(slots[1])
+        self.assertIsNone(slots[2])
+        self.assertEqual(rate_limit.running()[self.group], 2)
+        rate_limit.release(slots[0])
+        self.assertIsNotNone(rate_limit.acquire(self.group, 2))
+
+    def test_slot_of_a_dead_worker_expires(self):
+        with mock.patch.object(rate_limit, "_SLOT_LEASE_SECONDS", -1):
+            self.assertIsNotNone(rate_limit.acquire(self.group, 1))
+        self.assertIsNotNone(rate_limit.acquire(self.group, 1))
+
+
+class MiddlewareTest(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        app.add_url_rule("/ping", "ping", lambda: "pong")
+        app.add_url_rule("/cook", "cook_recipe", lambda: "cooked")
+        rate_limit.init_app(app)
+        self.client = app.test_client()
+        # A fresh address per test, so the IP buckets start full
+        self.ip = f"10.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}.{uuid.uuid4().int % 250}"
+        patcher = mock.patch.object(rate_limit, "ENABLED", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, path):
+        return self.client.get(path, environ_base={"REMOTE_ADDR": self.ip})
+
+    def test_anonymous_clients_are_limited_by_address(self):
+        with mock.patch.dict(os.environ, {"RATE_LIMIT_DEFAULT": "2/60"}):
+            statuses = [self.get("/ping").status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_429_has_retry_after(self):
+        with mock.patch.dict(os.environ, {"RATE_LIMIT_IP": "1/60"}):
+            self.get("/ping")
+            response = self.get("/ping")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.get_json()["error"], "rate_limited")
+        self.assertEqual(response.headers["Retry-After"], str(response.get_json()["retry_after"]))
+        self.assertGreaterEqual(int(response.headers["Retry-After"]), 59)
+
+    def test_full_bulkhead_is_too_busy(self):
+        group = f"cook{uuid.uuid4().hex[:8]}"
+        with mock.patch.dict(rate_limit.ROUTE_GROUPS, {"cook_recipe": group}), \
+                mock.patch.dict(os.environ, {f"BULKHEAD_{group.upper()}": "1"}):
+            # Another worker holds the only slot
+            slot = rate_limit.acquire(group, 1)
+            response = self.get("/cook")
+            self.assertEqual((response.status_code, response.get_json()["error"]), (429, "too_busy"))
+            self.assertEqual(response.headers["Retry-After"], "1")
+            rate_limit.release(slot)
+            self.assertEqual(self.get("/cook").status_code, 200)
+            # The request gave its slot back
+            self.assertEqual(rate_limit.running().get(group, 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""SharedTTLCache read fills against concurrent writes.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import unittest
+import uuid
+
+import support  # noqa: F401  (configures the backend before it is imported)
+import kv_store
+from ttl_cache import SharedTTLCache
+
+
+class SharedTTLCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.namespace = f"test-{uuid.uuid4().hex}"
+        self.cache = SharedTTLCache(self.namespace, ttl=60, local_ttl=60)
+
+    def other_worker(self):
+        return SharedTTLCache(self.namespace, ttl=60, local_ttl=60)
+
+    def test_a_slow_read_does_not_overwrite_a_write(self):
+        writer = self.other_worker()
+
+        def load():
+            # The toggle commits and writes through while this read is in flight
+            writer.set("user", ["new"])
+            return ["old"]
+
+        self.assertEqual(self.cache.get_or_load("user", load), ["old"])
+        self.assertEqual(self.cache.get("user"), ["new"])
+        self.assertEqual(self.other_worker().get("user"), ["new"])
+
+    def test_fill_stores_when_empty(self):
+        self.cache.fill("user", ["a"])
+        self.assertEqual(self.other_worker().get("user"), ["a"])
+
+    def test_set_replaces_a_filled_value(self):
+        self.cache.fill("user", ["a"])
+        self.other_worker().set("user", ["b"])
+        self.assertEqual(kv_store.get(f"{self.namespace}:user"), ["b"])
+        self.assertEqual(self.other_worker().get("user"), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
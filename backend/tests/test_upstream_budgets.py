@@ -0,0 +1,117 @@
+"""Upstream call budgets for the hot routes.
+
+Runs the real Flask app against benchmarks/fake_supabase.py (started in this
+process, nothing leaves the machine) and pins how many PostgREST/Auth calls
+each route may make, using request_accounting.assert_max_upstream_calls. A
+route that starts making a call per row (N+1) or loses a cache fails here.
+
+    cd backend && python -m unittest discover -s tests
+"""
+import time
+import unittest
+from unittest import mock
+
+import jwt
+
+import support
+
+_state = {}
+
+
+def setUpModule():
+    import fake_supabase
+    import app as app_module
+    import request_accounting
+    import services
+
+    support.serve_fake_supabase()
+    _state["user_id"] = fake_supabase.user_id
+    _state["chef_id"] = fake_supabase.chef_id
+    _state["services"] = services
+    _state["app"] = app_module.app
+    _state["accounting"] = request_accounting
+
+
+def _auth(user_index: int):
+    now = int(time.time())
+    claims = {
+        "sub": _state["user_id"](user_index),
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return {"Authorization": f"Bearer {jwt.encode(claims, support.JWT_SECRET, algorithm='HS256')}"}
+
+
+class UpstreamBudgetTest(unittest.TestCase):
+    # Each test signs in as its own user, so per-user caches start cold
+    def setUp(self):
+        self.client = _state["app"].test_client()
+        self.assert_max_calls = _state["accounting"].assert_max_upstream_calls
+
+    def test_users_list(self):
+        headers = _auth(1)
+        # users, plus the caller's follows for is_followed
+        response = self.assert_max_calls(self.client, "/api/users", 2, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all("is_followed" in user for user in response.get_json()))
+        # The follow set is cached for the next request
+        self.assert_max_calls(self.client, "/api/users", 1, headers=headers)
+
+    def test_users_list_signed_out(self):
+        response = self.assert_max_calls(self.client, "/api/users", 1)
+        self.assertEqual(response.status_code, 200)
+
+    def test_chefs_on_fire(self):
+        headers = _auth(2)
+        response = self.assert_max_calls(self.client, "/api/chefs/on-fire", 2, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assert_max_calls(self.client, "/api/chefs/on-fire", 1, headers=headers)
+
+    def test_favorites(self):
+        # The user's favourite ids, then one query for all of the recipes
+        response = self.assert_max_calls(self.client, "/api/favorites", 2, headers=_auth(3))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json())
+
+    def test_create_recipe(self):
+        # Follower notifications go through the outbox, not the request
+        response = self.assert_max_calls(
+            self.client, "/api/recipes", 1, method="POST", headers=_auth(4),
+            json={"recipe_name": "Budget soup", "recipe_ingredients": ["water", "salt"]},
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_chef_follow_status(self):
+        headers = _auth(6)
+        chef = _state["chef_id"](0)
+        # The chef, plus whether the caller follows just this chef
+        response = self.assert_max_calls(self.client, f"/api/chefs/{chef}", 2, headers=headers)
+        self.assertIn("is_followed", response.get_json())
+        self.assert_max_calls(self.client, f"/api/chefs/{chef}", 1, headers=headers)
+
+    def test_follow_fallback_takes_the_count_from_its_write(self):
+        headers = _auth(7)
+        chef = _state["chef_id"](1)
+        before = self.client.get(f"/api/chefs/{chef}", headers=headers).get_json()
+        followed, count = before["is_followed"], before["user_followers_count"]
+        with mock.patch.object(_state["services"], "_follow_rpc_available", False):
+            for _ in range(2):
+                # The delete, then the insert if nothing was deleted
+                response = self.assert_max_calls(self.client, f"/api/chefs/{chef}/follow", 2,
+                                                 method="POST", headers=headers)
+                self.assertEqual(response.get_json(), {"is_following": not followed,
+                                                       "followers_count": count - 1 if followed else count + 1})
+                # The toggle retires the cached answer in every worker
+                self.assertEqual(self.client.get(f"/api/chefs/{chef}", headers=headers).get_json()["is_followed"],
+                                 not followed)
+                followed = not followed
+
+    def test_budget_violation_is_reported(self):
+        with self.assertRaises(AssertionError):
+            self.assert_max_calls(self.client, "/api/users", 0, headers=_auth(5))
+
+
+if __name__ == "__main__":
+    unittest.main()
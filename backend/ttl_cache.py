@@ -0,0 +1,169 @@
+"""Small thread-safe TTL + LRU cache used by the service layer.
+
+Entries expire after `ttl` seconds and the least recently used entry is
+evicted once `max_size` is reached. Hit/miss counters are kept so the cache
+can be monitored.
+
+SharedTTLCache keeps its entries in kv_store as well, so a write or
+invalidation in one worker process reaches the others within `local_ttl`.
+Values loaded on a read are only added if absent (fill), so a slow read
+never overwrites what a writer stored after it.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import kv_store
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_size: int = 256, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Read-through lookup: return the cached value or load and store it."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+
+class SharedTTLCache(TTLCache):
+    """TTLCache backed by kv_store, for per-user state every worker must agree on.
+
+    Entries are kept in kv_store for `ttl` seconds and copied into this
+    process for only `local_ttl`, so set() and pop() in one worker are seen
+    by the others that quickly. kv_store values are JSON: `encode` turns a
+    value into something json.dumps accepts and `decode` turns it back. If
+    kv_store is unavailable the cache falls back to the local copy.
+    """
+
+    def __init__(self, namespace: str, max_size: int = 256, ttl: float = 60.0, local_ttl: float = 2.0,
+                 encode: Callable[[Any], Any] = lambda value: value,
+                 decode: Callable[[Any], Any] = lambda value: value):
+        super().__init__(max_size=max_size, ttl=min(local_ttl, ttl))
+        self.namespace = namespace
+        self.shared_ttl = ttl
+        self.shared_hits = 0
+        self._encode = encode
+        self._decode = decode
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = super().get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        try:
+            raw = kv_store.get(self._shared_key(key), _MISSING)
+        except Exception as e:
+            print(f"[cache] {self.namespace}: shared read failed: {e}")
+            return default
+        if raw is _MISSING:
+            return default
+        value = self._decode(raw)
+        super().set(key, value)
+        with self._lock:
+            # Served without a load, so it counts as a hit
+            self.misses -= 1
+            self.hits += 1
+            self.shared_hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        super().set(key, value)
+        try:
+            kv_store.put(self._shared_key(key), self._encode(value), self.shared_ttl if ttl is None else ttl)
+        except Exception as e:
+            print(f"[cache] {self.namespace}: shared write failed: {e}")
+
+    def fill(self, key: Hashable, value: Any) -> None:
+        """Store a value loaded on a read path, unless a writer got there first.
+
+        The load may have started before a concurrent set(), so it must not
+        replace that newer value; it is kept locally only if it was added.
+        """
+        try:
+            added = kv_store.add(self._shared_key(key), self._encode(value), self.shared_ttl)
+        except Exception as e:
+            print(f"[cache] {self.namespace}: shared write failed: {e}")
+            added = True
+        if added:
+            super().set(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.fill(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> None:
+        """Drop `key` here and in kv_store, so every worker reloads it."""
+        super().pop(key)
+        try:
+            kv_store.pop(self._shared_key(key))
+        except Exception as e:
+            print(f"[cache] {self.namespace}: shared invalidation failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["shared_ttl_seconds"] = self.shared_ttl
+        stats["shared_hits"] = self.shared_hits
+        return stats
@@ -0,0 +1,186 @@
+"""Content-hash index of uploaded images.
+
+Maps the SHA-256 of an image's bytes (per Cloudinary folder) to the
+secure_url it was uploaded to, so sending the same image again, e.g. a retry
+after a dropped mobile connection, returns the existing URL without another
+Cloudinary upload.
+
+The index is a local SQLite file shared by every worker process on the host.
+It holds at most UPLOAD_DEDUPE_MAX_ENTRIES images; the least recently used
+are evicted first, 1% of the limit at a time, when a store takes the index
+over it. Triggers keep the entry count in upload_hashes_size, so a store
+reads one row instead of counting the table. Entries older than
+UPLOAD_DEDUPE_MAX_AGE_DAYS are ignored in case the asset has since been removed from Cloudinary. Lookups that hit
+or miss are counted in chefkit_cache_requests_total{cache="upload_dedupe"}.
+Any SQLite error is logged and treated as a miss, so the cache never blocks
+an upload. Waits for another worker's write lock are cooperative
+(sqlite_busy) and give up after _BUSY_TIMEOUT_SECONDS.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import metrics
+import sqlite_busy
+
+_DB_PATH = os.getenv(
+    "UPLOAD_DEDUPE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "upload_dedupe.db"),
+)
+MAX_ENTRIES = int(os.getenv("UPLOAD_DEDUPE_MAX_ENTRIES", "50000"))
+MAX_AGE_SECONDS = float(os.getenv("UPLOAD_DEDUPE_MAX_AGE_DAYS", "30")) * 86400
+ENABLED = MAX_ENTRIES > 0
+# Entries evicted below MAX_ENTRIES at once, so eviction runs every
+# _EVICT_BATCH stores rather than on each one
+_EVICT_BATCH = MAX_ENTRIES // 100
+_BUSY_TIMEOUT_SECONDS = 1.0
+
+# One transaction, so no row lands between the count and its triggers
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS upload_hashes (
+    sha256 TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    secure_url TEXT NOT NULL,
+    public_id TEXT,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    PRIMARY KEY (sha256, folder)
+);
+CREATE INDEX IF NOT EXISTS idx_upload_hashes_lru ON upload_hashes (last_used_at);
+CREATE TABLE IF NOT EXISTS upload_hashes_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO upload_hashes_size (id, entries) SELECT 0, COUNT(*) FROM upload_hashes;
+CREATE TRIGGER IF NOT EXISTS upload_hashes_counted_insert AFTER INSERT ON upload_hashes
+BEGIN
+    UPDATE upload_hashes_size SET entries = entries + 1 WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS upload_hashes_counted_delete AFTER DELETE ON upload_hashes
+BEGIN
+    UPDATE upload_hashes_size SET entries = entries - 1 WHERE id = 0;
+END;
+COMMIT;
+"""
+
+_local = threading.local()
+_schema_ready = False
+_schema_lock = threading.Lock()
+
+_counters = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+_counters_lock = threading.Lock()
+
+
+def _bump(name: str, amount: int = 1) -> None:
+    with _counters_lock:
+        _counters[name] += amount
+
+
+def _connect() -> sqlite3.Connection:
+    global _schema_ready
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite_busy.connect(_DB_PATH)
+        _local.conn = conn
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                sqlite_busy.retry(lambda: conn.executescript(_SCHEMA), _BUSY_TIMEOUT_SECONDS)
+                _schema_ready = True
+    return conn
+
+
+def _size(conn: sqlite3.Connection) -> int:
+    return conn.execute("SELECT entries FROM upload_hashes_size WHERE id = 0").fetchone()[0]
+
+
+def _execute(conn: sqlite3.Connection, sql: str, params=()) -> sqlite3.Cursor:
+    return sqlite_busy.retry(lambda: conn.execute(sql, params), _BUSY_TIMEOUT_SECONDS)
+
+
+def lookup(sha256: str, folder: str) -> Optional[str]:
+    """secure_url of an earlier upload of the same bytes into `folder`, if known."""
+    if not ENABLED:
+        return None
+    now = time.time()
+    try:
+        conn = _connect()
+        row = conn.execute(
+            "SELECT secure_url FROM upload_hashes WHERE sha256 = ? AND folder = ? AND created_at > ?",
+            (sha256, folder, now - MAX_AGE_SECONDS),
+        ).fetchone()
+        if row is not None:
+            _execute(
+                conn,
+                "UPDATE upload_hashes SET last_used_at = ? WHERE sha256 = ? AND folder = ?",
+                (now, sha256, folder),
+            )
+    except sqlite3.Error as e:
+        print(f"[upload-dedupe] lookup failed: {e}")
+        row = None
+    _bump("hits" if row is not None else "misses")
+    return row[0] if row is not None else None
+
+
+def store(sha256: str, folder: str, secure_url: str, public_id: Optional[str], size: int) -> None:
+    """Remember an upload and evict the least recently used entries past MAX_ENTRIES."""
+    if not ENABLED:
+        return
+    now = time.time()
+    try:
+        conn = _connect()
+        # An upsert, not INSERT OR REPLACE: REPLACE's implicit delete does
+        # not fire the delete trigger, and the count would drift
+        _execute(
+            conn,
+            "INSERT INTO upload_hashes "
+            "(sha256, folder, secure_url, public_id, bytes, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (sha256, folder) DO UPDATE SET secure_url = excluded.secure_url, "
+            "public_id = excluded.public_id, bytes = excluded.bytes, created_at = excluded.created_at, "
+            "last_used_at = excluded.last_used_at",
+            (sha256, folder, secure_url, public_id, size, now, now),
+        )
+        evicted = 0
+        if _size(conn) > MAX_ENTRIES:
+            # The limit is recomputed in the statement, so workers evicting
+            # at the same time do not each remove a batch
+            evicted = _execute(
+                conn,
+                "DELETE FROM upload_hashes WHERE rowid IN ("
+                "  SELECT rowid FROM upload_hashes ORDER BY last_used_at"
+                "  LIMIT max(0, (SELECT entries FROM upload_hashes_size WHERE id = 0) - ?))",
+                (MAX_ENTRIES - _EVICT_BATCH,),
+            ).rowcount
+    except sqlite3.Error as e:
+        print(f"[upload-dedupe] store failed: {e}")
+        return
+    _bump("stored")
+    if evicted > 0:
+        _bump("evicted", evicted)
+
+
+def stats() -> Dict[str, float]:
+    """Lookup counters of this process, plus the hit rate and current index size."""
+    with _counters_lock:
+        snapshot: Dict[str, float] = dict(_counters)
+    lookups = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+    try:
+        snapshot["entries"] = _size(_connect())
+    except sqlite3.Error:
+        snapshot["entries"] = -1
+    return snapshot
+
+
+def _dedupe_metrics():
+    with _counters_lock:
+        hits, misses = _counters["hits"], _counters["misses"]
+    yield "chefkit_cache_requests_total", {"cache": "upload_dedupe", "result": "hit"}, hits
+    yield "chefkit_cache_requests_total", {"cache": "upload_dedupe", "result": "miss"}, misses
+
+
+metrics.register_collector(_dedupe_metrics)
@@ -0,0 +1,69 @@
+import 'dart:convert';
+import 'dart:typed_data';
+import 'package:http/http.dart' as http;
+import 'config.dart';
+
+/// Uploads images straight to Cloudinary so the bytes never pass through
+/// the backend: ask the backend for a signed ticket, post the image to
+/// Cloudinary with it, then confirm so the backend can store the URL.
+class DirectImageUpload {
+  /// [kind] is `avatar` (updates the user's avatar) or `recipe`; pass
+  /// [recipeId] to also set that recipe's image.
+  ///
+  /// Returns the confirm response: `avatar_url` and `user` for avatars,
+  /// `image_url` (and `recipe`) for recipe images.
+  static Future<Map<String, dynamic>> upload({
+    required Uint8List bytes,
+    required String kind,
+    required String accessToken,
+    String filename = 'upload.jpg',
+    String? recipeId,
+  }) async {
+    final baseUrl = AppConfig.baseUrl;
+    final headers = {
+      'Authorization': 'Bearer $accessToken',
+      'Content-Type': 'application/json',
+    };
+
+    final ticketResp = await http.post(
+      Uri.parse('$baseUrl/api/uploads/ticket'),
+      headers: headers,
+      body: jsonEncode({'kind': kind}),
+    );
+    if (ticketResp.statusCode != 200) {
+      throw Exception('Upload ticket failed: ${ticketResp.body}');
+    }
+    final ticket = jsonDecode(ticketResp.body) as Map<String, dynamic>;
+
+    final fields = (ticket['fields'] as Map<String, dynamic>).map(
+      (key, value) => MapEntry(key, value.toString()),
+    );
+    final request =
+        http.MultipartRequest('POST', Uri.parse(ticket['upload_url'] as String))
+          ..fields.addAll(fields)
+          ..files.add(
+            http.MultipartFile.fromBytes('file', bytes, filename: filename),
+          );
+    final uploadResp = await http.Response.fromStream(await request.send());
+    if (uploadResp.statusCode != 200) {
+      throw Exception('Cloudinary upload failed: ${uploadResp.body}');
+    }
+    final uploaded = jsonDecode(uploadResp.body) as Map<String, dynamic>;
+
+    final confirmResp = await http.post(
+      Uri.parse('$baseUrl/api/uploads/confirm'),
+      headers: headers,
+      body: jsonEncode({
+        'public_id': uploaded['public_id'],
+        'version': uploaded['version'],
+        'signature': uploaded['signature'],
+        'format': uploaded['format'],
+        if (recipeId != null) 'recipe_id': recipeId,
+      }),
+    );
+    if (confirmResp.statusCode != 200) {
+      throw Exception('Upload confirm failed: ${confirmResp.body}');
+    }
+    return jsonDecode(confirmResp.body) as Map<String, dynamic>;
+  }
+}
@@ -208,6 +208,9 @@ class Recipe {
     return [];
   }
 
+  /// False for the card projection the list routes return (no ingredients or steps).
+  bool get hasDetails => ingredients.isNotEmpty || instructions.isNotEmpty;
+
   Recipe copyWith({
     String? id,
     String? name,
@@ -8,11 +8,11 @@ class MyRecipesRepository {
 
   MyRecipesRepository({required this.baseUrl, required this.accessToken});
 
-  /// Get all recipes for the current authenticated chef
+  /// Get all recipes for the current authenticated chef, in full for editing
   Future<List<Recipe>> getMyRecipes() async {
     try {
       final response = await http.get(
-        Uri.parse('$baseUrl/api/user/recipes'),
+        Uri.parse('$baseUrl/api/user/recipes?view=detail'),
         headers: {
           'Authorization': 'Bearer $accessToken',
           'Content-Type': 'application/json',
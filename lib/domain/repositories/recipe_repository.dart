@@ -104,6 +104,17 @@ class RecipeRepository {
     throw Exception('Failed to load all recipes');
   }
 
+  /// Full recipe (ingredients, steps, translations); list routes only return card fields.
+  Future<Recipe> fetchRecipeById(String recipeId) async {
+    final response = await _httpGetWithRetry(
+      Uri.parse('$baseUrl/api/recipes/$recipeId'),
+    );
+    if (response.statusCode == 200) {
+      return Recipe.fromJson(json.decode(response.body));
+    }
+    throw Exception('Failed to load recipe: ${response.statusCode}');
+  }
+
   Future<List<Recipe>> fetchRecipesResult(List<String> ingredients) async {
     try {
       final response = await http.post(
@@ -1,4 +1,3 @@
-import 'dart:convert';
 // unused import removed
 
 import 'package:chefkit/blocs/auth/auth_cubit.dart';
@@ -6,11 +5,10 @@ import 'package:chefkit/blocs/profile/profile_bloc.dart';
 import 'package:chefkit/blocs/profile/profile_events.dart';
 import 'package:chefkit/blocs/profile/profile_state.dart';
 import 'package:chefkit/common/constants.dart';
-import 'package:chefkit/common/config.dart';
+import 'package:chefkit/common/direct_image_upload.dart';
 import 'package:flutter/foundation.dart';
 import 'package:flutter/material.dart';
 import 'package:flutter_bloc/flutter_bloc.dart';
-import 'package:http/http.dart' as http;
 import 'package:image_picker/image_picker.dart';
 import 'package:chefkit/l10n/app_localizations.dart';
 
@@ -472,10 +470,6 @@ Future<void> _onEditAvatarPressed(BuildContext context, String userId) async {
     final bytes = await picked.readAsBytes();
     // print('Image size: ${bytes.length} bytes');
 
-    // print('Encoding to base64...');
-    final b64 = base64Encode(bytes);
-    // print('Base64 length: ${b64.length} characters');
-
     final authState = context.read<AuthCubit>().state;
     final accessToken = authState.accessToken;
     // print('Access token present: ${accessToken != null}');
@@ -486,30 +480,21 @@ Future<void> _onEditAvatarPressed(BuildContext context, String userId) async {
     //   // print('Access token preview: $preview');
     // }
 
-    final String baseUrl = AppConfig.baseUrl; // Use centralized config
-    // print('Upload URL: $baseUrl/api/users/$userId/avatar');
+    if (accessToken == null) {
+      // print('Avatar upload skipped: not authenticated');
+      return;
+    }
 
-    // print('Uploading to backend...');
-    final resp = await http.post(
-      Uri.parse('$baseUrl/api/users/$userId/avatar'),
-      headers: {
-        'Content-Type': 'application/json',
-        if (accessToken != null) 'Authorization': 'Bearer $accessToken',
-      },
-      body: jsonEncode({'image_base64': b64}),
+    // print('Uploading to Cloudinary...');
+    await DirectImageUpload.upload(
+      bytes: bytes,
+      kind: 'avatar',
+      accessToken: accessToken,
+      filename: picked.name,
     );
 
-    // print('Upload response: ${resp.statusCode}');
-    // print('Response body: ${resp.body}');
-    // print('Response headers: ${resp.headers}');
-
-    if (resp.statusCode == 200) {
-      // print('✅ Upload successful! Reloading profile...');
-      context.read<ProfileBloc>().add(LoadProfile(userId: userId));
-    } else {
-      // print('❌ Upload failed: ${resp.statusCode} ${resp.body}');
-      // print('Avatar upload failed: ${resp.statusCode} ${resp.body}');
-    }
+    // print('✅ Upload successful! Reloading profile...');
+    context.read<ProfileBloc>().add(LoadProfile(userId: userId));
   } catch (e) {
     // print('❌ Error in _onEditAvatarPressed: $e');
     // print('Avatar upload error: $e');
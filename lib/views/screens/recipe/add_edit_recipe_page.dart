@@ -1,12 +1,10 @@
-import 'dart:convert';
 // unused import removed
 import 'package:flutter/foundation.dart';
 import 'package:flutter/material.dart';
 import 'package:flutter_bloc/flutter_bloc.dart';
 import 'package:image_picker/image_picker.dart';
-import 'package:http/http.dart' as http;
 import '../../../common/constants.dart';
-import '../../../common/config.dart';
+import '../../../common/direct_image_upload.dart';
 import '../../../blocs/auth/auth_cubit.dart';
 import '../../../blocs/my_recipes/my_recipes_bloc.dart';
 import '../../../blocs/my_recipes/my_recipes_events.dart';
@@ -180,33 +178,19 @@ class _AddEditRecipePageState extends State<AddEditRecipePage> {
       final bytes = await picked.readAsBytes();
       // print('[recipe-image] Image size: ${bytes.length} bytes');
 
-      // print('[recipe-image] Encoding to base64...');
-      final b64 = base64Encode(bytes);
-
       final authState = context.read<AuthCubit>().state;
       final accessToken = authState.accessToken;
       if (accessToken == null) {
         throw Exception('Not authenticated');
       }
 
-      final String baseUrl = AppConfig.baseUrl; // Use centralized config
-
-      // print('[recipe-image] Uploading to backend...');
-      final resp = await http.post(
-        Uri.parse('$baseUrl/api/recipes/upload-image'),
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': 'Bearer $accessToken',
-        },
-        body: jsonEncode({'image_base64': b64}),
+      // print('[recipe-image] Uploading to Cloudinary...');
+      final data = await DirectImageUpload.upload(
+        bytes: bytes,
+        kind: 'recipe',
+        accessToken: accessToken,
+        filename: picked.name,
       );
-
-      if (resp.statusCode != 200) {
-        // print('[recipe-image] Upload failed: ${resp.statusCode} ${resp.body}');
-        throw Exception('Upload failed: ${resp.body}');
-      }
-
-      final data = jsonDecode(resp.body);
       final imageUrl = data['image_url'];
       // print('[recipe-image] Upload succeeded: $imageUrl');
 
@@ -13,13 +13,47 @@ import '../../../common/constants.dart';
 import '../../../domain/repositories/ingredients/ingredients_repository.dart';
 import '../../widgets/login_required_modal.dart';
 
-class RecipeDetailsPage extends StatelessWidget {
+class RecipeDetailsPage extends StatefulWidget {
   final Recipe recipe;
 
   const RecipeDetailsPage({Key? key, required this.recipe}) : super(key: key);
 
+  @override
+  State<RecipeDetailsPage> createState() => _RecipeDetailsPageState();
+}
+
+class _RecipeDetailsPageState extends State<RecipeDetailsPage> {
+  late Recipe _recipe;
+  bool _loading = false;
+
+  @override
+  void initState() {
+    super.initState();
+    _recipe = widget.recipe;
+    // List screens only get the card fields; load ingredients and steps here
+    if (!_recipe.hasDetails) {
+      _loading = true;
+      _loadFullRecipe();
+    }
+  }
+
+  Future<void> _loadFullRecipe() async {
+    try {
+      final full = await RecipeRepository().fetchRecipeById(widget.recipe.id);
+      if (!mounted) return;
+      _recipe = full.copyWith(isFavorite: widget.recipe.isFavorite);
+    } catch (e) {
+      // Fall back to the card fields we already have
+    }
+    if (mounted) setState(() => _loading = false);
+  }
+
   @override
   Widget build(BuildContext context) {
+    if (_loading) {
+      return const Scaffold(body: Center(child: CircularProgressIndicator()));
+    }
+    final recipe = _recipe;
     return BlocProvider(
       create: (_) =>
           RecipeDetailsCubit(